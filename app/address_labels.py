@@ -0,0 +1,124 @@
+import os
+import sys
+import csv
+import argparse
+import threading
+import numpy as np
+
+# Label codes are 1-based positions in this tuple; 0 means "unlabeled"
+CATEGORIES = ("dex", "bridge", "lending", "ens", "mixer", "scam")
+
+DEFAULT_LABELS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "address_labels.csv")
+
+
+def address_key(address):
+    """20-byte key of a hex address, or None if it is not a well-formed address."""
+    if not isinstance(address, str) or len(address) != 42 or not address.startswith(("0x", "0X")):
+        return None
+    try:
+        return bytes.fromhex(address[2:])
+    except ValueError:
+        return None
+
+
+class AddressLabels:
+    """
+    Read-only index of labeled addresses: 20-byte keys in a sorted NumPy array with one
+    category code per key, so a lookup is a binary search whatever the size of the index.
+    """
+    def __init__(self, keys, codes):
+        order = np.argsort(keys, kind="stable")
+        self.keys = np.asarray(keys, dtype="S20")[order]
+        self.codes = np.asarray(codes, dtype=np.uint8)[order]
+
+    def __len__(self):
+        return len(self.keys)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build an index from (address, category) pairs; malformed rows are skipped."""
+        keys, codes = [], []
+        for address, category in rows:
+            key = address_key(address.strip())
+            category = category.strip().lower()
+            if key is None or category not in CATEGORIES:
+                continue
+            keys.append(key)
+            codes.append(CATEGORIES.index(category) + 1)
+        return cls(np.array(keys, dtype="S20"), np.array(codes, dtype=np.uint8))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load an index from a compiled .npz file, or from a CSV of `address,category[,name]` rows.
+        """
+        if path.endswith(".npz"):
+            with np.load(path, allow_pickle=False) as data:
+                return cls(data["keys"], data["codes"])
+        with open(path, newline="") as f:
+            rows = (row[:2] for row in csv.reader(f) if len(row) >= 2 and not row[0].startswith("#"))
+            return cls.from_rows(rows)
+
+    def save(self, path):
+        """Write the compact binary form (sorted keys and codes) to an .npz file."""
+        np.savez(path, keys=self.keys, codes=self.codes)
+
+    def classify(self, addresses) -> np.ndarray:
+        """Category code of each address (0 when unlabeled), in one vectorized search."""
+        if not len(addresses) or not len(self.keys):
+            return np.zeros(len(addresses), dtype=np.uint8)
+        keys = [address_key(address) for address in addresses]
+        valid = np.array([key is not None for key in keys], dtype=bool)
+        keys = np.array([key or b"" for key in keys], dtype="S20")
+        positions = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        found = valid & (self.keys[positions] == keys)
+        return np.where(found, self.codes[positions], 0).astype(np.uint8)
+
+    def label(self, address):
+        """Category name of one address, or None."""
+        code = self.classify([address])[0]
+        return CATEGORIES[code - 1] if code else None
+
+    def count(self, history) -> dict:
+        """
+        Transactions per category in a columnar history: each distinct `to` address of the
+        batch is classified once and the codes are counted over the rows.
+        """
+        counts = dict.fromkeys(CATEGORIES, 0)
+        if not len(history):
+            return counts
+        ids, inverse = np.unique(history["to_id"], return_inverse=True)
+        codes = self.classify([history.addresses.values[i] for i in ids])
+        totals = np.bincount(codes[inverse], minlength=len(CATEGORIES) + 1)
+        for code, category in enumerate(CATEGORIES, start=1):
+            counts[category] = int(totals[code])
+        return counts
+
+
+_labels = None
+_labels_lock = threading.Lock()
+
+
+def get_labels() -> AddressLabels:
+    """
+    Return the process-wide label index, loading it from ADDRESS_LABELS_PATH on first use.
+    """
+    global _labels
+    with _labels_lock:
+        if _labels is None:
+            _labels = AddressLabels.load(os.getenv("ADDRESS_LABELS_PATH") or DEFAULT_LABELS_PATH)
+        return _labels
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile an address label CSV into the binary index format.")
+    parser.add_argument("input", help="CSV with address,category[,name] rows")
+    parser.add_argument("output", help="Output .npz file")
+    args = parser.parse_args(argv)
+    labels = AddressLabels.load(args.input)
+    labels.save(args.output)
+    print(f"Wrote {len(labels)} labels to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,30 @@
 import os
 import re
 import json
+import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from pydantic import BaseModel, Field
-from langchain.prompts import PromptTemplate
-from langchain_google_genai import GoogleGenerativeAI
-from langchain_core.output_parsers import PydanticOutputParser
+from cache import MISS, build_cache, make_key
+from metrics import span
+from fingerprints import elide
+from static_analysis import COMMENT_OR_STRING, COMMENT_OR_STRING_PATTERN, scan_source, clear_cut_category
+from chunking import DEFAULT_CHUNK_CHARS, split_source
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "gemini-1.5-flash"
+# Bump whenever the prompts or the output schema change so stale cache entries are ignored
+PROMPT_VERSION = "2"
+
+# Audit result cache: in-process LRU plus an optional on-disk SQLite tier
+audit_cache = build_cache(
+    max_entries=int(os.getenv("AUDIT_CACHE_SIZE", "256")),
+    ttl=int(os.getenv("AUDIT_CACHE_TTL", "86400")),
+    path=os.getenv("AUDIT_CACHE_PATH") or None,
+    max_bytes=int(os.getenv("AUDIT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+)
 
 # Define vulnerability patterns and fixes (unchanged)
 VULNERABILITY_PATTERNS = {
@@ -62,6 +82,20 @@ VULNERABILITY_PATTERNS = {
     }
 }
 
+# Severity order used to rank merged per-chunk results: most severe category first
+CATEGORY_PRIORITY = [
+    "Reentrancy", "Unauthorized Access", "Self-Destruct", "Overflow", "Frontrunning", "Gas Efficiency"
+]
+
+# Serialized once and embedded in the prompts as a partial variable
+VULNERABILITY_PATTERNS_JSON = json.dumps(VULNERABILITY_PATTERNS, indent=2)
+
+# Explains the placeholders that stand in for known library code (see fingerprints.py)
+LIBRARY_NOTE = (
+    "Bodies written as { /* [[trusted:N]] ... */ } are unmodified, widely audited library code that was "
+    "left out. Treat them as correct, and copy any such placeholder unchanged into code you output."
+)
+
 # Prompt template for vulnerability analysis
 template = """You are a professional smart contract reviewer. You are provided with a smart contract code below.
 Identify the most critical vulnerability in the contract from the following categories:
@@ -73,9 +107,38 @@ Return a JSON object that follows this format:
 # Vulnerability patterns and fixes
 VULNERABILITY_PATTERNS = {vulnerability_patterns}
 
+{library_note}
+
+<smart contract>
+{smart_contract}
+</smart contract>
+"""
+
+# Prompt template for fixed contract generation; the category is bound per chain
+fix_template = """You are a professional smart contract developer. A smart contract has been identified to have a vulnerability in the category "{category}". The original contract is provided below.
+{library_note}
+
+<smart contract>
+{smart_contract}
+</smart contract>
+
+Please produce a corrected version of this smart contract that addresses the identified vulnerability using best practices for {category}. Output only the fixed contract code.
+"""
+
+# Second fix attempt, when the first did not compile: the compiler's errors are fed back
+fix_retry_template = """You are a professional smart contract developer. A smart contract has been identified to have a vulnerability in the category "{category}". The original contract is provided below.
+{library_note}
+
 <smart contract>
 {smart_contract}
 </smart contract>
+
+A previous corrected version failed to compile with these errors:
+<compiler errors>
+{compiler_errors}
+</compiler errors>
+
+Please produce a corrected version of this smart contract that addresses the identified vulnerability using best practices for {category} and compiles without these errors. Output only the fixed contract code.
 """
 
 class SCParser(BaseModel):
@@ -91,72 +154,464 @@ class SCParser(BaseModel):
         description="List of suggested fixes for the identified vulnerability."
     )
 
-def is_smart_contract(code: str) -> bool:
+# Prompt template for the single-call mode: analysis and fixed source in one response
+combined_template = """You are a professional smart contract reviewer and developer. You are provided with a smart contract code below.
+Identify the most critical vulnerability in the contract from the following categories:
+Overflow, Reentrancy, Frontrunning, Unauthorized Access, Gas Efficiency, Self-Destruct.
+For the identified vulnerability, provide a list of recommended fixes, then produce a corrected version
+of the full contract that addresses it using best practices for that category.
+Return a JSON object that follows this format:
+{format_instructions}
+
+# Vulnerability patterns and fixes
+VULNERABILITY_PATTERNS = {vulnerability_patterns}
+
+{library_note}
+
+<smart contract>
+{smart_contract}
+</smart contract>
+"""
+
+class SCFixParser(SCParser):
+    """
+    Pydantic model for the combined analysis and fix generation response.
+    """
+    fixed_contract: str = Field(
+        ...,
+        description="The complete corrected smart contract source code, with no surrounding commentary."
+    )
+
+# Solidity keywords used to recognise an upload as a smart contract
+SOLIDITY_INDICATORS = (
+    "contract", "function", "public", "private", "view", "pure",
+    "returns", "address", "uint", "struct", "modifier", "event"
+)
+INDICATOR_THRESHOLD = 3
+# Only the head of the input is scanned; real contracts hit the threshold within a few hundred
+# bytes of code. Comments do not count against the limit, so a long license or NatSpec header
+# cannot push the code out of the window.
+INDICATOR_SCAN_LIMIT = 64 * 1024
+
+# One alternation per input type. The pattern starts with literals rather than \b so the regex
+# engine can skip ahead on their first characters; the leading boundary is checked by hand.
+_INDICATOR_ALTERNATION = "(?:" + "|".join(sorted(SOLIDITY_INDICATORS, key=len, reverse=True)) + ")"
+_INDICATOR_PATTERN = re.compile(_INDICATOR_ALTERNATION + r"\b")
+# bytes patterns only know ASCII word characters, so the trailing boundary of a bytes match is
+# checked by hand too, on the decoded character after it
+_INDICATOR_PATTERN_BYTES = re.compile(_INDICATOR_ALTERNATION.encode("ascii"))
+# Comments are skipped, not scanned: their words are not indicators and they do not count
+# against INDICATOR_SCAN_LIMIT. Strings are matched too, so a "//" inside one is left alone
+_COMMENT_PATTERN_BYTES = re.compile(COMMENT_OR_STRING.encode("ascii"), re.S)
+_WORD_BYTES = frozenset(b"abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_")
+
+def _is_word_char(ch) -> bool:
+    return ch.isalnum() or ch == "_"
+
+def _word_before_bytes(code, index) -> bool:
+    """Whether the UTF-8 character ending just before code[index] is a word character."""
+    byte = code[index - 1]
+    if byte < 0x80:
+        return byte in _WORD_BYTES
+    lead = index - 1
+    while lead > 0 and index - lead < 4 and 0x80 <= code[lead] < 0xC0:
+        lead -= 1
+    return _is_word_char(bytes(code[lead:index]).decode("utf-8", "replace")[-1])
+
+def _word_after_bytes(code, index) -> bool:
+    """Whether the UTF-8 character starting at code[index] is a word character."""
+    if index >= len(code):
+        return False
+    byte = code[index]
+    if byte < 0x80:
+        return byte in _WORD_BYTES
+    return _is_word_char(bytes(code[index:index + 4]).decode("utf-8", "replace")[0])
+
+def is_smart_contract(code) -> bool:
     """
     Validate if the uploaded file looks like a smart contract.
+    Accepts str, bytes, bytearray or memoryview, and stops as soon as enough
+    distinct indicators have been seen.
     """
-    solidity_indicators = [
-        r'\bcontract\b',
-        r'\bfunction\b',
-        r'\bpublic\b',
-        r'\bprivate\b',
-        r'\bview\b',
-        r'\bpure\b',
-        r'\breturns\b',
-        r'\baddress\b',
-        r'\buint\b',
-        r'\bstruct\b',
-        r'\bmodifier\b',
-        r'\bevent\b'
-    ]
-    indicators_found = sum(1 for pattern in solidity_indicators if re.search(pattern, code))
-    return indicators_found >= 3
+    if isinstance(code, str):
+        pattern, comments = _INDICATOR_PATTERN, COMMENT_OR_STRING_PATTERN
+        word_before = lambda data, index: _is_word_char(data[index - 1])
+        word_after = None
+    else:
+        if isinstance(code, memoryview) and code.format != "B":
+            code = code.cast("B")
+        pattern, comments = _INDICATOR_PATTERN_BYTES, _COMMENT_PATTERN_BYTES
+        word_before = _word_before_bytes
+        word_after = _word_after_bytes
+
+    found = set()
+    position = 0
+    search_from = 0
+    budget = INDICATOR_SCAN_LIMIT
+    while budget > 0 and position < len(code):
+        # Scan the code up to the next comment (or the end of the budget), then jump past it
+        comment = comments.search(code, search_from, position + budget)
+        if comment is not None and comment.lastgroup == "string":
+            # A string is code; look for the next comment after it
+            search_from = comment.end()
+            continue
+        stop = comment.start() if comment else min(len(code), position + budget)
+        for match in pattern.finditer(code, position, stop):
+            start = match.start()
+            if start and word_before(code, start):
+                continue
+            if word_after is not None and word_after(code, match.end()):
+                continue
+            found.add(match.group())
+            if len(found) >= INDICATOR_THRESHOLD:
+                return True
+        if comment is None:
+            break
+        budget -= stop - position
+        # Matched again without the budget's end, so a comment crossing it is skipped whole
+        position = search_from = comments.match(code, stop).end()
+    return False
+
+# Strings are kept verbatim; comments and whitespace runs collapse to a single space
+_NORMALIZE_PATTERN = re.compile(
+    r'(?P<string>"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\')|(?:\s|//[^\n]*|/\*.*?\*/)+',
+    re.S
+)
+
+def normalize_source(code: str) -> str:
+    """
+    Strip comments and whitespace so formatting-only changes map to the same cache key.
+    """
+    return _NORMALIZE_PATTERN.sub(lambda m: m.group("string") or " ", code).strip()
+
+# Chain registry: LLM clients, parsers and prompt chains are built once and shared
+# across requests and worker threads, so the client's connection pool is reused.
+_registry_lock = threading.RLock()
+_llms = {}
+_chains = {}
+# Gemini calls in flight at once in this process. Project audits run files on PROJECT_WORKERS
+# threads and each large file fans out to CHUNK_WORKERS more, so the pools alone do not bound it
+_llm_slots = threading.BoundedSemaphore(int(os.getenv("MAX_LLM_CONCURRENCY", "8")))
+
+def get_llm(model_name: str = MODEL_NAME):
+    """
+    Return the shared Gemini client for the given model.
+    """
+    with _registry_lock:
+        llm = _llms.get(model_name)
+        if llm is None:
+            # The Gemini SDK takes seconds to import, so it loads with the first client
+            from langchain_google_genai import GoogleGenerativeAI
+            from llm_usage import llm_callbacks
+
+            llm = GoogleGenerativeAI(
+                model=model_name, api_key=os.getenv("GOOGLE_GEMINI_API_KEY"), callbacks=llm_callbacks
+            )
+            _llms[model_name] = llm
+        return llm
+
+def _registered_chain(key, build):
+    chain = _chains.get(key)
+    if chain is None:
+        with _registry_lock:
+            chain = _chains.get(key)
+            if chain is None:
+                chain = build()
+                _chains[key] = chain
+    return chain
+
+def _build_parsed_chain(prompt_template, pydantic_object, model_name):
+    from langchain_core.prompts import PromptTemplate
+    from langchain_core.runnables import RunnableLambda
+    from langchain_core.output_parsers import PydanticOutputParser
+
+    parser = PydanticOutputParser(pydantic_object=pydantic_object)
+    prompt = PromptTemplate(
+        template=prompt_template,
+        input_variables=["smart_contract"],
+        partial_variables={
+            "format_instructions": parser.get_format_instructions(),
+            "vulnerability_patterns": VULNERABILITY_PATTERNS_JSON,
+            "library_note": LIBRARY_NOTE
+        }
+    )
+    def parse(text):
+        with span("parse", schema=pydantic_object.__name__):
+            return parser.parse(text)
+
+    return prompt | get_llm(model_name) | RunnableLambda(parse)
+
+def get_analysis_chain(model_name: str = MODEL_NAME):
+    """
+    Shared analysis chain (prompt | llm | SCParser).
+    """
+    return _registered_chain(
+        ("analysis", model_name),
+        lambda: _build_parsed_chain(template, SCParser, model_name)
+    )
+
+def get_combined_chain(model_name: str = MODEL_NAME):
+    """
+    Shared single-call chain (prompt | llm | SCFixParser).
+    """
+    return _registered_chain(
+        ("combined", model_name),
+        lambda: _build_parsed_chain(combined_template, SCFixParser, model_name)
+    )
+
+def get_fix_chain(category: str, model_name: str = MODEL_NAME):
+    """
+    Shared fix generation chain for a vulnerability category.
+    """
+    def build():
+        from langchain_core.prompts import PromptTemplate
+
+        prompt = PromptTemplate(
+            template=fix_template,
+            input_variables=["smart_contract"],
+            partial_variables={"category": category, "library_note": LIBRARY_NOTE}
+        )
+        return prompt | get_llm(model_name)
+
+    # Only the known categories are registered so model output cannot grow the registry
+    if category not in VULNERABILITY_PATTERNS:
+        return build()
+    return _registered_chain(("fix", model_name, category), build)
+
+def get_fix_retry_chain(category: str, model_name: str = MODEL_NAME):
+    """
+    Shared chain for the second fix attempt, which also gets the compiler errors.
+    """
+    def build():
+        from langchain_core.prompts import PromptTemplate
+
+        prompt = PromptTemplate(
+            template=fix_retry_template,
+            input_variables=["smart_contract", "compiler_errors"],
+            partial_variables={"category": category, "library_note": LIBRARY_NOTE}
+        )
+        return prompt | get_llm(model_name)
+
+    if category not in VULNERABILITY_PATTERNS:
+        return build()
+    return _registered_chain(("fix_retry", model_name, category), build)
+
+def static_analysis_result(smart_contract_text: str):
+    """
+    Run the local static pass. Returns (findings, result) where result is a complete
+    analysis dict when a finding is clear-cut and the LLM call can be skipped, else None.
+    """
+    findings = scan_source(smart_contract_text)
+    category = clear_cut_category(findings)
+    if category is None or os.getenv("STATIC_ANALYSIS_SHORT_CIRCUIT", "1") != "1":
+        return findings, None
+    result = {
+        "category": category,
+        "fixes": list(VULNERABILITY_PATTERNS[category]["fixes"]),
+        "source": "static"
+    }
+    return findings, result
+
+def library_elided(smart_contract_text: str):
+    """
+    The contract as sent to the model: bodies matching the library fingerprint index are
+    replaced by placeholders, which restore() turns back into the original code.
+    """
+    with span("library_match") as stage:
+        source = elide(smart_contract_text)
+        stage.attrs.update(blocks=len(source.blocks), saved_chars=len(smart_contract_text) - len(source.text))
+    return source
+
+def _check_placeholders(source, fixed_code):
+    missing = source.missing(fixed_code)
+    if missing:
+        logger.warning("Fixed contract dropped %d library placeholder(s): %s",
+                       len(missing), ", ".join(reference["name"] for reference in missing))
+
+def _restored(source, fixed_code):
+    _check_placeholders(source, fixed_code)
+    return source.restore(fixed_code)
 
 def analyze_smart_contract(smart_contract_text: str) -> dict:
     """
     Analyzes a smart contract for vulnerabilities using the Google Generative AI model.
     """
-    parser = PydanticOutputParser(pydantic_object=SCParser)
-    llm = GoogleGenerativeAI(model="gemini-1.5-flash", api_key=os.getenv("GOOGLE_GEMINI_API_KEY"))
-    prompt = PromptTemplate(
-        template=template,
-        input_variables=["smart_contract", "vulnerability_patterns"],
-        partial_variables={"format_instructions": parser.get_format_instructions()}
+    cache_key = make_key("analysis", PROMPT_VERSION, MODEL_NAME, normalize_source(smart_contract_text))
+    cached = audit_cache.get(cache_key)
+    if cached is not MISS:
+        return dict(cached)
+
+    source = library_elided(smart_contract_text)
+    with _llm_slots, span("analysis_chain", chars=len(source.text)):
+        output = get_analysis_chain().invoke({"smart_contract": source.text})
+    result = output.model_dump()
+    audit_cache.set(cache_key, result)
+    return dict(result)
+
+def analyze_smart_contract_chunked(smart_contract_text: str, max_chars: int = DEFAULT_CHUNK_CHARS,
+                                   max_workers: int = 4) -> dict:
+    """
+    Map-reduce analysis for large sources: the contract is split at contract/library/function
+    boundaries, chunks are analyzed concurrently and the per-chunk categories are merged into
+    one ranked result. The top-ranked category and its fixes keep the SCParser shape.
+    """
+    chunks = split_source(smart_contract_text, max_chars)
+    if len(chunks) == 1:
+        result = analyze_smart_contract(smart_contract_text)
+        result["chunks"] = 1
+        return result
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as executor:
+        # Each task runs in a copy of the caller's context so its spans join the request trace
+        futures = [
+            executor.submit(contextvars.copy_context().run, analyze_smart_contract, chunk["source"])
+            for chunk in chunks
+        ]
+        chunk_results = [future.result() for future in futures]
+
+    merged = {}
+    for chunk, chunk_result in zip(chunks, chunk_results):
+        category = chunk_result.get("category", "General")
+        entry = merged.setdefault(category, {"category": category, "fixes": [], "locations": []})
+        entry["locations"].append({
+            "name": chunk["name"], "start_line": chunk["start_line"], "end_line": chunk["end_line"]
+        })
+        for fix in chunk_result.get("fixes", []):
+            if fix not in entry["fixes"]:
+                entry["fixes"].append(fix)
+
+    def rank(entry):
+        # The more severe category first; the number of chunks only breaks ties
+        category = entry["category"]
+        priority = CATEGORY_PRIORITY.index(category) if category in CATEGORY_PRIORITY else len(CATEGORY_PRIORITY)
+        return (priority, -len(entry["locations"]))
+
+    ranked = sorted(merged.values(), key=rank)
+    return {
+        "category": ranked[0]["category"],
+        "fixes": ranked[0]["fixes"],
+        "ranked_categories": ranked,
+        "chunks": len(chunks)
+    }
+
+def analyze_and_fix_smart_contract(smart_contract_text: str) -> dict:
+    """
+    Single-call mode: returns the category, fixes and fixed contract from one Gemini round trip.
+    """
+    cache_key = make_key("combined", PROMPT_VERSION, MODEL_NAME, normalize_source(smart_contract_text))
+    cached = audit_cache.get(cache_key)
+    if cached is not MISS:
+        return dict(cached)
+
+    source = library_elided(smart_contract_text)
+    with _llm_slots, span("combined_chain", chars=len(source.text)):
+        output = get_combined_chain().invoke({"smart_contract": source.text})
+    result = output.model_dump()
+    if result.get("fixed_contract"):
+        result["fixed_contract"] = _restored(source, result["fixed_contract"])
+        audit_cache.set(cache_key, result)
+    else:
+        result["fixed_contract"] = "Error: No fixed code generated. Please check the prompt or the Gemini model."
+    return dict(result)
+
+def _too_large_to_fix(source, max_chars):
+    """The error returned instead of a fix when the prompt source is over max_chars, else None."""
+    if max_chars is None or len(source.text) <= max_chars:
+        return None
+    return (
+        f"Error: The contract is too large to generate a fixed version ({len(source.text)} characters, "
+        f"the limit is {max_chars}). Apply the listed fixes at the reported locations instead."
     )
-    chain = prompt | llm | parser
-    output = chain.invoke({
-        "smart_contract": smart_contract_text,
-        "vulnerability_patterns": json.dumps(VULNERABILITY_PATTERNS, indent=2)
-    })
-    return output.model_dump()
 
-def generate_fixed_contract(smart_contract_text: str, analysis_result: dict) -> str:
+def generate_fixed_contract(smart_contract_text: str, analysis_result: dict, max_chars: int = None) -> str:
     """
     Generates a fixed version of the smart contract code based on the identified vulnerability.
+    The model has to write the whole contract back, so sources over max_chars (after known
+    library code is left out) get an error message instead of a fix.
     """
     category = analysis_result.get("category", "General")
-    fixed_template = f"""You are a professional smart contract developer. A smart contract has been identified to have a vulnerability in the category "{category}". The original contract is provided below.
-
-<smart contract>
-{{smart_contract}}
-</smart contract>
+    cache_key = make_key("fix", PROMPT_VERSION, MODEL_NAME, category, normalize_source(smart_contract_text))
+    cached = audit_cache.get(cache_key)
+    if cached is not MISS:
+        return cached
 
-Please produce a corrected version of this smart contract that addresses the identified vulnerability using best practices for {category}. Output only the fixed contract code.
-"""
-    prompt = PromptTemplate(
-         template=fixed_template,
-         input_variables=["smart_contract"]
-    )
-    llm = GoogleGenerativeAI(model="gemini-1.5-flash", api_key=os.getenv("GOOGLE_GEMINI_API_KEY"))
-    chain = prompt | llm
-    # Invoke the chain with the original contract text to get the fixed version.
-    fixed_code = chain.invoke({"smart_contract": smart_contract_text})
-    # Debug output: print the fixed code (or an error message if empty)
+    chain = get_fix_chain(category)
+    source = library_elided(smart_contract_text)
+    too_large = _too_large_to_fix(source, max_chars)
+    if too_large:
+        return too_large
+    with _llm_slots, span("fix_chain", category=category, chars=len(source.text)):
+        fixed_code = chain.invoke({"smart_contract": source.text})
+    if fixed_code:
+        fixed_code = _restored(source, fixed_code)
     if not fixed_code:
         fixed_code = "Error: No fixed code generated. Please check the prompt or the Gemini model."
-    print("DEBUG: Fixed code:", fixed_code)
+    else:
+        audit_cache.set(cache_key, fixed_code)
+    logger.debug("Generated fixed contract (%d chars)", len(fixed_code))
     return fixed_code
 
+def regenerate_fixed_contract(smart_contract_text: str, analysis_result: dict, compiler_errors: list) -> str:
+    """
+    Second fix attempt for a fixed contract that did not compile, with the compiler errors in
+    the prompt. Returns an empty string when the model produced nothing.
+    """
+    category = analysis_result.get("category", "General")
+    errors = "\n".join(compiler_errors)
+    cache_key = make_key(
+        "fix_retry", PROMPT_VERSION, MODEL_NAME, category, normalize_source(smart_contract_text), errors
+    )
+    cached = audit_cache.get(cache_key)
+    if cached is not MISS:
+        return cached
+
+    source = library_elided(smart_contract_text)
+    with _llm_slots, span("fix_retry_chain", category=category, chars=len(source.text)):
+        fixed_code = get_fix_retry_chain(category).invoke(
+            {"smart_contract": source.text, "compiler_errors": errors}
+        )
+    if fixed_code:
+        fixed_code = _restored(source, fixed_code)
+        audit_cache.set(cache_key, fixed_code)
+    return fixed_code or ""
+
+def stream_fixed_contract(smart_contract_text: str, analysis_result: dict, max_chars: int = None):
+    """
+    Streaming variant of generate_fixed_contract: yields the fixed code in chunks as Gemini
+    produces them. The complete output is cached once the stream finishes.
+    """
+    category = analysis_result.get("category", "General")
+    cache_key = make_key("fix", PROMPT_VERSION, MODEL_NAME, category, normalize_source(smart_contract_text))
+    cached = audit_cache.get(cache_key)
+    if cached is not MISS:
+        yield cached
+        return
+
+    source = library_elided(smart_contract_text)
+    too_large = _too_large_to_fix(source, max_chars)
+    if too_large:
+        yield too_large
+        return
+    chunks = []
+    raw_chunks = []
+
+    def model_chunks():
+        with _llm_slots:
+            for chunk in get_fix_chain(category).stream({"smart_contract": source.text}):
+                if chunk:
+                    raw_chunks.append(chunk)
+                    yield chunk
+
+    # Placeholders are swapped back for the library code as the stream passes through
+    for chunk in source.restore_stream(model_chunks()):
+        chunks.append(chunk)
+        yield chunk
+    if chunks:
+        _check_placeholders(source, "".join(raw_chunks))
+        audit_cache.set(cache_key, "".join(chunks))
+    else:
+        yield "Error: No fixed code generated. Please check the prompt or the Gemini model."
+
 if __name__ == "__main__":
     # Example usage for testing
     smart_contract_text = "contract Example { uint public value; }"
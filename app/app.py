@@ -1,74 +1,602 @@
 import os
+import json
+import time
+import importlib
 from dotenv import load_dotenv
-from flask import Flask, request, render_template, jsonify
-import tempfile
+from flask import Flask, Request, Response, g, request, render_template, jsonify, stream_with_context
 from flask_cors import CORS
+from werkzeug.exceptions import HTTPException
 
 # Load environment variables
 load_dotenv()
 
 # Import the analysis functions including fixed contract generation
-from analyze import analyze_smart_contract, is_smart_contract, generate_fixed_contract
+import metrics
+import compiler
+import fingerprints
+from metrics import span
+from uploads import UploadRejected, in_memory_file_stream, read_text_upload
+from project import audit_project, is_archive, read_uploaded_files, unpack_archive
+from jobs import JobQueue, QueueFull, DONE, FAILED, build_job_store
+from analyze import (
+    analyze_smart_contract, is_smart_contract, generate_fixed_contract, static_analysis_result,
+    analyze_and_fix_smart_contract, analyze_smart_contract_chunked, stream_fixed_contract, audit_cache,
+    regenerate_fixed_contract
+)
+
+# Single-contract endpoints get a much tighter request size limit than MAX_CONTENT_LENGTH
+CONTRACT_UPLOAD_ENDPOINTS = ('audit', 'audit_stream')
+# Allowance for multipart boundaries and part headers on top of the file itself
+MULTIPART_OVERHEAD = 16 * 1024
+
+class AuditRequest(Request):
+    """
+    Request class that keeps uploads in memory and cuts off oversized contract requests while
+    the body is read: Werkzeug checks max_content_length against the Content-Length header
+    before parsing and while reading chunked bodies.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        # File parts are never kept beyond their endpoint's file limit (address lists for batch
+        # scoring, contracts everywhere else); archives are bounded by the request limit alone
+        if filename and is_archive(filename):
+            max_bytes = None
+        elif self.endpoint == 'reputation_batch':
+            max_bytes = app.config['MAX_BATCH_FILE_BYTES']
+        else:
+            max_bytes = app.config['MAX_CONTRACT_BYTES']
+        return in_memory_file_stream(total_content_length, content_type, filename, content_length, max_bytes)
+
+    @property
+    def max_content_length(self):
+        limit = super().max_content_length
+        if self.endpoint in CONTRACT_UPLOAD_ENDPOINTS:
+            contract_limit = app.config['MAX_CONTRACT_BYTES'] + MULTIPART_OVERHEAD
+            return contract_limit if limit is None else min(limit, contract_limit)
+        return limit
 
 app = Flask(__name__)
+app.request_class = AuditRequest
 CORS(app)
 
 # Configuration from environment variables
 app.config['GOOGLE_API_KEY'] = os.getenv('GOOGLE_API_KEY')
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+app.config['MAX_CONTRACT_BYTES'] = int(os.getenv('MAX_CONTRACT_BYTES', str(1024 * 1024)))  # 1MB per contract
+# "separate" runs analysis and fix generation as two calls, "combined" asks for both in one
+app.config['AUDIT_MODE'] = os.getenv('AUDIT_MODE', 'separate')
+
+# Upper bound on addresses accepted by one /reputation/batch request
+app.config['MAX_BATCH_ADDRESSES'] = int(os.getenv('MAX_BATCH_ADDRESSES', '10000'))
+app.config['BATCH_CONCURRENCY'] = int(os.getenv('BATCH_CONCURRENCY', '8'))
+# Address-list files uploaded to /reputation/batch: room for MAX_BATCH_ADDRESSES lines by default
+app.config['MAX_BATCH_FILE_BYTES'] = int(os.getenv('MAX_BATCH_FILE_BYTES', str(app.config['MAX_BATCH_ADDRESSES'] * 64)))
+
+# Sources above this size are analyzed in chunks; ?chunked=1 forces it for any size
+app.config['CHUNK_CHARS'] = int(os.getenv('CHUNK_CHARS', str(24 * 1024)))
+app.config['CHUNK_WORKERS'] = int(os.getenv('CHUNK_WORKERS', '4'))
+# Fixed contracts are generated whole, so sources above this size get the ranked fixes only
+app.config['MAX_FIX_CHARS'] = int(os.getenv('MAX_FIX_CHARS', str(app.config['CHUNK_CHARS'])))
+
+# Project audits (POST /audit/project): files per project, total source bytes, files audited at once.
+# The upload itself is capped by MAX_CONTENT_LENGTH; MAX_PROJECT_BYTES bounds the source read out
+# of it, which for a compressed archive can be several times the upload size
+app.config['MAX_PROJECT_FILES'] = int(os.getenv('MAX_PROJECT_FILES', '500'))
+app.config['MAX_PROJECT_BYTES'] = int(os.getenv('MAX_PROJECT_BYTES', str(32 * 1024 * 1024)))
+app.config['PROJECT_WORKERS'] = int(os.getenv('PROJECT_WORKERS', '8'))
+
+# Compile the fixed contract (and the original) with solc; a fix that breaks compilation is regenerated once.
+# Synchronous requests get the result as a job (verification status "pending" with a job_id)
+app.config['VERIFY_FIXES'] = os.getenv('VERIFY_FIXES', '1') == '1'
+
+AUDIT_MODES = ('separate', 'combined')
+
+# A missing index only makes prompts bigger, so it is easy to miss (e.g. an image built offline)
+if not os.path.exists(fingerprints.index_path()):
+    app.logger.warning(
+        f"Library fingerprint index not found at {fingerprints.index_path()}; known library code is "
+        "sent to the model in full. Build it with `python fingerprints.py fetch`."
+    )
+
+# Background audit jobs for POST /audit?async=1
+job_queue = JobQueue(
+    build_job_store(
+        os.getenv('AUDIT_JOB_STORE', 'memory'),
+        path=os.getenv('AUDIT_JOB_DB', 'audit_jobs.db'),
+        ttl=int(os.getenv('AUDIT_JOB_TTL', '3600'))
+    ),
+    concurrency=int(os.getenv('AUDIT_WORKERS', '4')),
+    max_pending=int(os.getenv('AUDIT_QUEUE_SIZE', '32'))
+)
+# Deferred compile verification gets its own workers and slots, so a burst of synchronous audits
+# cannot fill the queue ?async=1 audits use. It shares the job store, so /audit/<job_id> finds both
+verification_queue = JobQueue(
+    job_queue.store,
+    concurrency=int(os.getenv('VERIFY_WORKERS', '2')),
+    max_pending=int(os.getenv('VERIFY_QUEUE_SIZE', '64'))
+)
+
+def verify_fixed_contract(smart_contract_text, analysis_result, timings):
+    """
+    Compile-check the fixed contract against the original. When only the original compiles,
+    the fix is regenerated once with the compiler errors and kept if it compiles.
+    """
+    fixed_contract = analysis_result['fixed_contract']
+    if fixed_contract.startswith('Error:'):
+        return {'status': compiler.SKIPPED, 'reason': 'No fixed contract was generated'}
+
+    with span('compile_verification') as stage:
+        verification = compiler.verify_fix(smart_contract_text, fixed_contract)
+        stage.attrs['status'] = verification['status']
+    timings['compile_verification'] = stage.ms
+
+    if verification['status'] == compiler.FAILED:
+        with span('fix_retry') as stage:
+            retry = regenerate_fixed_contract(smart_contract_text, analysis_result, verification['fixed']['errors'])
+            retry_verification = compiler.verify_fix(smart_contract_text, retry) if retry else None
+            stage.attrs['status'] = retry_verification['status'] if retry_verification else None
+        timings['fix_retry'] = stage.ms
+        if retry_verification is not None and retry_verification['status'] == compiler.VERIFIED:
+            analysis_result['fixed_contract'] = retry
+            verification = retry_verification
+        verification['retried'] = True
+    return verification
+
+def verify_audit(smart_contract_text, analysis_result):
+    """
+    Job body for deferred verification: the verification and the fixed contract, which is the
+    regenerated one when the first fix did not compile and the retry did.
+    """
+    fix_input = {key: analysis_result[key] for key in ('category', 'fixes', 'fixed_contract') if key in analysis_result}
+    timings = {}
+    verification = verify_fixed_contract(smart_contract_text, fix_input, timings)
+    return {
+        'verification': verification,
+        'fixed_contract': fix_input['fixed_contract'],
+        'timings': {stage: round(ms, 3) for stage, ms in timings.items()}
+    }
+
+def verify_project(audits):
+    """Job body for deferred project verification: verify_audit per (path, code, result)."""
+    return {'files': {path: verify_audit(code, result) for path, code, result in audits}}
+
+def defer_verification(fn, *args):
+    """
+    Queue compile verification as a background job, so solc never runs on the request thread.
+    The returned status is "pending" with the job to poll at /audit/<job_id>.
+    """
+    try:
+        job_id = verification_queue.submit(fn, *args)
+    except QueueFull:
+        return {'status': compiler.SKIPPED, 'reason': 'The verification queue is full'}
+    return {'status': compiler.PENDING, 'job_id': job_id, 'location': f'/audit/{job_id}'}
+
+def run_audit(smart_contract_text, mode='separate', chunked=None, verify=True):
+    """
+    Analyze a contract and generate its fixed version, recording per-stage timings in ms.
+    With verify=False the caller is responsible for verification (see defer_verification).
+    """
+    if chunked is None:
+        chunked = len(smart_contract_text) > app.config['CHUNK_CHARS']
+    timings = {}
+    audit_start = time.perf_counter()
+
+    with span('static_analysis') as stage:
+        findings, analysis_result = static_analysis_result(smart_contract_text)
+    timings['static_analysis'] = stage.ms
+
+    # Chunked sources are analyzed piecewise, so they always take the two-stage path
+    if analysis_result is None and mode == 'combined' and not chunked:
+        with span('combined') as stage:
+            analysis_result = analyze_and_fix_smart_contract(smart_contract_text)
+        timings['combined'] = stage.ms
+    else:
+        if analysis_result is None:
+            with span('analysis', chunked=chunked) as stage:
+                if chunked:
+                    analysis_result = analyze_smart_contract_chunked(
+                        smart_contract_text, app.config['CHUNK_CHARS'], app.config['CHUNK_WORKERS']
+                    )
+                else:
+                    analysis_result = analyze_smart_contract(smart_contract_text)
+            timings['analysis'] = stage.ms
+        app.logger.debug(f"Analysis result: {analysis_result}")
+
+        with span('fix_generation') as stage:
+            analysis_result['fixed_contract'] = generate_fixed_contract(
+                smart_contract_text, analysis_result, app.config['MAX_FIX_CHARS']
+            )
+        timings['fix_generation'] = stage.ms
+
+    if app.config['VERIFY_FIXES'] and verify:
+        analysis_result['verification'] = verify_fixed_contract(smart_contract_text, analysis_result, timings)
+
+    timings['total'] = (time.perf_counter() - audit_start) * 1000
+    analysis_result['findings'] = findings
+    analysis_result['mode'] = mode
+    analysis_result['timings'] = {stage: round(ms, 3) for stage, ms in timings.items()}
+    return analysis_result
+
+def run_project_audit(files, mode='separate', verify=True):
+    """
+    Audit the files of a project ({path: bytes}) concurrently into one report. With verify=False
+    the fixes are verified by one background job, reported as the project's "verification".
+    """
+    codes = {}
+
+    def audit(code):
+        result = run_audit(code, mode, verify=verify)
+        codes[id(result)] = code
+        return result
+
+    report = audit_project(files, audit, app.config['MAX_CONTRACT_BYTES'], app.config['PROJECT_WORKERS'])
+    report['mode'] = mode
+    if app.config['VERIFY_FIXES'] and not verify:
+        audits = [
+            (entry['path'], codes[id(entry['result'])], entry['result'])
+            for entry in report['files'] if entry['role'] == 'source' and id(entry.get('result')) in codes
+        ]
+        report['verification'] = defer_verification(verify_project, audits) if audits else None
+    return report
+
+@app.before_request
+def start_request_trace():
+    g.trace = metrics.start_trace(method=request.method, path=request.path, endpoint=request.endpoint)
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    """Record latency and payload sizes; the trace is logged once the body has been sent."""
+    trace = g.pop('trace', None)
+    if trace is None:
+        return response
+    # Unmatched paths share one label so scanners cannot grow the series count
+    endpoint = request.endpoint or 'unmatched'
+    metrics.http_seconds.observe(
+        time.perf_counter() - g.pop('request_start'), endpoint=endpoint, method=request.method,
+        status=response.status_code
+    )
+    bytes_in = request.content_length or 0
+    metrics.http_bytes.inc(bytes_in, endpoint=endpoint, direction='in')
+    metrics.http_request_bytes.observe(bytes_in, endpoint=endpoint)
+    # Streamed bodies have no length up front; their size is left out
+    bytes_out = None if response.is_streamed else response.calculate_content_length()
+    if bytes_out is not None:
+        metrics.http_bytes.inc(bytes_out, endpoint=endpoint, direction='out')
+    response.headers['X-Request-ID'] = trace.id
+    status = response.status_code
+    response.call_on_close(
+        lambda: metrics.finish_trace(trace, status=status, bytes_in=bytes_in, bytes_out=bytes_out)
+    )
+    return response
+
+@app.errorhandler(413)
+def request_too_large(e):
+    return jsonify({'error': 'The uploaded file is too large.'}), 413
 
 @app.route('/')
 def home():
     return jsonify({'message': 'Welcome to TrustGuard AI'})
 
+def read_contract_upload():
+    """Read and validate the uploaded contract. Returns (text, None) or (None, error response)."""
+    # Check for file upload
+    if 'file' not in request.files:
+        return None, (jsonify({'error': 'No file uploaded'}), 400)
+
+    file = request.files['file']
+    if file.filename == '':
+        return None, (jsonify({'error': 'No file selected'}), 400)
+
+    if not file.filename.lower().endswith(('.sol', '.txt')):
+        return None, (jsonify({'error': 'Invalid file type. Please upload a Solidity (.sol) or text file.'}), 400)
+
+    def looks_valid(text):
+        with span('is_smart_contract'):
+            return is_smart_contract(text)
+
+    # Decode from the buffered upload; size, encoding and content checks run per chunk
+    try:
+        with span('upload') as stage:
+            smart_contract_text = read_text_upload(
+                file.stream, app.config['MAX_CONTRACT_BYTES'], looks_valid=looks_valid
+            )
+            stage.attrs['chars'] = len(smart_contract_text)
+    except UploadRejected as e:
+        return None, (jsonify({'error': str(e)}), e.status)
+
+    return smart_contract_text, None
+
 @app.route('/audit', methods=['POST'])
 def audit():
     """Handle smart contract audit requests and generate a fixed version of the contract."""
     try:
-        # Check for file upload
-        if 'file' not in request.files:
-            return jsonify({'error': 'No file uploaded'}), 400
-        
-        file = request.files['file']
-        if file.filename == '':
-            return jsonify({'error': 'No file selected'}), 400
-
-        if not file.filename.lower().endswith(('.sol', '.txt')):
-            return jsonify({'error': 'Invalid file type. Please upload a Solidity (.sol) or text file.'}), 400
-
-        try:
-            with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-                file.save(temp_file.name)
-                with open(temp_file.name, 'r') as f:
-                    smart_contract_text = f.read()
-        except IOError as e:
-            return jsonify({'error': f'File operation failed: {str(e)}'}), 500
-        finally:
-            try:
-                os.unlink(temp_file.name)
-            except (OSError, UnboundLocalError):
-                pass
-
-        # Validate that the uploaded file looks like a smart contract
-        if not is_smart_contract(smart_contract_text):
-            return jsonify({
-                'error': 'The uploaded file does not appear to be a valid smart contract. '
-                         'Please upload a Solidity smart contract file.'
-            }), 400
-
-        # Analyze the smart contract for vulnerabilities
-        analysis_result = analyze_smart_contract(smart_contract_text)
-        app.logger.debug(f"Analysis result: {analysis_result}")
+        mode = request.args.get('mode', app.config['AUDIT_MODE'])
+        if mode not in AUDIT_MODES:
+            return jsonify({'error': f'Invalid mode. Use one of: {", ".join(AUDIT_MODES)}.'}), 400
 
-        # Generate a fixed version of the smart contract
-        fixed_contract = generate_fixed_contract(smart_contract_text, analysis_result)
-        analysis_result['fixed_contract'] = fixed_contract
+        smart_contract_text, error_response = read_contract_upload()
+        if error_response is not None:
+            return error_response
 
-        return jsonify(analysis_result)
+        chunked = True if request.args.get('chunked') in ('1', 'true') else None
 
+        if request.args.get('async') in ('1', 'true'):
+            try:
+                job_id = job_queue.submit(run_audit, smart_contract_text, mode, chunked)
+            except QueueFull as e:
+                response = jsonify({'error': 'The audit queue is full. Please retry later.'})
+                response.headers['Retry-After'] = str(e.retry_after)
+                return response, 429
+            response = jsonify({'job_id': job_id, 'status': 'queued'})
+            response.headers['Location'] = f'/audit/{job_id}'
+            return response, 202
+
+        # The static pass runs first; the LLM is only asked when it is not conclusive. Compilation
+        # can take a while (and a retry), so it runs as a job the client polls
+        result = run_audit(smart_contract_text, mode, chunked, verify=False)
+        if app.config['VERIFY_FIXES']:
+            result['verification'] = (
+                defer_verification(verify_audit, smart_contract_text, result)
+                if not result['fixed_contract'].startswith('Error:')
+                else {'status': compiler.SKIPPED, 'reason': 'No fixed contract was generated'}
+            )
+        return jsonify(result)
+
+    except HTTPException:
+        raise
     except Exception as e:
         app.logger.error(f"Error processing request: {str(e)}")
         return jsonify({'error': 'An unexpected error occurred. Please try again.'}), 500
 
+def read_project_upload():
+    """
+    Read a project upload: one zip/tar archive, or several .sol files under the `file` field
+    (their names may carry relative paths). Returns ({path: bytes}, None) or (None, error response).
+    """
+    uploads = [file for file in request.files.getlist('file') if file.filename]
+    if not uploads:
+        return None, (jsonify({'error': 'No file uploaded'}), 400)
+
+    limits = (app.config['MAX_PROJECT_FILES'], app.config['MAX_PROJECT_BYTES'], app.config['MAX_CONTRACT_BYTES'])
+    try:
+        with span('project_upload') as stage:
+            if len(uploads) == 1 and is_archive(uploads[0].filename):
+                files = unpack_archive(uploads[0].stream.read(), uploads[0].filename, *limits)
+            elif all(file.filename.lower().endswith(('.sol', '.txt')) for file in uploads):
+                files = read_uploaded_files(((file.filename, file.stream) for file in uploads), *limits)
+            else:
+                return None, (jsonify({
+                    'error': 'Invalid file type. Please upload Solidity (.sol) files or a .zip/.tar.gz archive of them.'
+                }), 400)
+            stage.attrs['files'] = len(files)
+    except UploadRejected as e:
+        return None, (jsonify({'error': str(e)}), e.status)
+
+    return files, None
+
+@app.route('/audit/project', methods=['POST'])
+def project_audit():
+    """
+    Audit a multi-file project. Files are checked and audited in parallel, identical files once,
+    and the results come back as one report with the import graph and project-wide summary.
+    """
+    try:
+        mode = request.args.get('mode', app.config['AUDIT_MODE'])
+        if mode not in AUDIT_MODES:
+            return jsonify({'error': f'Invalid mode. Use one of: {", ".join(AUDIT_MODES)}.'}), 400
+
+        files, error_response = read_project_upload()
+        if error_response is not None:
+            return error_response
+
+        if request.args.get('async') in ('1', 'true'):
+            try:
+                job_id = job_queue.submit(run_project_audit, files, mode)
+            except QueueFull as e:
+                response = jsonify({'error': 'The audit queue is full. Please retry later.'})
+                response.headers['Retry-After'] = str(e.retry_after)
+                return response, 429
+            response = jsonify({'job_id': job_id, 'status': 'queued'})
+            response.headers['Location'] = f'/audit/{job_id}'
+            return response, 202
+
+        return jsonify(run_project_audit(files, mode, verify=False))
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        app.logger.error(f"Error processing project audit: {str(e)}")
+        return jsonify({'error': 'An unexpected error occurred. Please try again.'}), 500
+
+def sse_event(event, data):
+    """Format one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route('/audit/stream', methods=['POST'])
+def audit_stream():
+    """
+    Stream an audit over Server-Sent Events: static findings first, then the analysis
+    as soon as it is parsed, then the fixed contract chunk by chunk.
+    """
+    smart_contract_text, error_response = read_contract_upload()
+    if error_response is not None:
+        return error_response
+
+    trace = g.get('trace')
+
+    def events():
+        timings = {}
+        audit_start = time.perf_counter()
+        # The body is produced after the view returns, so the request trace is re-attached
+        with metrics.use_trace(trace):
+            try:
+                with span('static_analysis') as stage:
+                    findings, analysis_result = static_analysis_result(smart_contract_text)
+                timings['static_analysis'] = stage.ms
+                yield sse_event('findings', {'findings': findings})
+
+                if analysis_result is None:
+                    chunked = len(smart_contract_text) > app.config['CHUNK_CHARS']
+                    with span('analysis', chunked=chunked) as stage:
+                        if chunked:
+                            analysis_result = analyze_smart_contract_chunked(
+                                smart_contract_text, app.config['CHUNK_CHARS'], app.config['CHUNK_WORKERS']
+                            )
+                        else:
+                            analysis_result = analyze_smart_contract(smart_contract_text)
+                    timings['analysis'] = stage.ms
+                yield sse_event('analysis', analysis_result)
+
+                fixed_chunks = []
+                with span('fix_generation', streamed=True) as stage:
+                    start = time.perf_counter()
+                    for chunk in stream_fixed_contract(smart_contract_text, analysis_result, app.config['MAX_FIX_CHARS']):
+                        if 'fix_first_chunk' not in timings:
+                            timings['fix_first_chunk'] = (time.perf_counter() - start) * 1000
+                            stage.attrs['first_chunk_ms'] = round(timings['fix_first_chunk'], 3)
+                        fixed_chunks.append(chunk)
+                        yield sse_event('fixed_contract', {'chunk': chunk})
+                timings['fix_generation'] = stage.ms
+
+                # The fix has already been sent, so the job reports a failed check (and a retried
+                # fix) for the client to fetch; the stream does not wait for the compiler
+                if app.config['VERIFY_FIXES'] and not fixed_chunks[0].startswith('Error:'):
+                    yield sse_event('verification', defer_verification(
+                        verify_audit, smart_contract_text, {**analysis_result, 'fixed_contract': ''.join(fixed_chunks)}
+                    ))
+
+                timings['total'] = (time.perf_counter() - audit_start) * 1000
+                yield sse_event('done', {'timings': {stage: round(ms, 3) for stage, ms in timings.items()}})
+            except Exception as e:
+                app.logger.error(f"Error streaming audit: {str(e)}")
+                yield sse_event('error', {'error': 'An unexpected error occurred. Please try again.'})
+
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    return Response(stream_with_context(events()), mimetype='text/event-stream', headers=headers)
+
+@app.route('/reputation/analyze', methods=['POST'])
+def reputation_analyze():
+    """Generate LLM insights for one wallet address."""
+    # The reputation modules need Etherscan/Gemini keys, so they load on first use only
+    from reputation import analyze_wallet
+
+    data = request.get_json(silent=True) or {}
+    try:
+        return jsonify(analyze_wallet(data.get('wallet_address')))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        app.logger.error(f"Error analyzing wallet: {str(e)}")
+        return jsonify({'error': 'An unexpected error occurred. Please try again.'}), 500
+
+@app.route('/reputation/batch', methods=['POST'])
+def reputation_batch():
+    """
+    Score many wallets at once. Accepts a JSON body {"addresses": [...]}, an uploaded file or a
+    plain-text body with one address per line; streams one NDJSON result per wallet as it finishes.
+    """
+    from batch import iter_scores, prepare_addresses
+
+    data = request.get_json(silent=True)
+    if isinstance(data, dict) and isinstance(data.get('addresses'), list):
+        raw_addresses = [str(address) for address in data['addresses']]
+    elif 'file' in request.files:
+        max_bytes = app.config['MAX_BATCH_FILE_BYTES']
+        raw = request.files['file'].read(max_bytes + 1)
+        if len(raw) > max_bytes:
+            return jsonify({'error': f"Address list is too large. Batch files are limited to {-(-max_bytes // 1024)} KB."}), 413
+        raw_addresses = raw.decode('utf-8', errors='replace').splitlines()
+    else:
+        raw_addresses = request.get_data(as_text=True).splitlines()
+
+    addresses, invalid = prepare_addresses(raw_addresses)
+    if not addresses:
+        return jsonify({'error': 'No valid wallet addresses supplied', 'invalid': invalid}), 400
+    if len(addresses) > app.config['MAX_BATCH_ADDRESSES']:
+        return jsonify({'error': f"At most {app.config['MAX_BATCH_ADDRESSES']} addresses per batch"}), 413
+
+    def lines():
+        for address in invalid:
+            yield json.dumps({'wallet_address': address, 'error': 'Invalid Ethereum address'}) + '\n'
+        for result in iter_scores(addresses, app.config['BATCH_CONCURRENCY']):
+            yield json.dumps(result) + '\n'
+
+    return Response(stream_with_context(lines()), mimetype='application/x-ndjson')
+
+@app.route('/reputation/cache', methods=['GET'])
+def reputation_cache_stats():
+    """Report hit ratio and refresh lag for the reputation result cache."""
+    from reputation_cache import get_reputation_cache
+
+    return jsonify(get_reputation_cache().stats())
+
+@app.route('/reputation/<address>', methods=['GET', 'POST'])
+def reputation_score(address):
+    """
+    Return a wallet's reputation score. Cached results are served immediately; results past
+    their TTL are served stale while a background refresh recomputes them.
+    """
+    from reputation import is_valid_eth_address
+    from reputation_cache import get_reputation_cache
+
+    if not is_valid_eth_address(address):
+        return jsonify({'error': 'Invalid Ethereum address'}), 400
+    try:
+        result, status, age = get_reputation_cache().get(address)
+    except Exception as e:
+        app.logger.error(f"Error scoring wallet: {str(e)}")
+        return jsonify({'error': 'An unexpected error occurred. Please try again.'}), 500
+    response = jsonify(result)
+    response.headers['X-Cache'] = status.upper()
+    response.headers['Age'] = str(int(age))
+    return response
+
+@app.route('/audit/<job_id>', methods=['GET'])
+def audit_job(job_id):
+    """Return the status of an async audit (or deferred verification) job, and its result once done."""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job ID'}), 404
+
+    body = {'job_id': job['id'], 'status': job['status']}
+    if job['status'] == DONE:
+        body['result'] = job['result']
+    elif job['status'] == FAILED:
+        body['error'] = 'An unexpected error occurred. Please try again.'
+    return jsonify(body)
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Stage latencies, model token usage and payload sizes in the Prometheus text format."""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/audit/cache', methods=['GET'])
+def audit_cache_stats():
+    """Report hit/miss counters for the audit result cache."""
+    return jsonify(audit_cache.stats())
+
+# Loaded lazily on first use; warmup() pulls them in ahead of traffic
+WARMUP_MODULES = (
+    'langchain_google_genai', 'langchain_core.prompts', 'langchain_core.output_parsers',
+    'langchain_core.runnables', 'llm_usage', 'reputation', 'reputation_cache', 'batch'
+)
+
+def warmup():
+    """
+    Import the heavy modules and load read-only data (address labels, scoring model) before the
+    first request. Meant for the gunicorn master ahead of forking, so workers share it; opens no
+    connections and makes no network calls.
+    """
+    from address_labels import get_labels
+    from scoring import get_model
+
+    started = time.perf_counter()
+    for module in WARMUP_MODULES:
+        importlib.import_module(module)
+    get_labels()
+    get_model()
+    app.logger.info(f"Warmup finished in {(time.perf_counter() - started) * 1000:.0f} ms")
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000)
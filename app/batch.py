@@ -0,0 +1,143 @@
+import sys
+import json
+import queue
+import asyncio
+import argparse
+import threading
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from reputation import calculate_reputation_score, is_valid_eth_address
+
+DEFAULT_CONCURRENCY = 8
+_DONE = object()
+
+
+def prepare_addresses(raw_addresses):
+    """
+    Validate and dedupe addresses (case-insensitively), keeping first-seen order.
+    Returns (valid, invalid).
+    """
+    valid = []
+    invalid = []
+    seen = set()
+    for raw in raw_addresses:
+        address = raw.strip()
+        if not address:
+            continue
+        if not is_valid_eth_address(address):
+            invalid.append(address)
+            continue
+        key = address.lower()
+        if key not in seen:
+            seen.add(key)
+            valid.append(address)
+    return valid, invalid
+
+
+async def _score(address):
+    try:
+        return await calculate_reputation_score(address)
+    except Exception as e:
+        return {"wallet_address": address, "error": str(e)}
+
+
+async def score_wallets(addresses, concurrency=DEFAULT_CONCURRENCY):
+    """
+    Score addresses through a bounded pool of workers, yielding each result as soon as that
+    wallet finishes (not in input order). Failures are yielded as {"wallet_address", "error"}.
+    """
+    pending = asyncio.Queue()
+    for address in addresses:
+        pending.put_nowait(address)
+    results = asyncio.Queue()
+
+    async def worker():
+        while True:
+            try:
+                address = pending.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            await results.put(await _score(address))
+
+    workers = [asyncio.create_task(worker()) for _ in range(max(1, min(concurrency, len(addresses))))]
+    try:
+        for _ in range(len(addresses)):
+            yield await results.get()
+    finally:
+        for task in workers:
+            task.cancel()
+
+
+def iter_scores(addresses, concurrency=DEFAULT_CONCURRENCY):
+    """
+    Synchronous view of score_wallets for WSGI handlers: the async pipeline runs on its own
+    event loop in a background thread and results are handed over as they complete.
+    """
+    handoff = queue.Queue(maxsize=concurrency * 2)
+    # Set when the consumer goes away (e.g. the HTTP client disconnects) so the pipeline stops
+    stop = threading.Event()
+
+    def offer(item):
+        while not stop.is_set():
+            try:
+                handoff.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def run():
+        async def pump():
+            async for result in score_wallets(addresses, concurrency):
+                if not offer(result):
+                    return
+
+        try:
+            asyncio.run(pump())
+        finally:
+            offer(_DONE)
+
+    threading.Thread(target=run, name="reputation-batch", daemon=True).start()
+    try:
+        while True:
+            result = handoff.get()
+            if result is _DONE:
+                return
+            yield result
+    finally:
+        stop.set()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score wallet reputations in bulk, writing NDJSON.")
+    parser.add_argument("input", nargs="?", default="-", help="File with one address per line (default: stdin)")
+    parser.add_argument("-o", "--output", default="-", help="Output NDJSON file (default: stdout)")
+    parser.add_argument("-c", "--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="Wallets scored at once")
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.input == "-" else open(args.input)
+    with source:
+        addresses, invalid = prepare_addresses(source)
+    for address in invalid:
+        print(f"Skipping invalid address: {address}", file=sys.stderr)
+
+    output = sys.stdout if args.output == "-" else open(args.output, "w")
+
+    async def run():
+        async for result in score_wallets(addresses, args.concurrency):
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+
+    try:
+        asyncio.run(run())
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
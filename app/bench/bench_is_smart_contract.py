@@ -0,0 +1,72 @@
+"""
+Micro-benchmark for is_smart_contract: the single-pass scanner against the previous
+twelve-regex implementation, on a real contract and on multi-megabyte junk.
+
+Run from the app directory:  python bench/bench_is_smart_contract.py
+"""
+import os
+import re
+import sys
+import json
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from analyze import SOLIDITY_INDICATORS, is_smart_contract
+
+CONTRACT = """// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.0;
+
+contract Vault {
+    mapping(address => uint) public balances;
+
+    event Deposit(address indexed from, uint amount);
+
+    function deposit() external payable {
+        balances[msg.sender] += msg.value;
+        emit Deposit(msg.sender, msg.value);
+    }
+
+    function balanceOf(address owner) public view returns (uint) {
+        return balances[owner];
+    }
+}
+"""
+
+_LEGACY_PATTERNS = [r"\b%s\b" % word for word in SOLIDITY_INDICATORS]
+
+
+def legacy_is_smart_contract(code: str) -> bool:
+    """The previous implementation: one re.search per indicator over the whole input."""
+    return sum(1 for pattern in _LEGACY_PATTERNS if re.search(pattern, code)) >= 3
+
+
+def measure(fn, arg, number):
+    """Mean time per call in microseconds."""
+    return timeit.timeit(lambda: fn(arg), number=number) / number * 1e6
+
+
+def run(junk_bytes=4 * 1024 * 1024):
+    junk = os.urandom(junk_bytes)
+    junk_text = junk.decode("latin-1")
+    html = ("<div class='row'><p>Lorem ipsum dolor sit amet</p></div>\n" * (junk_bytes // 60))[:junk_bytes]
+    cases = [
+        ("contract_str", legacy_is_smart_contract, is_smart_contract, CONTRACT, CONTRACT, 2000),
+        ("binary_junk", legacy_is_smart_contract, is_smart_contract, junk_text, memoryview(junk), 5),
+        ("html_junk", legacy_is_smart_contract, is_smart_contract, html, html, 5),
+    ]
+    report = {}
+    for name, legacy, current, legacy_arg, current_arg, number in cases:
+        assert legacy(legacy_arg) == current(current_arg), name
+        legacy_us = measure(legacy, legacy_arg, number)
+        current_us = measure(current, current_arg, number)
+        report[name] = {
+            "legacy_us": round(legacy_us, 2),
+            "current_us": round(current_us, 2),
+            "speedup": round(legacy_us / current_us, 1)
+        }
+    return report
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,217 @@
+"""
+Local stand-in for the Etherscan account API, for offline benchmarks and manual testing.
+
+It replays recorded histories (a JSON fixture of {address: {action: [records]}}) or
+synthetic ones, with Etherscan's pagination (startblock/endblock, page/offset, the
+10,000-record result window), its "No transactions found" and "Max rate limit reached"
+answers, and optional injected 5xx errors.
+
+Run from the app directory:
+    python bench/fake_etherscan.py serve --synthetic 0xabc...=10000 --port 8545
+    python bench/fake_etherscan.py record 0xabc... fixture.json   (needs ETHERSCAN_API_KEY)
+Point the app at it with ETHERSCAN_API_URL=http://127.0.0.1:8545/api.
+"""
+import os
+import sys
+import json
+import random
+import argparse
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from etherscan import HISTORY_ACTIONS, MAX_PAGE_SIZE, TokenBucket, EtherscanClient
+
+# Share of a synthetic wallet's transaction count generated for each action
+SYNTHETIC_MIX = {"txlist": 1.0, "txlistinternal": 0.1, "tokentx": 0.25, "tokennfttx": 0.05}
+
+_COUNTERPARTIES = (
+    "0x7a250d5630b4cf539739df2c5dacb4c659f2488d",  # Uniswap V2 Router
+    "0x3ee18b2214aff97000d974cf647e7c347e8fa585",  # Wormhole
+    "0x7d2768de32b0b80b7a3454c06bdac94a69ddc7a9",  # Aave
+    "0x00000000000c2e074ec69a0dfb2997ba6c7d2e1e",  # ENS Registry
+)
+
+
+def synthetic_history(address, transactions, seed=0, start_time=1500000000):
+    """
+    Deterministic synthetic history of about `transactions` normal transactions, plus
+    internal, token and NFT transfers in SYNTHETIC_MIX proportions. Several records share
+    each block, like a busy wallet.
+    """
+    rng = random.Random(f"{seed}:{address.lower()}")
+    peers = list(_COUNTERPARTIES) + ["0x%040x" % rng.getrandbits(160) for _ in range(200)]
+    history = {}
+    for action, share in SYNTHETIC_MIX.items():
+        records = []
+        block, timestamp = 4000000, start_time
+        for i in range(int(transactions * share)):
+            if rng.random() < 0.7:
+                block += rng.randint(1, 400)
+                timestamp += rng.randint(1, 40000)
+            record = {
+                "blockNumber": str(block),
+                "timeStamp": str(timestamp),
+                "hash": "0x%064x" % rng.getrandbits(256),
+                "from": address.lower(),
+                "to": rng.choice(peers) if rng.random() > 0.002 else "",
+                "value": str(rng.getrandbits(64)),
+                "contractAddress": "",
+                "isError": "1" if rng.random() < 0.05 else "0",
+                "gas": "210000",
+                "gasUsed": str(rng.randint(21000, 200000)),
+            }
+            if action == "txlist":
+                record["gasPrice"] = str(rng.randint(10 ** 9, 2 * 10 ** 11))
+            elif action == "txlistinternal":
+                record["traceId"] = str(i % 3)
+            elif action == "tokentx":
+                record.update(tokenSymbol=rng.choice(("USDC", "DAI", "WETH", "UNI", "LINK", "AAVE")),
+                              tokenName="Token", tokenDecimal=rng.choice(("6", "18")), logIndex=str(i % 50))
+            else:
+                record.update(tokenName=rng.choice(("Azuki", "Doodles", "Moonbirds", "Pudgy Penguins")),
+                              tokenSymbol="NFT", tokenID=str(i), logIndex=str(i % 50))
+            if record["to"] == "" and action == "txlist":
+                record["contractAddress"] = "0x%040x" % rng.getrandbits(160)
+            records.append(record)
+        history[action] = records
+    return history
+
+
+class FakeEtherscan:
+    """
+    In-memory Etherscan: serves {address: {action: [records]}} with the real API's paging and
+    error answers. `rate_limit` (requests/second) returns "Max rate limit reached" when
+    exceeded; `error_rate` is the probability of answering HTTP 503.
+    """
+    def __init__(self, histories=None, rate_limit=None, error_rate=0.0, seed=0):
+        self.histories = {address.lower(): history for address, history in (histories or {}).items()}
+        self.rate_limit = rate_limit
+        self._bucket = TokenBucket(rate_limit) if rate_limit else None
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "rate_limited": 0, "errors": 0, "records_served": 0}
+
+    def add(self, address, history):
+        self.histories[address.lower()] = history
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.stats[name] += amount
+
+    def _throttled(self):
+        return self._bucket is not None and self._bucket.try_acquire() > 0
+
+    def respond(self, params):
+        """(http_status, body) for one API request."""
+        self._count("requests")
+        with self._lock:
+            failing = self.error_rate and self._random.random() < self.error_rate
+        if failing:
+            self._count("errors")
+            return 503, {"message": "Service Unavailable"}
+        if self._throttled():
+            self._count("rate_limited")
+            return 200, {"status": "0", "message": "NOTOK", "result": "Max rate limit reached"}
+
+        action = params.get("action")
+        address = (params.get("address") or "").lower()
+        history = self.histories.get(address, {})
+        if action == "balance":
+            return 200, {"status": "1", "message": "OK", "result": str(len(history.get("txlist", ())) * 10 ** 15)}
+        if action not in HISTORY_ACTIONS:
+            return 200, {"status": "0", "message": "NOTOK", "result": "Error! Invalid action"}
+
+        page = int(params.get("page", 1))
+        offset = int(params.get("offset", MAX_PAGE_SIZE))
+        if page * offset > MAX_PAGE_SIZE:
+            return 200, {"status": "0", "message": "NOTOK", "result": "Result window is too large, PageNo x Offset size must be less than or equal to 10000"}
+        start, end = int(params.get("startblock", 0)), int(params.get("endblock", 99999999))
+        records = [record for record in history.get(action, ()) if start <= int(record["blockNumber"]) <= end]
+        if params.get("sort") == "desc":
+            records.reverse()
+        records = records[(page - 1) * offset:page * offset]
+        if not records:
+            return 200, {"status": "0", "message": "No transactions found", "result": []}
+        self._count("records_served", len(records))
+        return 200, {"status": "1", "message": "OK", "result": records}
+
+
+def serve(fake, host="127.0.0.1", port=0):
+    """Start a threaded HTTP server for `fake` in the background; returns the server (see .url)."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            params = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+            status, body = fake.respond(params)
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    server.url = f"http://{host}:{server.server_address[1]}/api"
+    threading.Thread(target=server.serve_forever, name="fake-etherscan", daemon=True).start()
+    return server
+
+
+def record(address, path, api_key=None):
+    """Capture a wallet's live history into a fixture file that `serve --fixture` can replay."""
+    client = EtherscanClient(api_key=api_key or os.getenv("ETHERSCAN_API_KEY"))
+    history = {action: list(client.iter_account_action(action, address)) for action in HISTORY_ACTIONS}
+    fixture = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            fixture = json.load(f)
+    fixture[address.lower()] = history
+    with open(path, "w") as f:
+        json.dump(fixture, f)
+    return {action: len(records) for action, records in history.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fake Etherscan API server.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_parser = commands.add_parser("serve", help="Serve recorded or synthetic histories")
+    serve_parser.add_argument("--fixture", help="JSON file of {address: {action: [records]}}")
+    serve_parser.add_argument("--synthetic", action="append", default=[], metavar="ADDRESS=COUNT",
+                              help="Generate a synthetic history with COUNT normal transactions")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8545)
+    serve_parser.add_argument("--rate-limit", type=float, help="Requests per second before throttling")
+    serve_parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of an HTTP 503")
+    record_parser = commands.add_parser("record", help="Record a live wallet history into a fixture")
+    record_parser.add_argument("address")
+    record_parser.add_argument("fixture")
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        print(json.dumps(record(args.address, args.fixture)))
+        return
+
+    fake = FakeEtherscan(rate_limit=args.rate_limit, error_rate=args.error_rate)
+    if args.fixture:
+        with open(args.fixture) as f:
+            for address, history in json.load(f).items():
+                fake.add(address, history)
+    for spec in args.synthetic:
+        address, count = spec.split("=")
+        fake.add(address, synthetic_history(address, int(count)))
+    server = serve(fake, args.host, args.port)
+    print(f"Fake Etherscan listening on {server.url}", file=sys.stderr)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
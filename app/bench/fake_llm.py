@@ -0,0 +1,81 @@
+"""
+Offline stand-in for the Gemini model: a LangChain LLM with configurable latency that answers
+the audit prompts with well-formed output and streams it token by token.
+
+    from fake_llm import FakeGemini, install
+    install(FakeGemini(latency=0.2, token_latency=0.005))
+
+install() swaps it into the analyze chain registry, so every audit path (/audit,
+/audit/stream, chunked and combined modes) runs against it without network access.
+"""
+import os
+import re
+import sys
+import json
+import time
+from typing import Any, Iterator, List, Optional
+
+from langchain_core.language_models.llms import LLM
+from langchain_core.outputs import GenerationChunk
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+_CONTRACT_PATTERN = re.compile(r"<smart contract>\n?(.*?)\n?</smart contract>", re.S)
+# Output is streamed in pieces of roughly this many characters, like model tokens
+TOKEN_CHARS = 4
+
+
+class FakeGemini(LLM):
+    """
+    Deterministic fake model. `latency` is the time to the first token and `token_latency`
+    the delay between streamed tokens; a plain call costs the same as a full stream.
+    """
+    latency: float = 0.0
+    token_latency: float = 0.0
+    category: str = "Reentrancy"
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-gemini"
+
+    def respond(self, prompt: str) -> str:
+        """The answer a well-behaved model would give to one of the audit prompts."""
+        match = _CONTRACT_PATTERN.search(prompt)
+        contract = match.group(1) if match else ""
+        fixes = ["Apply the checks-effects-interactions pattern", "Add a reentrancy guard"]
+        if '"fixed_contract"' in prompt:
+            return json.dumps({"category": self.category, "fixes": fixes, "fixed_contract": contract})
+        if "Return a JSON object" in prompt:
+            return json.dumps({"category": self.category, "fixes": fixes})
+        return contract
+
+    def _tokens(self, text):
+        return [text[i:i + TOKEN_CHARS] for i in range(0, len(text), TOKEN_CHARS)]
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> str:
+        self.calls += 1
+        text = self.respond(prompt)
+        time.sleep(self.latency + self.token_latency * len(self._tokens(text)))
+        return text
+
+    def _stream(self, prompt: str, stop: Optional[List[str]] = None, run_manager=None,
+                **kwargs: Any) -> Iterator[GenerationChunk]:
+        self.calls += 1
+        time.sleep(self.latency)
+        for token in self._tokens(self.respond(prompt)):
+            time.sleep(self.token_latency)
+            yield GenerationChunk(text=token)
+
+
+def install(llm, model_name=None):
+    """Register `llm` as the analyze module's model and drop chains built on the previous one."""
+    import analyze
+    from llm_usage import llm_callbacks
+
+    # Report usage to /metrics like the real client does
+    llm.callbacks = list(llm_callbacks)
+    with analyze._registry_lock:
+        analyze._llms[model_name or analyze.MODEL_NAME] = llm
+        analyze._chains.clear()
+    return llm
@@ -0,0 +1,217 @@
+"""
+Offline benchmark suite. Every external service is replaced: Etherscan by the fake server in
+fake_etherscan.py and Gemini by the fake model in fake_llm.py, so runs are repeatable and
+reports from different commits can be compared directly.
+
+Run from the app directory:
+    python bench/run_benchmarks.py                       # all suites, report in bench/results/
+    python bench/run_benchmarks.py --suite wallet --wallet-sizes 1000,10000
+    python bench/run_benchmarks.py --output report.json
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import statistics
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.join(BENCH_DIR, "..")
+sys.path.insert(0, APP_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+# Benchmarks never touch local state left by the app or the real services
+os.environ["WALLET_STORE_PATH"] = ""
+os.environ["AUDIT_CACHE_PATH"] = ""
+os.environ.setdefault("ETHERSCAN_API_KEY", "offline")
+# Compile verification would download solc; it is left out unless asked for
+os.environ.setdefault("VERIFY_FIXES", "0")
+os.environ.setdefault("GOOGLE_GEMINI_API_KEY", "offline")
+
+REPORT_VERSION = 1
+
+# A contract with no clear-cut static finding, so every audit goes through the model
+AUDIT_CONTRACT = """// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.0;
+
+contract Vault{nonce} {{
+    mapping(address => uint) public balances;
+    uint public constant NONCE = {nonce};
+
+    event Deposit(address indexed from, uint amount);
+
+    function deposit() external payable {{
+        balances[msg.sender] += msg.value;
+        emit Deposit(msg.sender, msg.value);
+    }}
+
+    function balanceOf(address owner) public view returns (uint) {{
+        return balances[owner];
+    }}
+}}
+"""
+
+
+def percentiles(samples_ms):
+    ordered = sorted(samples_ms)
+    if not ordered:
+        return {}
+
+    def at(fraction):
+        return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))], 3)
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+        "p50_ms": at(0.50),
+        "p90_ms": at(0.90),
+        "p99_ms": at(0.99),
+        "max_ms": round(ordered[-1], 3)
+    }
+
+
+def bench_is_smart_contract(args):
+    import bench_is_smart_contract
+    return bench_is_smart_contract.run(junk_bytes=args.junk_bytes)
+
+
+def bench_audit(args):
+    """Throughput and latency percentiles of POST /audit per mode, against the fake model."""
+    from io import BytesIO
+    from fake_llm import FakeGemini, install
+    import app as app_module
+
+    llm = install(FakeGemini(latency=args.llm_latency, token_latency=args.token_latency))
+    client = app_module.app.test_client()
+    results = {}
+    for mode in args.audit_modes.split(","):
+        # Distinct contracts per request, so the audit cache never answers
+        app_module.audit_cache.clear()
+        calls_before = llm.calls
+
+        def post(nonce):
+            source = AUDIT_CONTRACT.format(nonce=nonce).encode("utf-8")
+            started = time.perf_counter()
+            response = client.post(
+                f"/audit?mode={mode}", data={"file": (BytesIO(source), "Vault.sol")},
+                content_type="multipart/form-data"
+            )
+            return (time.perf_counter() - started) * 1000, response.status_code
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.audit_concurrency) as pool:
+            outcomes = list(pool.map(post, range(args.audit_requests)))
+        elapsed = time.perf_counter() - started
+        latencies = [ms for ms, status in outcomes if status == 200]
+        results[mode] = {
+            "requests": args.audit_requests,
+            "concurrency": args.audit_concurrency,
+            "errors": sum(1 for _, status in outcomes if status != 200),
+            "throughput_rps": round(args.audit_requests / elapsed, 2),
+            "llm_calls": llm.calls - calls_before,
+            "latency": percentiles(latencies)
+        }
+    return results
+
+
+def bench_wallet(args):
+    """End-to-end wallet scoring at several history sizes against the fake Etherscan server."""
+    from fake_etherscan import FakeEtherscan, serve, synthetic_history
+    from etherscan import EtherscanClient
+    from reputation_engine import ReputationEngine
+
+    fake = FakeEtherscan()
+    server = serve(fake)
+    client = EtherscanClient(base_url=server.url, rate_limit=1000, max_retries=0)
+    engine = ReputationEngine(client=client)
+    results = {}
+    try:
+        for size in (int(size) for size in args.wallet_sizes.split(",")):
+            address = "0x%040x" % size
+            history = synthetic_history(address, size)
+            fake.add(address, history)
+            timings = []
+            for _ in range(args.wallet_repeats):
+                requests_before = fake.stats["requests"]
+                started = time.perf_counter()
+                result = asyncio.run(engine.score(address))
+                timings.append((time.perf_counter() - started) * 1000)
+                api_calls = fake.stats["requests"] - requests_before
+            records = sum(len(records) for records in history.values())
+            best = min(timings)
+            results[str(size)] = {
+                "records": records,
+                "api_calls": api_calls,
+                "reputation_score": result["reputation_score"],
+                "latency": percentiles(timings),
+                "records_per_second": round(records / (best / 1000))
+            }
+    finally:
+        server.shutdown()
+    return results
+
+
+SUITES = {
+    "is_smart_contract": bench_is_smart_contract,
+    "audit": bench_audit,
+    "wallet": bench_wallet
+}
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=APP_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the offline benchmark suite and write a JSON report.")
+    parser.add_argument("--suite", action="append", choices=sorted(SUITES), help="Suites to run (default: all)")
+    parser.add_argument("--output", help="Report path (default: bench/results/<commit>-<time>.json)")
+    parser.add_argument("--junk-bytes", type=int, default=4 * 1024 * 1024)
+    parser.add_argument("--audit-requests", type=int, default=200)
+    parser.add_argument("--audit-concurrency", type=int, default=8)
+    parser.add_argument("--audit-modes", default="separate,combined")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Fake model seconds to first token")
+    parser.add_argument("--token-latency", type=float, default=0.0005, help="Fake model seconds per token")
+    parser.add_argument("--wallet-sizes", default="1000,10000,100000")
+    parser.add_argument("--wallet-repeats", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    commit = git_commit()
+    report = {
+        "version": REPORT_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "commit": commit,
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count()
+        },
+        "parameters": {key: value for key, value in vars(args).items() if key not in ("suite", "output")},
+        "results": {}
+    }
+    for name in args.suite or list(SUITES):
+        print(f"Running {name}...", file=sys.stderr)
+        report["results"][name] = SUITES[name](args)
+
+    output = args.output
+    if output is None:
+        results_dir = os.path.join(BENCH_DIR, "results")
+        os.makedirs(results_dir, exist_ok=True)
+        output = os.path.join(results_dir, f"{commit or 'local'}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report["results"], indent=2))
+    print(f"Report written to {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+from static_analysis import tokenize, parse_contracts
+
+# Default chunk budget in characters, comfortably inside the model context
+DEFAULT_CHUNK_CHARS = 24 * 1024
+
+
+def split_source(code: str, max_chars: int = DEFAULT_CHUNK_CHARS) -> list:
+    """
+    Split Solidity source into analysable chunks at contract/library boundaries.
+    Units larger than max_chars are split further at function boundaries; every chunk keeps
+    the file-level code (pragma, imports, free functions, constants, structs, errors, `using`
+    directives) and its contract's header, state variables and modifiers so the model still
+    sees the context each function depends on.
+    Returns a list of {"name", "start_line", "end_line", "source"} dicts.
+    """
+    lines = code.splitlines(keepends=True)
+    contracts = parse_contracts(tokenize(code))
+    if not contracts:
+        return [{"name": "source", "start_line": 1, "end_line": len(lines), "source": code}]
+
+    # Everything outside the contract bodies, wherever it sits in the file
+    contract_lines = set()
+    for contract in contracts:
+        contract_lines.update(range(contract["line"], contract["end_line"] + 1))
+    preamble = "".join(line for number, line in enumerate(lines, 1) if number not in contract_lines)
+    chunks = []
+    for contract in contracts:
+        start, end = contract["line"], contract["end_line"]
+        unit = "".join(lines[start - 1:end])
+        if len(preamble) + len(unit) <= max_chars or not contract["functions"]:
+            chunks.append({"name": contract["name"], "start_line": start, "end_line": end, "source": preamble + unit})
+            continue
+        chunks.extend(_split_contract(contract, lines, preamble, max_chars))
+    return chunks
+
+
+def _split_contract(contract, lines, preamble, max_chars):
+    """Group a large contract's functions into chunks that share the contract's context lines."""
+    start, end = contract["line"], contract["end_line"]
+    function_lines = set()
+    for function in contract["functions"]:
+        function_lines.update(range(function["line"], function["end_line"] + 1))
+    # Contract header, state variables, events and modifiers: everything outside a function body
+    context = "".join(
+        lines[number - 1] for number in range(start, end)
+        if number not in function_lines and lines[number - 1].strip()
+    )
+    closing = lines[end - 1] if end not in function_lines else "}\n"
+
+    chunks = []
+    group = []
+    group_size = 0
+    budget = max(max_chars - len(preamble) - len(context) - len(closing), 1)
+    for function in contract["functions"]:
+        body = "".join(lines[function["line"] - 1:function["end_line"]])
+        if group and group_size + len(body) > budget:
+            chunks.append(_contract_chunk(contract, group, preamble, context, closing))
+            group, group_size = [], 0
+        group.append((function, body))
+        group_size += len(body)
+    if group:
+        chunks.append(_contract_chunk(contract, group, preamble, context, closing))
+    return chunks
+
+
+def _contract_chunk(contract, group, preamble, context, closing):
+    names = ", ".join(function["name"] for function, _ in group)
+    return {
+        "name": f"{contract['name']} ({names})",
+        "start_line": group[0][0]["line"],
+        "end_line": group[-1][0]["end_line"],
+        "source": preamble + context + "".join(body for _, body in group) + closing
+    }
@@ -0,0 +1,176 @@
+import numpy as np
+
+from metrics import span
+
+# Records are converted to columns in batches of this size, so a stream never sits in memory as dicts
+BATCH_SIZE = 10000
+GAS_THRESHOLD_ETH = 0.01
+SECONDS_PER_DAY = 86400
+# date(1970, 1, 1).toordinal(): converts epoch days to date ordinals
+EPOCH_ORDINAL = 719163
+
+# Columns built for each account action
+ACTION_COLUMNS = {
+    "txlist": ("timestamp", "block", "to_id", "is_error", "gas_fee", "deployment"),
+    "txlistinternal": ("timestamp", "block", "to_id", "is_error", "gas_fee", "deployment"),
+    "tokentx": ("timestamp", "block", "to_id", "amount", "symbol_id"),
+    "tokennfttx": ("timestamp", "block", "to_id", "symbol_id")
+}
+
+
+class Interner:
+    """
+    Maps strings (addresses, token symbols) to dense int32 IDs. Each history owns its
+    interners, so the tables only hold values that history actually uses.
+    """
+    def __init__(self):
+        self._ids = {}
+        self.values = []
+
+    def ids(self, values) -> np.ndarray:
+        out = np.empty(len(values), dtype=np.int32)
+        for i, value in enumerate(values):
+            value_id = self._ids.get(value)
+            if value_id is None:
+                value_id = self._ids[value] = len(self.values)
+                self.values.append(value)
+            out[i] = value_id
+        return out
+
+    def __len__(self):
+        return len(self.values)
+
+
+class ColumnarHistory:
+    """
+    Compact columnar form of a transaction history: one NumPy array per field, with
+    `to` addresses and token symbols interned to int32 IDs. Which columns exist depends
+    on the action the records came from.
+    """
+    def __init__(self, columns, addresses, symbols, length):
+        self.columns = columns
+        self.addresses = addresses
+        self.symbols = symbols
+        self.length = length
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __len__(self):
+        return self.length
+
+    @classmethod
+    def from_batch(cls, records, action="txlist", fields=None, addresses=None, symbols=None):
+        """
+        Convert one batch of Etherscan records (all from the same action) to columns.
+        `fields` limits the conversion to the named columns; by default all of the action's are built.
+        """
+        addresses = addresses if addresses is not None else Interner()
+        symbols = symbols if symbols is not None else Interner()
+        wanted = set(fields or ACTION_COLUMNS[action])
+        count = len(records)
+
+        def column(field, dtype, convert):
+            return np.fromiter((convert(record.get(field) or 0) for record in records), dtype, count=count)
+
+        columns = {}
+        if "timestamp" in wanted:
+            columns["timestamp"] = column("timeStamp", np.int64, int)
+        if "block" in wanted:
+            columns["block"] = column("blockNumber", np.int64, int)
+        if "to_id" in wanted:
+            columns["to_id"] = addresses.ids([(record.get("to") or "").lower() for record in records])
+        if "is_error" in wanted:
+            columns["is_error"] = np.fromiter((record.get("isError", "0") != "0" for record in records), bool, count=count)
+        if "gas_fee" in wanted:
+            # Internal transactions carry no gasPrice, so their fee is zero
+            columns["gas_fee"] = column("gasUsed", np.float64, float) * column("gasPrice", np.float64, float) / 1e18
+        if "deployment" in wanted:
+            columns["deployment"] = np.fromiter(
+                (record.get("to") == "" and bool(record.get("contractAddress")) for record in records), bool, count=count
+            )
+        if "amount" in wanted:
+            columns["amount"] = column("value", np.float64, float) / np.power(10.0, column("tokenDecimal", np.float64, float))
+        if "symbol_id" in wanted:
+            name_field = "tokenName" if action == "tokennfttx" else "tokenSymbol"
+            columns["symbol_id"] = symbols.ids([record[name_field] for record in records])
+        return cls(columns, addresses, symbols, count)
+
+    @classmethod
+    def from_records(cls, records, action="txlist", fields=None, batch_size=BATCH_SIZE):
+        """Build the full history from a record stream, converting it batch by batch."""
+        batches = list(iter_batches(records, action, fields, batch_size))
+        if not batches:
+            return cls.from_batch([], action, fields)
+        columns = {name: np.concatenate([batch[name] for batch in batches]) for name in batches[0].columns}
+        return cls(columns, batches[0].addresses, batches[0].symbols, sum(len(batch) for batch in batches))
+
+
+def iter_batches(records, action="txlist", fields=None, batch_size=BATCH_SIZE):
+    """Yield ColumnarHistory batches of a record stream; the batches share their interners."""
+    addresses, symbols = Interner(), Interner()
+
+    def convert(batch):
+        with span("columnar_batch", action=action, rows=len(batch)):
+            return ColumnarHistory.from_batch(batch, action, fields, addresses, symbols)
+
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield convert(batch)
+            batch = []
+    if batch:
+        yield convert(batch)
+
+
+def transaction_summary(history) -> dict:
+    """Success/failure and high-gas counts plus the first timestamp of a txlist history."""
+    failed = int(np.count_nonzero(history["is_error"]))
+    return {
+        "success_count": len(history) - failed,
+        "failed_count": failed,
+        "high_gas_txs": int(np.count_nonzero(history["gas_fee"] > GAS_THRESHOLD_ETH)),
+        "first_timestamp": int(history["timestamp"].min()) if len(history) else None
+    }
+
+
+def totals_by_symbol(history, weights=None) -> dict:
+    """Sum `weights` per token symbol (or collection name), or count rows when weights is None."""
+    if not len(history):
+        return {}
+    sums = np.bincount(history["symbol_id"], weights=weights, minlength=len(history.symbols))
+    convert = int if weights is None else float
+    return {
+        history.symbols.values[i]: convert(sums[i]) for i in np.unique(history["symbol_id"])
+    }
+
+
+def active_day_ordinals(timestamps) -> np.ndarray:
+    """Sorted unique active days (UTC) as date ordinals."""
+    return np.unique(np.asarray(timestamps, dtype=np.int64) // SECONDS_PER_DAY) + EPOCH_ORDINAL
+
+
+def monthly_counts(timestamps) -> dict:
+    """Records per calendar month (UTC), keyed "YYYY-MM"."""
+    months, counts = np.unique(
+        np.asarray(timestamps, dtype=np.int64).astype("datetime64[s]").astype("datetime64[M]"), return_counts=True
+    )
+    return {str(month): int(count) for month, count in zip(months, counts)}
+
+
+def hourly_counts(timestamps) -> np.ndarray:
+    """Records per hour of the day (UTC), as 24 counts."""
+    return np.bincount(np.asarray(timestamps, dtype=np.int64) // 3600 % 24, minlength=24)
+
+
+def streaks(days) -> tuple:
+    """
+    (current, longest) runs of consecutive days in a sorted array of unique day numbers;
+    current is the run ending on the last active day.
+    """
+    if len(days) == 0:
+        return 0, 0
+    breaks = np.flatnonzero(np.diff(days) != 1) + 1
+    runs = np.diff(np.concatenate(([0], breaks, [len(days)])))
+    return int(runs[-1]), int(runs.max())
@@ -0,0 +1,332 @@
+"""
+Compile verification for generated fixes: sources are compiled with solc (through py-solc-x) in
+a process pool, so compiler runs never hold a web worker's CPU or GIL.
+
+The compiler version is picked from each source's `pragma solidity`. Installed solc binaries are
+kept in SOLC_BINARY_PATH (py-solc-x's default folder otherwise) and compilation results are
+cached by compiler version and source hash, so a repeated source is never compiled twice.
+
+Compilers are not downloaded on demand unless SOLC_AUTO_INSTALL=1; preinstall them (e.g. at image
+build time) from the app directory:
+    python compiler.py install 0.8.26 0.7.6
+"""
+import os
+import re
+import sys
+import time
+import hashlib
+import logging
+import argparse
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+from cache import MISS, build_cache, make_key
+from static_analysis import pragma_min_version, tokenize
+
+SOLC_BINARY_PATH = os.getenv("SOLC_BINARY_PATH") or None
+SOLC_WORKERS = int(os.getenv("SOLC_WORKERS", "2"))
+SOLC_TIMEOUT = float(os.getenv("SOLC_TIMEOUT", "60"))
+# Download compilers the pragma asks for that are not installed yet. Off by default: a download
+# inside a request can take longer than the request itself; preinstall with `install` instead
+SOLC_AUTO_INSTALL = os.getenv("SOLC_AUTO_INSTALL", "0") == "1"
+# How long the list of downloadable compilers (or a failure to fetch it) is remembered
+INSTALLABLE_TTL = 3600
+INSTALLABLE_RETRY = 300
+# Errors handed back to the model on a retry; the rest only add noise
+MAX_REPORTED_ERRORS = 10
+
+_FULL_VERSION = re.compile(r"\d+\.\d+\.\d+")
+
+# Verification outcomes
+VERIFIED = "verified"
+FAILED = "failed"
+UNVERIFIABLE = "unverifiable"
+SKIPPED = "skipped"
+# Verification queued as a background job
+PENDING = "pending"
+
+# Compilation results per compiler version and source hash
+compile_cache = build_cache(
+    max_entries=int(os.getenv("SOLC_CACHE_SIZE", "512")),
+    ttl=int(os.getenv("SOLC_CACHE_TTL", str(7 * 86400))),
+    path=os.getenv("SOLC_CACHE_PATH") or None,
+    max_bytes=int(os.getenv("SOLC_CACHE_MAX_BYTES", str(128 * 1024 * 1024)))
+)
+
+_pool = None
+_pool_lock = threading.Lock()
+_inflight = {}
+_inflight_lock = threading.Lock()
+_installable = (0.0, [])
+_installable_lock = threading.Lock()
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """
+    Return the process-wide compiler pool, started on first use. Its processes come from a
+    fork server, so they are not forked from a multi-threaded web worker.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=SOLC_WORKERS,
+                mp_context=multiprocessing.get_context(os.getenv("SOLC_START_METHOD", "forkserver"))
+            )
+        return _pool
+
+
+def _discard_pool(pool):
+    """Forget a pool whose process died (e.g. killed for memory) so the next call starts a new one."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+
+
+def _reset_after_fork():
+    # A pool started before a fork (e.g. in a preloading server's master) belongs to the parent
+    global _pool, _pool_lock, _inflight_lock, _installable_lock
+    _pool = None
+    _pool_lock = threading.Lock()
+    _inflight.clear()
+    _inflight_lock = threading.Lock()
+    _installable_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def pragma_spec(code):
+    """The version constraint of the first `pragma solidity`, e.g. ">=0.6.0<0.9.0", or None."""
+    tokens = tokenize(code)
+    for i, token in enumerate(tokens):
+        if token.text == "pragma" and i + 1 < len(tokens) and tokens[i + 1].text == "solidity":
+            parts = []
+            for t in tokens[i + 2:]:
+                if t.text == ";":
+                    break
+                parts.append(t.text)
+            return "".join(parts) or None
+    return None
+
+
+def _select(spec, code, versions):
+    """Newest of `versions` the pragma allows; without a pragma, the newest of all."""
+    import solcx.install
+
+    if not versions:
+        return None
+    if spec is None:
+        return versions[0]
+    if not _FULL_VERSION.search(spec):
+        # Partial versions ("^0.8") are not understood by py-solc-x; use the lowest version
+        # the pragma allows as a caret range instead
+        minimum = pragma_min_version(tokenize(code))
+        if not minimum:
+            return None
+        spec = "^" + ".".join(str(part) for part in (tuple(minimum) + (0, 0, 0))[:3])
+    return solcx.install.select_pragma_version(spec, versions)
+
+
+def _installable_versions():
+    global _installable
+    import solcx
+
+    with _installable_lock:
+        fetched_at, versions = _installable
+        if time.time() - fetched_at < (INSTALLABLE_TTL if versions else INSTALLABLE_RETRY):
+            return versions
+        try:
+            versions = solcx.get_installable_solc_versions()
+        except Exception as e:
+            logging.warning(f"Could not list downloadable solc versions: {e}")
+            versions = []
+        _installable = (time.time(), versions)
+        return versions
+
+
+def select_version(code):
+    """
+    Compiler version for a source: the newest installed one its pragma allows, else (with
+    SOLC_AUTO_INSTALL) the newest downloadable one. None when there is no match.
+    """
+    import solcx
+
+    spec = pragma_spec(code)
+    installed = _select(spec, code, solcx.get_installed_solc_versions(SOLC_BINARY_PATH))
+    if installed is not None or not SOLC_AUTO_INSTALL:
+        return installed
+    return _select(spec, code, _installable_versions())
+
+
+def _compile_worker(source, version, binary_path):
+    """Runs in a pool process: install the compiler if needed and compile one source."""
+    import solcx
+    import solcx.install
+    from solcx.exceptions import SolcError
+
+    solcx.install_solc(version, solcx_binary_path=binary_path)
+    input_data = {
+        "language": "Solidity",
+        "sources": {"Contract.sol": {"content": source}},
+        "settings": {"outputSelection": {"*": {"*": ["abi", "evm.bytecode.object"]}}}
+    }
+    try:
+        output = solcx.compile_standard(
+            input_data, solc_binary=solcx.install.get_executable(version, binary_path), allow_empty=True
+        )
+    except SolcError as e:
+        diagnostics = e.error_dict or [{"severity": "error", "formattedMessage": e.message}]
+        return {
+            "ok": False,
+            "errors": [d.get("formattedMessage", d.get("message", "")) for d in diagnostics if d.get("severity") == "error"],
+            "warnings": sum(1 for d in diagnostics if d.get("severity") == "warning")
+        }
+    contracts = {
+        name: {"abi": contract.get("abi", []), "bytecode": contract.get("evm", {}).get("bytecode", {}).get("object", "")}
+        for name, contract in output.get("contracts", {}).get("Contract.sol", {}).items()
+    }
+    return {
+        "ok": True,
+        "errors": [],
+        "warnings": sum(1 for d in output.get("errors", []) if d.get("severity") == "warning"),
+        "contracts": contracts
+    }
+
+
+def _store(key, future, pool):
+    # Cached before it leaves the in-flight table, so no request can miss both
+    if not future.cancelled():
+        if future.exception() is None:
+            compile_cache.set(key, future.result())
+        elif isinstance(future.exception(), BrokenProcessPool):
+            _discard_pool(pool)
+    with _inflight_lock:
+        _inflight.pop(key, None)
+
+
+def _submit(code):
+    """Start compiling `code`: (version, result) when nothing needs to run, else (version, future)."""
+    try:
+        version = select_version(code)
+    except ImportError:
+        return None, {"ok": None, "reason": "py-solc-x is not installed"}
+    if version is None:
+        return None, {"ok": None, "reason": f"No solc version available for pragma {pragma_spec(code) or '(none)'}"}
+
+    key = make_key("solc", version, hashlib.sha256(code.encode("utf-8")).hexdigest())
+    cached = compile_cache.get(key)
+    if cached is not MISS:
+        return version, {**cached, "version": str(version), "cached": True}
+
+    with _inflight_lock:
+        future = _inflight.get(key)
+        started = future is None
+        if started:
+            pool = get_pool()
+            try:
+                future = pool.submit(_compile_worker, code, str(version), SOLC_BINARY_PATH)
+            except BrokenProcessPool:
+                _discard_pool(pool)
+                pool = get_pool()
+                future = pool.submit(_compile_worker, code, str(version), SOLC_BINARY_PATH)
+            _inflight[key] = future
+    if started:
+        # Outside the lock: the callback runs right away if the compilation already finished
+        future.add_done_callback(lambda done: _store(key, done, pool))
+    return version, future
+
+
+def compile_sources(codes, timeout=SOLC_TIMEOUT) -> list:
+    """
+    Compile sources in the pool, all at once. Each result is {"ok", "errors", "warnings",
+    "contracts", "version", "cached"}, or {"ok": None, "reason"} when the source could not be
+    compiled at all (no matching compiler, timeout). Results are cached, and concurrent
+    requests for the same source share one compilation.
+    """
+    submitted = [_submit(code) for code in codes]
+    deadline = time.monotonic() + timeout
+    results = []
+    for version, outcome in submitted:
+        if isinstance(outcome, dict):
+            results.append(outcome)
+            continue
+        try:
+            result = outcome.result(timeout=max(deadline - time.monotonic(), 0))
+        except FutureTimeout:
+            results.append({"ok": None, "reason": f"Compilation took longer than {timeout:g} s"})
+            continue
+        except BrokenProcessPool:
+            results.append({"ok": None, "reason": "The compiler process died"})
+            continue
+        except Exception as e:
+            logging.warning(f"solc {version} could not be run: {e}")
+            results.append({"ok": None, "reason": f"solc {version} is not available"})
+            continue
+        results.append({**result, "version": str(version), "cached": False})
+    return results
+
+
+def compile_source(code, timeout=SOLC_TIMEOUT) -> dict:
+    return compile_sources([code], timeout)[0]
+
+
+def _summary(result):
+    summary = {"version": result.get("version"), "errors": result.get("errors", [])[:MAX_REPORTED_ERRORS],
+               "warnings": result.get("warnings", 0)}
+    if result.get("ok"):
+        summary["contracts"] = {
+            name: {"bytecode_bytes": len(contract["bytecode"]) // 2} for name, contract in result["contracts"].items()
+        }
+    return summary
+
+
+def verify_fix(original, fixed) -> dict:
+    """
+    Compile the original and the fixed contract side by side. The status is "verified" when
+    the fix compiles, "failed" when only the original does (the fix broke it),
+    "unverifiable" when neither does (e.g. imports not in the upload) and "skipped" when
+    there is no compiler to run.
+    """
+    original_result, fixed_result = compile_sources([original, fixed])
+    if fixed_result["ok"] is None:
+        status = SKIPPED
+    elif fixed_result["ok"]:
+        status = VERIFIED
+    elif original_result["ok"]:
+        status = FAILED
+    else:
+        status = UNVERIFIABLE
+
+    verification = {"status": status}
+    if status == SKIPPED:
+        verification["reason"] = fixed_result["reason"]
+        return verification
+    verification["fixed"] = _summary(fixed_result)
+    verification["original"] = _summary(original_result) if original_result["ok"] is not None else None
+    return verification
+
+
+def main(argv=None):
+    import solcx
+
+    parser = argparse.ArgumentParser(description="Manage the solc compilers used to verify fixes.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    install_parser = commands.add_parser("install", help="Download solc versions into SOLC_BINARY_PATH")
+    install_parser.add_argument("versions", nargs="+")
+    commands.add_parser("list", help="List installed solc versions")
+    args = parser.parse_args(argv)
+
+    if args.command == "install":
+        for version in args.versions:
+            print(f"solc {solcx.install_solc(version, solcx_binary_path=SOLC_BINARY_PATH)} installed", file=sys.stderr)
+    for version in solcx.get_installed_solc_versions(SOLC_BINARY_PATH):
+        print(version)
+
+
+if __name__ == "__main__":
+    main()
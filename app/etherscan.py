@@ -0,0 +1,279 @@
+import os
+import time
+import random
+import asyncio
+import threading
+import contextvars
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import etherscan_bytes, span
+
+ETHERSCAN_API_URL = "https://api.etherscan.io/api"
+
+# The account actions that make up a wallet's history
+HISTORY_ACTIONS = ("txlist", "txlistinternal", "tokentx", "tokennfttx")
+
+# Etherscan returns at most 10,000 records per query (page * offset must stay within it)
+MAX_PAGE_SIZE = 10000
+
+# Etherscan answers status "0" both for empty results and for errors; these messages mean "no data"
+_NO_DATA_MESSAGES = ("no transactions found", "no records found", "no token transfers found")
+
+
+class EtherscanError(Exception):
+    """
+    Raised when Etherscan returns an error that is not a plain "no data" answer.
+    """
+
+
+class EtherscanRateLimited(EtherscanError):
+    """
+    Raised when requests are still throttled after all retries.
+    """
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: acquire() blocks until a call is allowed under `rate` calls
+    per second, with bursts of up to `capacity` calls.
+    """
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> float:
+        """Take a token if one is available; returns 0, or the seconds until one will be."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self):
+        while True:
+            wait = self.try_acquire()
+            if not wait:
+                return
+            time.sleep(wait)
+
+
+class EtherscanClient:
+    """
+    Shared Etherscan client: one pooled requests.Session and a thread pool so several
+    endpoints can be fetched concurrently from async code. Every request takes a token from
+    the rate limiter; throttled and 5xx responses are retried after the server's Retry-After,
+    or with jittered exponential backoff when it sends none.
+    """
+    def __init__(self, api_key=None, base_url=ETHERSCAN_API_URL, max_workers=8,
+                 rate_limit=5, max_retries=5, backoff=0.5, max_backoff=8.0):
+        self.api_key = api_key
+        self.base_url = base_url
+        # A share below one call per second still needs room for one call
+        self.rate_limiter = TokenBucket(rate_limit, capacity=max(rate_limit, 1))
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="etherscan")
+
+    def _retry_delay(self, attempt, retry_after=None):
+        if retry_after:
+            delay = _parse_retry_after(retry_after)
+            if delay is not None:
+                return delay
+        delay = min(self.max_backoff, self.backoff * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.5)
+
+    def call(self, params, api_key=None) -> dict:
+        """
+        Perform one API request under the rate limit and return the decoded JSON body.
+        Retries on HTTP 429/5xx and on Etherscan's rate-limit answers, honouring Retry-After
+        on 429 and 503.
+        """
+        api_key = api_key or self.api_key or os.getenv("ETHERSCAN_API_KEY")
+        if not api_key:
+            raise EtherscanError("Etherscan API key is missing. Set ETHERSCAN_API_KEY as an environment variable.")
+        params = {**params, "apikey": api_key}
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            with span("etherscan_request", action=params.get("action"), attempt=attempt) as request_span:
+                response = self.session.get(self.base_url, params=params, timeout=30)
+                request_span.attrs["bytes"] = len(response.content)
+            etherscan_bytes.inc(len(response.content), action=params.get("action"))
+            retry_after = None
+            if response.status_code == 429 or response.status_code >= 500:
+                if response.status_code in (429, 503):
+                    retry_after = response.headers.get("Retry-After")
+                throttled = response.status_code == 429
+            else:
+                response.raise_for_status()
+                data = response.json()
+                result = data.get("result")
+                throttled = data.get("status") == "0" and isinstance(result, str) and "rate limit" in result.lower()
+                if not throttled:
+                    return data
+            if attempt < self.max_retries:
+                time.sleep(self._retry_delay(attempt, retry_after))
+        if throttled:
+            raise EtherscanRateLimited(f"Etherscan rate limit persisted after {self.max_retries} retries")
+        raise EtherscanError(f"Etherscan request failed with HTTP {response.status_code}")
+
+    def query(self, params, api_key=None):
+        """
+        Return the `result` of an API call. An empty answer ("No transactions found") is an
+        empty list; any other error status raises EtherscanError.
+        """
+        data = self.call(params, api_key)
+        if data.get("status") == "1":
+            return data["result"]
+        message = str(data.get("message", ""))
+        result = data.get("result")
+        if result == [] or message.lower() in _NO_DATA_MESSAGES:
+            return []
+        raise EtherscanError(f"Etherscan error: {message} {result}".strip())
+
+    def account_action(self, action, address, api_key=None, **params) -> list:
+        """Fetch one account action (txlist, tokentx, ...) for an address, oldest first."""
+        return self.query({
+            "module": "account",
+            "action": action,
+            "address": address,
+            "startblock": params.pop("startblock", 0),
+            "endblock": params.pop("endblock", 99999999),
+            "sort": params.pop("sort", "asc"),
+            **params
+        }, api_key)
+
+    def iter_account_action(self, action, address, api_key=None, startblock=0, endblock=99999999,
+                            page_size=MAX_PAGE_SIZE):
+        """
+        Stream every record of an account action, oldest first, walking block ranges until the
+        history is exhausted instead of stopping at Etherscan's 10,000-record cap. Only one page
+        is held in memory at a time.
+        """
+        start = int(startblock)
+        # Records of the boundary block already yielded by the previous page
+        seen = set()
+        while True:
+            page = self.account_action(
+                action, address, api_key,
+                startblock=start, endblock=endblock, page=1, offset=page_size, sort="asc"
+            )
+            for record in page:
+                if record_key(record) not in seen:
+                    yield record
+            if len(page) < page_size:
+                return
+            last_block = int(page[-1]["blockNumber"])
+            if last_block == start:
+                # A single block holds a full page, so a block range cannot get past it; page
+                # through that block on its own instead
+                seen.update(record_key(record) for record in page)
+                yield from self._iter_block(action, address, api_key, start, page_size, seen)
+                start, seen = start + 1, set()
+                continue
+            seen = {record_key(record) for record in page if int(record["blockNumber"]) == last_block}
+            start = last_block
+
+    def _iter_block(self, action, address, api_key, block, page_size, seen):
+        """
+        The records of one block not in `seen`, for a block that fills more than one page.
+        Pages go as deep as Etherscan allows and the newest page closes the gap; a block with
+        more records than that reaches raises EtherscanError rather than silently losing some.
+        """
+        def unseen(page):
+            records = []
+            for record in page:
+                key = record_key(record)
+                if key not in seen:
+                    seen.add(key)
+                    records.append(record)
+            return records
+
+        params = {"startblock": block, "endblock": block, "offset": page_size}
+        for number in range(2, MAX_PAGE_SIZE // page_size + 1):
+            page = self.account_action(action, address, api_key, page=number, sort="asc", **params)
+            yield from unseen(page)
+            if len(page) < page_size:
+                return
+        newest = self.account_action(action, address, api_key, page=1, sort="desc", **params)
+        records = unseen(newest)
+        if len(newest) == page_size and len(records) == len(newest):
+            raise EtherscanError(
+                f"Block {block} has more {action} records for {address} than Etherscan can return"
+            )
+        yield from reversed(records)
+
+    async def run(self, fn, *args):
+        """Run a blocking function (typically one that consumes a stream) on the client's thread pool."""
+        loop = asyncio.get_running_loop()
+        # Executor threads do not inherit context variables; carry the request trace over
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self._executor, context.run, lambda: fn(*args))
+
+    async def consume(self, action, address, consumer, api_key=None, **params):
+        """Stream one action through consumer(records) on the thread pool and return its result."""
+        return await self.run(lambda: consumer(self.iter_account_action(action, address, api_key, **params)))
+
+    async def fetch(self, action, address, api_key=None, **params) -> list:
+        """Async wrapper around account_action, run on the client's thread pool."""
+        return await self.run(lambda: self.account_action(action, address, api_key, **params))
+
+    async def fetch_history(self, address, actions=HISTORY_ACTIONS, api_key=None) -> dict:
+        """Fetch each action once, concurrently; returns {action: transactions}."""
+        results = await asyncio.gather(*(self.fetch(action, address, api_key) for action in actions))
+        return dict(zip(actions, results))
+
+
+def _parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or an HTTP date), or None."""
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def record_key(record):
+    """Identity of a record across overlapping pages (token and internal rows share a tx hash)."""
+    return (
+        record.get("hash"), record.get("logIndex"), record.get("traceId"),
+        record.get("tokenID"), record.get("from"), record.get("to"), record.get("value")
+    )
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> EtherscanClient:
+    """
+    Return the process-wide Etherscan client, creating it on first use.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = EtherscanClient(
+                base_url=os.getenv("ETHERSCAN_API_URL") or ETHERSCAN_API_URL,
+                max_workers=int(os.getenv("ETHERSCAN_MAX_WORKERS", "8")),
+                # The limit is for the whole server, so each worker process takes its share
+                rate_limit=float(os.getenv("ETHERSCAN_RATE_LIMIT", "5")) / max(1, int(os.getenv("WEB_CONCURRENCY") or "1")),
+                max_retries=int(os.getenv("ETHERSCAN_MAX_RETRIES", "5"))
+            )
+        return _client
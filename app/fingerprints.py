@@ -0,0 +1,272 @@
+"""
+Fingerprint index of trusted library code (OpenZeppelin releases), so vendored copies of it can
+be left out of model prompts.
+
+Every contract/library body and every function in the indexed sources is hashed over its tokens,
+so comments and formatting do not matter. Uploaded code whose body matches is replaced in the
+prompt by a placeholder, `{ /* [[trusted:N]] ... */ }`, and the original text is put back
+verbatim wherever the placeholder appears in the model's output.
+
+Build the index from the app directory:
+    python fingerprints.py fetch                              # the DEFAULT_RELEASES from GitHub
+    python fingerprints.py build v4.9.6 path/to/contracts     # local sources or release tarballs
+"""
+import io
+import os
+import re
+import sys
+import json
+import logging
+import hashlib
+import tarfile
+import argparse
+import threading
+
+from static_analysis import tokenize, parse_contracts
+
+INDEX_VERSION = 1
+DEFAULT_INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "library_fingerprints.json")
+LIBRARY_NAME = "OpenZeppelin"
+# Releases indexed by `fetch`: the last patch of the lines still common in deployed code
+DEFAULT_RELEASES = ("v3.4.2", "v4.4.2", "v4.7.3", "v4.8.3", "v4.9.6", "v5.0.2", "v5.1.0")
+RELEASE_URL = "https://codeload.github.com/OpenZeppelin/openzeppelin-contracts/tar.gz/refs/tags/{release}"
+# Bodies shorter than this stay in the prompt; the placeholder would barely be shorter
+MIN_BODY_TOKENS = 24
+# Test helpers shipped in the release archives are not library code
+_EXCLUDED_DIRS = ("/mocks/", "/test/", "/tests/", "/certora/", "/scripts/")
+
+_PLACEHOLDER_PATTERN = re.compile(r"\{\s*/\*[^*]*?\[\[trusted:(\d+)\]\][^*]*?\*/\s*\}")
+# A buffered stream tail that may still grow into a placeholder
+_PARTIAL_PLACEHOLDER = re.compile(r"\{\s*(?:/(?:\*[^*]*(?:\*(?:/\s*)?)?)?)?\Z")
+
+
+def fingerprint(tokens) -> str:
+    """Hash of a token sequence; identical code hashes alike whatever its comments and layout."""
+    return hashlib.sha256(" ".join(token.text for token in tokens).encode("utf-8")).hexdigest()[:24]
+
+
+def iter_units(tokens):
+    """
+    Yield (kind, name, fingerprint, (open brace, close brace)) for every contract/library body
+    and function of a token stream, contracts before their functions. Interfaces and short
+    bodies are skipped.
+    """
+    for contract in parse_contracts(tokens):
+        if contract["kind"] == "interface":
+            continue
+        open_brace, close_brace = contract["braces"]
+        if close_brace - open_brace > MIN_BODY_TOKENS:
+            yield "contract", contract["name"], fingerprint(tokens[open_brace:close_brace + 1]), (open_brace, close_brace)
+        for function in contract["functions"]:
+            body_start, body_end = function["body"]
+            if body_end - body_start >= MIN_BODY_TOKENS:
+                # Signature and modifiers are part of a function's fingerprint
+                yield ("function", f"{contract['name']}.{function['name']}",
+                       fingerprint(tokens[function["start"]:body_end + 1]), (body_start - 1, body_end))
+
+
+class FingerprintIndex:
+    """
+    Maps fingerprints to the library code they came from:
+    {fingerprint: {"kind", "name", "path", "releases": [...]}}.
+    """
+    def __init__(self, entries=None):
+        self.entries = entries if entries is not None else {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, digest):
+        return self.entries.get(digest)
+
+    def add_source(self, code, release, path=""):
+        """Index every contract and function body of one source file. Returns the units added."""
+        added = 0
+        for kind, name, digest, _ in iter_units(tokenize(code)):
+            entry = self.entries.setdefault(digest, {"kind": kind, "name": name, "path": path, "releases": []})
+            if release not in entry["releases"]:
+                entry["releases"].append(release)
+                added += 1
+        return added
+
+    def add_archive(self, data, release):
+        """Index the library sources of a release tarball (as downloaded from GitHub)."""
+        added = 0
+        with tarfile.open(fileobj=io.BytesIO(data), mode="r:*") as archive:
+            for member in archive:
+                name = member.name.replace("\\", "/")
+                if not member.isfile() or not name.endswith(".sol") or "/contracts/" not in name:
+                    continue
+                if any(excluded in name for excluded in _EXCLUDED_DIRS):
+                    continue
+                path = name[name.index("/contracts/") + 1:]
+                code = archive.extractfile(member).read().decode("utf-8", errors="replace")
+                added += self.add_source(code, release, path)
+        return added
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            data = json.load(f)
+        if data.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported fingerprint index version: {data.get('version')}")
+        return cls(data["entries"])
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump({"version": INDEX_VERSION, "entries": self.entries}, f, separators=(",", ":"))
+
+
+def describe(entry) -> str:
+    releases = entry["releases"]
+    span = releases[0] if len(releases) == 1 else f"{releases[0]} to {releases[-1]}"
+    return f"{LIBRARY_NAME} {span} {entry['path']} {entry['kind']} {entry['name']}"
+
+
+class ElidedSource:
+    """
+    Source with trusted library bodies replaced by placeholders. `text` goes to the model;
+    restore() puts the original bodies back into its output.
+    """
+    def __init__(self, text, blocks=None, references=None):
+        self.text = text
+        self.blocks = blocks or {}
+        self.references = references or []
+
+    def __bool__(self):
+        return bool(self.blocks)
+
+    def restore(self, output) -> str:
+        return _PLACEHOLDER_PATTERN.sub(
+            lambda match: self.blocks.get(int(match.group(1)), match.group(0)), output
+        )
+
+    def restore_stream(self, chunks):
+        """
+        restore() for streamed output: text is passed through as it arrives, except a tail
+        that may be the start of a placeholder, which is held until it is complete.
+        """
+        if not self.blocks:
+            yield from chunks
+            return
+        pending = ""
+        for chunk in chunks:
+            pending += chunk
+            cut = pending.rfind("{")
+            if cut != -1 and _PARTIAL_PLACEHOLDER.match(pending, cut):
+                ready, pending = pending[:cut], pending[cut:]
+            else:
+                ready, pending = pending, ""
+            if ready:
+                yield self.restore(ready)
+        if pending:
+            yield self.restore(pending)
+
+    def missing(self, output) -> list:
+        """References whose placeholder the output dropped."""
+        kept = {int(number) for number in _PLACEHOLDER_PATTERN.findall(output)}
+        return [reference for reference in self.references if reference["id"] not in kept]
+
+
+def elide(code, index=None) -> ElidedSource:
+    """
+    Replace the bodies of known library contracts and functions in `code` by placeholders.
+    A matched contract is replaced whole; otherwise its matching functions are, one by one.
+    """
+    index = index if index is not None else get_index()
+    if not index:
+        return ElidedSource(code)
+    tokens = tokenize(code)
+    matches = []
+    covered = -1
+    for kind, name, digest, (open_brace, close_brace) in iter_units(tokens):
+        entry = index.get(digest)
+        if entry is None or open_brace <= covered:
+            continue
+        matches.append((tokens[open_brace].offset, tokens[close_brace].offset + 1, name, entry))
+        covered = close_brace
+
+    pieces, blocks, references = [], {}, []
+    position = 0
+    for number, (start, end, name, entry) in enumerate(matches, 1):
+        blocks[number] = code[start:end]
+        references.append({"id": number, "name": name, "library": describe(entry), "chars": end - start})
+        pieces.append(code[position:start])
+        pieces.append(f"{{ /* [[trusted:{number}]] {describe(entry)}: unmodified library code, omitted */ }}")
+        position = end
+    pieces.append(code[position:])
+    return ElidedSource("".join(pieces), blocks, references)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def index_path() -> str:
+    """Where the index is read from: LIBRARY_FINGERPRINTS_PATH, else next to this module."""
+    return os.getenv("LIBRARY_FINGERPRINTS_PATH") or DEFAULT_INDEX_PATH
+
+
+def get_index() -> FingerprintIndex:
+    """
+    Return the process-wide fingerprint index, loaded on first use from LIBRARY_FINGERPRINTS_PATH.
+    Without an index file nothing is elided.
+    """
+    global _index
+    with _index_lock:
+        if _index is None:
+            path = index_path()
+            if os.path.exists(path):
+                _index = FingerprintIndex.load(path)
+            else:
+                logging.info("No library fingerprint index at %s; library code is sent to the model as is", path)
+                _index = FingerprintIndex()
+        return _index
+
+
+def fetch_release(release, timeout=60) -> bytes:
+    import requests
+
+    response = requests.get(RELEASE_URL.format(release=release), timeout=timeout)
+    response.raise_for_status()
+    return response.content
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the library fingerprint index.")
+    parser.add_argument("--output", default=DEFAULT_INDEX_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+    fetch_parser = commands.add_parser("fetch", help="Download and index OpenZeppelin releases")
+    fetch_parser.add_argument("releases", nargs="*", default=list(DEFAULT_RELEASES))
+    build_parser = commands.add_parser("build", help="Index local .sol files, directories or tarballs")
+    build_parser.add_argument("release")
+    build_parser.add_argument("paths", nargs="+")
+    args = parser.parse_args(argv)
+
+    index = FingerprintIndex.load(args.output) if os.path.exists(args.output) else FingerprintIndex()
+    if args.command == "fetch":
+        for release in args.releases:
+            print(f"{release}: {index.add_archive(fetch_release(release), release)} units", file=sys.stderr)
+    else:
+        added = 0
+        for path in args.paths:
+            if os.path.isdir(path):
+                for root, _, files in os.walk(path):
+                    for name in sorted(files):
+                        if name.endswith(".sol"):
+                            file_path = os.path.join(root, name)
+                            with open(file_path, encoding="utf-8", errors="replace") as f:
+                                added += index.add_source(f.read(), args.release, os.path.relpath(file_path, path))
+            elif path.endswith(".sol"):
+                with open(path, encoding="utf-8", errors="replace") as f:
+                    added += index.add_source(f.read(), args.release, os.path.basename(path))
+            else:
+                with open(path, "rb") as f:
+                    added += index.add_archive(f.read(), args.release)
+        print(f"{args.release}: {added} units", file=sys.stderr)
+    index.save(args.output)
+    print(f"{len(index)} fingerprints in {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
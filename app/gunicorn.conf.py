@@ -0,0 +1,65 @@
+"""
+Production server settings. `python app.py` runs Flask's development server; containers run
+
+    gunicorn -c gunicorn.conf.py app:app
+
+The app itself imports lazily and is loaded once in the master (preload_app), so adding a
+worker costs a fork, not an import. WARMUP picks when the heavy modules (LangChain, the
+Gemini SDK, address labels) are loaded:
+    background  each worker serves immediately and loads them in a thread (default, fastest start)
+    preload     the master loads them before forking, so every worker, restarts included, starts hot
+    off         on first use
+"""
+import os
+import tempfile
+import threading
+import multiprocessing
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+# One process per core; threads overlap the I/O-bound model and Etherscan calls and keep
+# long-lived SSE streams from tying up a whole process
+workers = int(os.getenv("WEB_CONCURRENCY") or multiprocessing.cpu_count())
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+# Model calls on large contracts can run well past gunicorn's 30 second default
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+preload_app = True
+accesslog = "-"
+
+# In-memory async jobs are only visible to the worker that queued them
+os.environ.setdefault("AUDIT_JOB_STORE", "sqlite")
+# Per-process state made server-wide: each worker's Etherscan limiter gets its share of
+# ETHERSCAN_RATE_LIMIT (see etherscan.get_client), and /metrics adds up every worker's values
+os.environ["WEB_CONCURRENCY"] = str(workers)
+os.environ.setdefault(
+    "METRICS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), f"trustguard-metrics-{os.getenv('PORT', '5000')}")
+)
+
+
+WARMUP = os.getenv("WARMUP", "background")
+
+
+def on_starting(server):
+    # Runs in the master after the preloaded import and before any worker is forked
+    import metrics
+    metrics.clear_snapshots()
+    if WARMUP == "preload":
+        from app import warmup
+        warmup()
+
+
+def post_worker_init(worker):
+    import metrics
+    metrics.start_snapshot_writer()
+    # A request that needs a module still being loaded just waits on the import lock
+    if WARMUP == "background":
+        from app import warmup
+        threading.Thread(target=warmup, name="warmup", daemon=True).start()
+
+
+def worker_exit(server, worker):
+    # Counts since the last periodic snapshot would be lost otherwise
+    import metrics
+    metrics.write_snapshot()
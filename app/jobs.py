@@ -0,0 +1,193 @@
+import json
+import math
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from cache import reconnect_after_fork
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class QueueFull(Exception):
+    """
+    Raised when the job queue is at capacity; retry_after is a hint in seconds.
+    """
+    def __init__(self, retry_after):
+        super().__init__("Audit queue is full")
+        self.retry_after = retry_after
+
+
+class MemoryJobStore:
+    """
+    In-process job store. Finished jobs are dropped after ttl seconds.
+    """
+    def __init__(self, ttl=3600):
+        self.ttl = ttl
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def create(self, job_id):
+        now = time.time()
+        with self._lock:
+            self._prune(now)
+            self._jobs[job_id] = {
+                "id": job_id, "status": QUEUED, "result": None, "error": None,
+                "created_at": now, "updated_at": now
+            }
+
+    def update(self, job_id, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(fields, updated_at=time.time())
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def _prune(self, now):
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job["status"] in (DONE, FAILED) and job["updated_at"] + self.ttl < now
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+class SQLiteJobStore:
+    """
+    SQLite-backed job store, so job status survives restarts and is visible to every
+    worker process sharing the database file.
+    """
+    def __init__(self, path, ttl=3600):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        reconnect_after_fork(self)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY,"
+            " status TEXT NOT NULL,"
+            " result TEXT,"
+            " error TEXT,"
+            " created_at REAL NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def create(self, job_id):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+                (DONE, FAILED, now - self.ttl)
+            )
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, created_at, updated_at) VALUES (?, ?, ?, ?)",
+                (job_id, QUEUED, now, now)
+            )
+            self._conn.commit()
+
+    def update(self, job_id, **fields):
+        if "result" in fields:
+            fields["result"] = json.dumps(fields["result"])
+        fields["updated_at"] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+            self._conn.commit()
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, status, result, error, created_at, updated_at FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(("id", "status", "result", "error", "created_at", "updated_at"), row))
+        if job["result"] is not None:
+            job["result"] = json.loads(job["result"])
+        return job
+
+
+class JobQueue:
+    """
+    Bounded worker pool for audit jobs. At most `concurrency` jobs run at once and at
+    most `max_pending` wait behind them; beyond that submit() raises QueueFull.
+    """
+    def __init__(self, store, concurrency=4, max_pending=32):
+        self.store = store
+        self.concurrency = concurrency
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="audit-job")
+        self._slots = threading.BoundedSemaphore(concurrency + max_pending)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        # Moving average of job duration, used for the Retry-After hint
+        self._avg_duration = 10.0
+
+    def submit(self, fn, *args, **kwargs) -> str:
+        if not self._slots.acquire(blocking=False):
+            raise QueueFull(self.retry_after())
+        job_id = uuid.uuid4().hex
+        try:
+            self.store.create(job_id)
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._in_flight += 1
+        try:
+            self._executor.submit(self._run, job_id, fn, args, kwargs)
+        except Exception as e:
+            # _run never starts, so undo its share of the bookkeeping here
+            with self._lock:
+                self._in_flight -= 1
+            self._slots.release()
+            self.store.update(job_id, status=FAILED, error=str(e))
+            raise
+        return job_id
+
+    def get(self, job_id):
+        return self.store.get(job_id)
+
+    def retry_after(self) -> int:
+        with self._lock:
+            waves = self._in_flight / self.concurrency
+            return max(1, math.ceil(waves * self._avg_duration))
+
+    def _run(self, job_id, fn, args, kwargs):
+        start = time.perf_counter()
+        try:
+            self.store.update(job_id, status=RUNNING)
+            result = fn(*args, **kwargs)
+            self.store.update(job_id, status=DONE, result=result)
+        except Exception as e:
+            logging.exception("Audit job %s failed", job_id)
+            self.store.update(job_id, status=FAILED, error=str(e))
+        finally:
+            duration = time.perf_counter() - start
+            with self._lock:
+                self._in_flight -= 1
+                self._avg_duration = 0.8 * self._avg_duration + 0.2 * duration
+            self._slots.release()
+
+
+def build_job_store(kind="memory", path="audit_jobs.db", ttl=3600):
+    """
+    Build the configured job store: "memory" (default) or "sqlite".
+    """
+    if kind == "sqlite":
+        return SQLiteJobStore(path, ttl=ttl)
+    if kind == "memory":
+        return MemoryJobStore(ttl=ttl)
+    raise ValueError(f"Unknown job store: {kind}")
@@ -0,0 +1,53 @@
+import time
+import threading
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from metrics import current_trace, estimate_tokens, llm_bytes, llm_call_tokens, llm_errors, llm_seconds, llm_tokens
+
+
+class LLMUsageHandler(BaseCallbackHandler):
+    """LangChain callback recording model latency, token counts and bytes for every call."""
+    def __init__(self):
+        self._runs = {}
+        self._lock = threading.Lock()
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        model = ((serialized or {}).get("kwargs") or {}).get("model") or (serialized or {}).get("name") or "unknown"
+        with self._lock:
+            self._runs[run_id] = (time.perf_counter(), model, prompts, current_trace())
+
+    def _pop(self, run_id):
+        with self._lock:
+            return self._runs.pop(run_id, None)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        run = self._pop(run_id)
+        if run is None:
+            return
+        started, model, prompts, trace = run
+        llm_seconds.observe(time.perf_counter() - started, model=model)
+        completion = "".join(generation.text for generations in response.generations for generation in generations)
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        prompt_tokens = usage.get("prompt_tokens") or sum(estimate_tokens(prompt) for prompt in prompts)
+        completion_tokens = usage.get("completion_tokens") or estimate_tokens(completion)
+        bytes_in = sum(len(prompt.encode("utf-8")) for prompt in prompts)
+        bytes_out = len(completion.encode("utf-8"))
+        llm_tokens.inc(prompt_tokens, model=model, kind="prompt")
+        llm_tokens.inc(completion_tokens, model=model, kind="completion")
+        llm_call_tokens.observe(prompt_tokens, model=model, kind="prompt")
+        llm_call_tokens.observe(completion_tokens, model=model, kind="completion")
+        llm_bytes.inc(bytes_in, model=model, direction="in")
+        llm_bytes.inc(bytes_out, model=model, direction="out")
+        if trace is not None:
+            trace.add_llm(prompt_tokens, completion_tokens, bytes_in, bytes_out)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        run = self._pop(run_id)
+        if run is not None:
+            llm_seconds.observe(time.perf_counter() - run[0], model=run[1])
+            llm_errors.inc(model=run[1])
+
+
+# Attached to every model client so all chains report usage
+llm_callbacks = [LLMUsageHandler()]
@@ -0,0 +1,341 @@
+import os
+import glob
+import json
+import math
+import time
+import uuid
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# Latency buckets in seconds, from cheap local stages up to slow model calls
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+TOKEN_BUCKETS = (16, 64, 256, 1024, 4096, 16384, 65536, 262144)
+# Gemini does not report usage through the LangChain client; ~4 characters per token
+CHARS_PER_TOKEN = 4
+# Directory shared by the server's worker processes. Each writes its metric values there (every
+# METRICS_SNAPSHOT_INTERVAL seconds and on each scrape) and /metrics adds up all the files, so
+# whichever worker answers a scrape reports the whole server. Unset: this process only.
+MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR") or None
+SNAPSHOT_INTERVAL = float(os.getenv("METRICS_SNAPSHOT_INTERVAL", "5"))
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    def merge(self, values, snapshot):
+        """Add a snapshot (of another process) into values, {labels: value}."""
+        for key, value in snapshot:
+            key = tuple(key)
+            values[key] = values.get(key, 0) + value
+
+    def reset(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def samples(self, values=None):
+        if values is None:
+            with self._lock:
+                values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield f"{self.name}_total{_format_labels(self.labelnames, key)} {value}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels."""
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0, 0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += 1
+            series[2] += value
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(key), list(counts), count, total] for key, (counts, count, total) in self._series.items()]
+
+    def merge(self, series, snapshot):
+        """Add a snapshot (of another process) into series, {labels: (counts, count, sum)}."""
+        for key, counts, count, total in snapshot:
+            key = tuple(key)
+            merged_counts, merged_count, merged_total = series.get(key, ([0] * len(self.buckets), 0, 0.0))
+            series[key] = ([a + b for a, b in zip(merged_counts, counts)], merged_count + count, merged_total + total)
+
+    def reset(self):
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def samples(self, series=None):
+        if series is None:
+            with self._lock:
+                series = {key: (list(counts), count, total) for key, (counts, count, total) in self._series.items()}
+        for key, (counts, count, total) in sorted(series.items()):
+            for bound, bucket_count in zip(self.buckets, counts):
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', bound)])} {bucket_count}"
+            yield f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', '+Inf')])} {count}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {count}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}"
+
+
+_registry = []
+
+
+def _register(metric):
+    _registry.append(metric)
+    return metric
+
+
+stage_seconds = _register(Histogram(
+    "trustguard_stage_duration_seconds", "Duration of instrumented processing stages.", ("stage",)
+))
+http_seconds = _register(Histogram(
+    "trustguard_http_request_duration_seconds", "HTTP request duration until the response is returned.",
+    ("endpoint", "method", "status")
+))
+http_bytes = _register(Counter(
+    "trustguard_http_bytes", "HTTP payload bytes received (in) and sent (out).", ("endpoint", "direction")
+))
+http_request_bytes = _register(Histogram(
+    "trustguard_http_request_size_bytes", "HTTP request body sizes.", ("endpoint",), SIZE_BUCKETS
+))
+llm_seconds = _register(Histogram(
+    "trustguard_llm_call_duration_seconds", "Model call duration, including streamed output.", ("model",)
+))
+llm_tokens = _register(Counter(
+    "trustguard_llm_tokens", "Model tokens (reported by the model, or estimated from characters).",
+    ("model", "kind")
+))
+llm_call_tokens = _register(Histogram(
+    "trustguard_llm_call_tokens", "Tokens per model call.", ("model", "kind"), TOKEN_BUCKETS
+))
+llm_bytes = _register(Counter(
+    "trustguard_llm_bytes", "Bytes sent to (in) and received from (out) the model.", ("model", "direction")
+))
+llm_errors = _register(Counter("trustguard_llm_errors", "Model calls that raised.", ("model",)))
+etherscan_bytes = _register(Counter(
+    "trustguard_etherscan_response_bytes", "Bytes received from the Etherscan API.", ("action",)
+))
+
+
+def estimate_tokens(text) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    snapshots = _read_snapshots() if MULTIPROC_DIR else None
+    lines = []
+    for metric in _registry:
+        name = metric.name + "_total" if metric.kind == "counter" else metric.name
+        lines.append(f"# HELP {name} {metric.documentation}")
+        lines.append(f"# TYPE {name} {metric.kind}")
+        if snapshots is None:
+            lines.extend(metric.samples())
+            continue
+        merged = {}
+        for snapshot in snapshots:
+            metric.merge(merged, snapshot.get(metric.name, []))
+        lines.extend(metric.samples(merged))
+    return "\n".join(lines) + "\n"
+
+
+_snapshot_path = None
+
+
+def write_snapshot():
+    """Write this process's metric values to MULTIPROC_DIR (atomically, so readers never see half a file)."""
+    global _snapshot_path
+    if not MULTIPROC_DIR:
+        return
+    if _snapshot_path is None:
+        os.makedirs(MULTIPROC_DIR, exist_ok=True)
+        # pid plus a random suffix: a reused pid must not overwrite a finished worker's counts
+        _snapshot_path = os.path.join(MULTIPROC_DIR, f"{os.getpid()}-{uuid.uuid4().hex[:8]}.json")
+    data = json.dumps({metric.name: metric.snapshot() for metric in _registry})
+    temporary = _snapshot_path + ".tmp"
+    with open(temporary, "w") as f:
+        f.write(data)
+    os.replace(temporary, _snapshot_path)
+
+
+def _read_snapshots():
+    write_snapshot()
+    snapshots = []
+    for path in glob.glob(os.path.join(MULTIPROC_DIR, "*.json")):
+        try:
+            with open(path) as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return snapshots
+
+
+def start_snapshot_writer():
+    """Write snapshots every SNAPSHOT_INTERVAL seconds from a daemon thread (once per process)."""
+    if not MULTIPROC_DIR:
+        return
+
+    def loop():
+        while True:
+            time.sleep(SNAPSHOT_INTERVAL)
+            write_snapshot()
+
+    threading.Thread(target=loop, name="metrics-snapshot", daemon=True).start()
+
+
+def clear_snapshots():
+    """Remove the snapshots of a previous server run; call before any worker starts."""
+    if MULTIPROC_DIR:
+        for path in glob.glob(os.path.join(MULTIPROC_DIR, "*.json")):
+            os.remove(path)
+
+
+def _reset_after_fork():
+    # A forked worker starts from zero; the parent's values are its own
+    global _snapshot_path
+    _snapshot_path = None
+    for metric in _registry:
+        metric.reset()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class Trace:
+    """Per-request record of spans and model usage, written as one JSON line when finished."""
+    def __init__(self, **fields):
+        self.id = uuid.uuid4().hex
+        self.started = time.perf_counter()
+        self.fields = fields
+        self.spans = []
+        self.llm = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "bytes_in": 0, "bytes_out": 0}
+        self._lock = threading.Lock()
+
+    def add_span(self, stage, seconds, attrs):
+        with self._lock:
+            self.spans.append({"stage": stage, "ms": round(seconds * 1000, 3), **attrs})
+
+    def add_llm(self, prompt_tokens, completion_tokens, bytes_in, bytes_out):
+        with self._lock:
+            self.llm["calls"] += 1
+            self.llm["prompt_tokens"] += prompt_tokens
+            self.llm["completion_tokens"] += completion_tokens
+            self.llm["bytes_in"] += bytes_in
+            self.llm["bytes_out"] += bytes_out
+
+    def record(self, **fields):
+        return {
+            "trace_id": self.id,
+            "duration_ms": round((time.perf_counter() - self.started) * 1000, 3),
+            **self.fields,
+            **fields,
+            "spans": self.spans,
+            "llm": self.llm
+        }
+
+
+_current_trace = contextvars.ContextVar("trace", default=None)
+_trace_log_lock = threading.Lock()
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+def start_trace(**fields) -> Trace:
+    trace = Trace(**fields)
+    _current_trace.set(trace)
+    return trace
+
+
+@contextmanager
+def use_trace(trace):
+    """Make `trace` current inside the block (e.g. in a streamed response generator)."""
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+def finish_trace(trace, **fields):
+    """Append the trace to TRACE_LOG_PATH as JSON, when a trace log is configured."""
+    path = os.getenv("TRACE_LOG_PATH")
+    if not path or trace is None:
+        return
+    line = json.dumps(trace.record(**fields), default=str)
+    with _trace_log_lock:
+        with open(path, "a") as f:
+            f.write(line + "\n")
+
+
+class Span:
+    def __init__(self, stage, attrs):
+        self.stage = stage
+        self.attrs = attrs
+        self.seconds = 0.0
+
+    @property
+    def ms(self):
+        return self.seconds * 1000
+
+
+@contextmanager
+def span(stage, **attrs):
+    """
+    Time a stage: observed in the stage histogram and added to the current request trace.
+    Attributes only go to the trace, so they may be high-cardinality. Yields the Span, whose
+    .ms is set once the block exits.
+    """
+    current = Span(stage, attrs)
+    start = time.perf_counter()
+    try:
+        yield current
+    finally:
+        current.seconds = time.perf_counter() - start
+        stage_seconds.observe(current.seconds, stage=stage)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add_span(stage, current.seconds, current.attrs)
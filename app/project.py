@@ -0,0 +1,340 @@
+"""
+Multi-file project audits: contracts uploaded as a zip/tar archive or as several files are
+unpacked in memory, linked through their imports and audited concurrently, one task per
+distinct file, into a single report.
+"""
+import io
+import time
+import logging
+import hashlib
+import tarfile
+import zipfile
+import posixpath
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import span
+from analyze import CATEGORY_PRIORITY, is_smart_contract
+from static_analysis import SEVERITY_RANK, tokenize
+from uploads import UploadRejected, read_text_upload
+
+ARCHIVE_EXTENSIONS = (".zip", ".tar", ".tar.gz", ".tgz")
+SOURCE_EXTENSIONS = (".sol",)
+# Top-level directories of third-party packages: read to resolve imports, not audited
+DEPENDENCY_DIRS = ("node_modules", "lib")
+# Archive entries looked at, of any type; bounds the work on archives of many tiny entries
+MAX_ARCHIVE_ENTRIES = 10000
+# Skipping a tar entry still decompresses it, so all entries count against this many times
+# the source budget
+TAR_EXPANSION_FACTOR = 8
+DEFAULT_WORKERS = 4
+
+
+def is_archive(filename) -> bool:
+    return filename.lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+def _clean_path(name):
+    """Archive member name as a relative POSIX path, or None for names escaping the root."""
+    path = posixpath.normpath(name.replace("\\", "/")).lstrip("/")
+    if path in ("", ".") or path == ".." or path.startswith("../") or path.startswith("__MACOSX/"):
+        return None
+    return path
+
+
+class _Budget:
+    """Counts the files and bytes read from one upload against the project limits."""
+    def __init__(self, max_files, max_bytes):
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.files = 0
+        self.bytes = 0
+
+    def add(self, data):
+        self.files += 1
+        self.bytes += len(data)
+        if self.files > self.max_files:
+            raise UploadRejected(f"Too many contracts. Projects are limited to {self.max_files} files.", 413)
+        if self.bytes > self.max_bytes:
+            raise UploadRejected(
+                f"Project is too large. Projects are limited to {-(-self.max_bytes // (1024 * 1024))} MB of source.", 413
+            )
+
+
+def _read_member(stream, max_file_bytes):
+    # One byte over the per-file limit is enough for read_text_upload to reject the file
+    return stream.read(max_file_bytes + 1)
+
+
+def unpack_archive(data, filename, max_files, max_bytes, max_file_bytes) -> dict:
+    """
+    Read the Solidity sources of a zip or tar archive into memory as {path: bytes}. Members are
+    read incrementally and only up to the limits, so compressed sizes cannot be used to smuggle
+    in more data; files over max_file_bytes are kept truncated and rejected when decoded.
+    """
+    budget = _Budget(max_files, max_bytes)
+    files = {}
+    try:
+        if filename.lower().endswith(".zip"):
+            with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                for count, info in enumerate(archive.infolist()):
+                    if count >= MAX_ARCHIVE_ENTRIES:
+                        raise UploadRejected(f"Archive has more than {MAX_ARCHIVE_ENTRIES} entries.", 413)
+                    path = _clean_path(info.filename)
+                    if info.is_dir() or path is None or not path.lower().endswith(SOURCE_EXTENSIONS):
+                        continue
+                    with archive.open(info) as member:
+                        files[path] = _read_member(member, max_file_bytes)
+                    budget.add(files[path])
+        else:
+            expanded = 0
+            with tarfile.open(fileobj=io.BytesIO(data), mode="r:*") as archive:
+                for count, member in enumerate(archive):
+                    if count >= MAX_ARCHIVE_ENTRIES:
+                        raise UploadRejected(f"Archive has more than {MAX_ARCHIVE_ENTRIES} entries.", 413)
+                    expanded += member.size
+                    if expanded > max_bytes * TAR_EXPANSION_FACTOR:
+                        raise UploadRejected("Archive expands to too much data.", 413)
+                    path = _clean_path(member.name)
+                    if not member.isfile() or path is None or not path.lower().endswith(SOURCE_EXTENSIONS):
+                        continue
+                    files[path] = _read_member(archive.extractfile(member), max_file_bytes)
+                    budget.add(files[path])
+    except (zipfile.BadZipFile, tarfile.TarError, EOFError, OSError):
+        raise UploadRejected("The uploaded archive is corrupt or not a zip/tar file.")
+    if not files:
+        raise UploadRejected("The archive contains no Solidity (.sol) files.")
+    return _strip_common_root(files)
+
+
+def read_uploaded_files(uploads, max_files, max_bytes, max_file_bytes) -> dict:
+    """Read several uploaded files ((name, stream) pairs) into {path: bytes} under the project limits."""
+    budget = _Budget(max_files, max_bytes)
+    files = {}
+    for name, stream in uploads:
+        path = _clean_path(name)
+        if path is None:
+            raise UploadRejected(f"Invalid file name: {name}")
+        files[path] = _read_member(stream, max_file_bytes)
+        budget.add(files[path])
+    return files
+
+
+def _strip_common_root(files):
+    # Repository archives (e.g. GitHub's) wrap everything in a single top-level directory
+    roots = {path.split("/", 1)[0] for path in files}
+    if len(roots) == 1 and all("/" in path for path in files):
+        return {path.split("/", 1)[1]: data for path, data in files.items()}
+    return files
+
+
+def is_dependency(path) -> bool:
+    return path.split("/", 1)[0] in DEPENDENCY_DIRS
+
+
+def import_specs(code) -> list:
+    """Paths named by the import directives of a source file, in order."""
+    tokens = tokenize(code)
+    specs = []
+    for i, token in enumerate(tokens):
+        if token.kind != "ident" or token.text != "import" or (i and tokens[i - 1].text == "."):
+            continue
+        for following in tokens[i + 1:i + 64]:
+            if following.text == ";":
+                break
+            if following.kind == "string":
+                specs.append(following.text[1:-1])
+                break
+    return specs
+
+
+def resolve_import(spec, importer, paths):
+    """
+    Map an import path to a project file: relative paths against the importing file, others
+    against the project root and the dependency directories, then by unique path suffix
+    (which covers remapped package names like @openzeppelin/contracts/...).
+    """
+    if spec.startswith(("./", "../")):
+        path = posixpath.normpath(posixpath.join(posixpath.dirname(importer), spec))
+        return path if path in paths else None
+    for prefix in ("",) + tuple(directory + "/" for directory in DEPENDENCY_DIRS):
+        if prefix + spec in paths:
+            return prefix + spec
+    parts = spec.split("/")
+    while len(parts) >= 2:
+        suffix = "/" + "/".join(parts)
+        matches = [path for path in paths if path.endswith(suffix)]
+        if len(matches) == 1:
+            return matches[0]
+        if matches:
+            return None
+        parts = parts[1:]
+    return None
+
+
+def import_graph(sources) -> tuple:
+    """({path: [imported paths]}, {path: [unresolved import paths]}) for decoded sources."""
+    paths = set(sources)
+    graph, unresolved = {}, {}
+    for path, code in sources.items():
+        graph[path] = []
+        for spec in import_specs(code):
+            target = resolve_import(spec, path, paths)
+            if target is None:
+                unresolved.setdefault(path, []).append(spec)
+            elif target not in graph[path]:
+                graph[path].append(target)
+    return graph, unresolved
+
+
+def dependency_order(graph) -> list:
+    """Paths with their imports first; import cycles (legal in Solidity) are broken arbitrarily."""
+    order, visited = [], set()
+    for root in sorted(graph):
+        if root in visited:
+            continue
+        visited.add(root)
+        stack = [(root, iter(graph[root]))]
+        while stack:
+            path, imports = stack[-1]
+            target = next(imports, None)
+            if target is None:
+                stack.pop()
+                order.append(path)
+            elif target not in visited:
+                visited.add(target)
+                stack.append((target, iter(graph.get(target, ()))))
+    return order
+
+
+def _decode(path, data, max_file_bytes):
+    def looks_valid(text):
+        with span("is_smart_contract", path=path):
+            return is_smart_contract(text)
+
+    return read_text_upload(io.BytesIO(data), max_file_bytes, looks_valid=looks_valid)
+
+
+def _audit_file(path, data, audit, max_file_bytes):
+    """Decode, validate and audit one file; failures are returned as {"error", "status"}."""
+    started = time.perf_counter()
+    try:
+        code = _decode(path, data, max_file_bytes)
+    except UploadRejected as e:
+        return None, {"error": str(e), "status": e.status}
+    try:
+        with span("project_file", path=path, chars=len(code)):
+            result = audit(code)
+    except Exception:
+        logging.exception("Audit of %s failed", path)
+        return code, {"error": "An unexpected error occurred. Please try again.", "status": 500}
+    result["timings"]["wall"] = round((time.perf_counter() - started) * 1000, 3)
+    return code, result
+
+
+def audit_project(files, audit, max_file_bytes, workers=DEFAULT_WORKERS) -> dict:
+    """
+    Audit every file of a project with `audit(code) -> result` (the single-contract audit).
+    Identical files are audited once; dependency packages only serve import resolution.
+    Files run concurrently on up to `workers` threads, so the audit takes about as long as
+    its slowest file.
+    """
+    audit_start = time.perf_counter()
+    digests = {path: hashlib.sha256(data).hexdigest() for path, data in files.items()}
+    # The first copy in upload order is audited; later identical files point to it
+    first_path = {}
+    for path in files:
+        if not is_dependency(path):
+            first_path.setdefault(digests[path], path)
+
+    with span("project_audit", files=len(files), unique=len(first_path)) as stage:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(first_path)))) as executor:
+            # Each task runs in a copy of the caller's context so its spans join the request trace
+            futures = {
+                digest: executor.submit(
+                    contextvars.copy_context().run, _audit_file, path, files[path], audit, max_file_bytes
+                )
+                for digest, path in first_path.items()
+            }
+            outcomes = {digest: future.result() for digest, future in futures.items()}
+
+    sources = {}
+    for path, data in files.items():
+        outcome = outcomes.get(digests[path])
+        if outcome is not None and outcome[0] is not None:
+            sources[path] = outcome[0]
+        elif is_dependency(path):
+            try:
+                sources[path] = _decode(path, data, max_file_bytes)
+            except UploadRejected:
+                pass
+    graph, unresolved = import_graph(sources)
+    order = dependency_order(graph)
+    ordered = order + sorted(path for path in files if path not in graph)
+
+    report_files = []
+    for path in ordered:
+        entry = {
+            "path": path,
+            "sha256": digests[path],
+            "imports": graph.get(path, []),
+            "unresolved_imports": unresolved.get(path, [])
+        }
+        if is_dependency(path):
+            entry["role"] = "dependency"
+        elif first_path[digests[path]] != path:
+            entry["role"] = "duplicate"
+            entry["duplicate_of"] = first_path[digests[path]]
+        else:
+            entry["role"] = "source"
+            entry["result"] = outcomes[digests[path]][1]
+        report_files.append(entry)
+
+    wall_times = [
+        result["timings"]["wall"] for _, result in outcomes.values() if "timings" in result
+    ]
+    return {
+        "files": report_files,
+        "summary": summarize(report_files),
+        "timings": {
+            "audit": round(stage.ms, 3),
+            "slowest_file": max(wall_times, default=0.0),
+            "sum_of_files": round(sum(wall_times), 3),
+            "total": round((time.perf_counter() - audit_start) * 1000, 3)
+        }
+    }
+
+
+def summarize(report_files) -> dict:
+    """Project-wide counts: files by role, categories and static findings by severity."""
+    summary = {"files": len(report_files), "audited": 0, "failed": 0, "duplicates": 0, "dependencies": 0}
+    categories = {}
+    severities = {severity: 0 for severity in sorted(SEVERITY_RANK, key=SEVERITY_RANK.get, reverse=True)}
+    for entry in report_files:
+        if entry["role"] == "duplicate":
+            summary["duplicates"] += 1
+            continue
+        if entry["role"] == "dependency":
+            summary["dependencies"] += 1
+            continue
+        result = entry["result"]
+        if "error" in result:
+            summary["failed"] += 1
+            continue
+        summary["audited"] += 1
+        category = result.get("category", "General")
+        categories.setdefault(category, []).append(entry["path"])
+        for finding in result.get("findings", []):
+            severities[finding["severity"]] = severities.get(finding["severity"], 0) + 1
+
+    def rank(item):
+        # The more severe category first; the number of files only breaks ties
+        category, paths = item
+        priority = CATEGORY_PRIORITY.index(category) if category in CATEGORY_PRIORITY else len(CATEGORY_PRIORITY)
+        return (priority, -len(paths))
+
+    summary["categories"] = [
+        {"category": category, "files": paths} for category, paths in sorted(categories.items(), key=rank)
+    ]
+    summary["findings_by_severity"] = severities
+    return summary
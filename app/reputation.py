@@ -1,15 +1,16 @@
-import requests
 import os
-import re
 import json
 import asyncio
 import logging
+import threading
 from datetime import datetime
 from dotenv import load_dotenv
-from langchain.prompts import PromptTemplate
-from langchain_google_genai import GoogleGenerativeAI
-from langchain.schema.runnable import RunnablePassthrough
-from web3 import Web3
+from eth_utils import is_address
+import columns
+from etherscan import get_client
+from cache import MISS, make_key
+from reputation_engine import get_engine
+from wallet_digest import digest_cache, digest_key, render_digest, wallet_digest
 
 load_dotenv()
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -19,55 +20,25 @@ WALLET_ADDRESS = os.getenv("WALLET_ADDRESS")
 # DUNE_API_KEY = os.getenv("DUNE_API_KEY")
 
 GOOGLE_GEMINI_API_KEY = os.getenv("GOOGLE_GEMINI_API_KEY")
-if not GOOGLE_GEMINI_API_KEY:
-    raise ValueError("Google Gemini API key is missing. Set GOOGLE_GEMINI_API_KEY as an environment variable.")
-if not ETHERSCAN_API_KEY:
-    raise ValueError("Etherscan API key is missing. Set ETHERSCAN_API_KEY as an environment variable.")
-
-gemini_llm = GoogleGenerativeAI(api_key=GOOGLE_GEMINI_API_KEY, model="gemini-1.5-flash")
 
 def getETherBalance(WALLET_ADDRESS, ETHERSCAN_API_KEY):
-    url = f"https://api.etherscan.io/api?module=account&action=balance&address={WALLET_ADDRESS}&tag=latest&apikey={ETHERSCAN_API_KEY}"
-    response = requests.get(url)
-    data = response.json()
-    balance = int(data['result']) / 1e18
+    result = get_client().query({
+        "module": "account", "action": "balance", "address": WALLET_ADDRESS, "tag": "latest"
+    }, ETHERSCAN_API_KEY)
+    balance = int(result) / 1e18
     return balance
 
 def fetchTx(WALLET_ADDRESS, ETHERSCAN_API_KEY):
-    url = f"https://api.etherscan.io/api?module=account&action=txlist&address={WALLET_ADDRESS}&startblock=0&endblock=99999999&sort=asc&apikey={ETHERSCAN_API_KEY}"
-    response = requests.get(url)
-    data = response.json()
-    transactions = []
-    if data["status"] == "1":
-        transactions = data["result"]
-    return transactions
+    return list(get_client().iter_account_action("txlist", WALLET_ADDRESS, ETHERSCAN_API_KEY))
 
 def contractTx(WALLET_ADDRESS, ETHERSCAN_API_KEY):
-    url_internal = f"https://api.etherscan.io/api?module=account&action=txlistinternal&address={WALLET_ADDRESS}&startblock=0&endblock=99999999&sort=asc&apikey={ETHERSCAN_API_KEY}"
-    response_internal = requests.get(url_internal)
-    data_internal = response_internal.json()
-    internal_txs = []
-    if data_internal["status"] == "1":
-        internal_txs = data_internal["result"]
-    return internal_txs
+    return list(get_client().iter_account_action("txlistinternal", WALLET_ADDRESS, ETHERSCAN_API_KEY))
 
 def tokenTx(WALLET_ADDRESS, ETHERSCAN_API_KEY):
-    url_token = f"https://api.etherscan.io/api?module=account&action=tokentx&address={WALLET_ADDRESS}&startblock=0&endblock=99999999&sort=asc&apikey={ETHERSCAN_API_KEY}"
-    response_token = requests.get(url_token)
-    data_token = response_token.json()
-    token_txs = []
-    if data_token["status"] == "1":
-        token_txs = data_token["result"]
-    return token_txs
+    return list(get_client().iter_account_action("tokentx", WALLET_ADDRESS, ETHERSCAN_API_KEY))
 
 def nft_token_tx(WALLET_ADDRESS, ETHERSCAN_API_KEY):
-    url_token = f"https://api.etherscan.io/api?module=account&action=tokennfttx&address={WALLET_ADDRESS}&startblock=0&endblock=99999999&sort=asc&apikey={ETHERSCAN_API_KEY}"
-    response_token = requests.get(url_token)
-    data_token = response_token.json()
-    nft_txs = []
-    if data_token["status"] == "1":
-        nft_txs = data_token["result"]
-    return nft_txs
+    return list(get_client().iter_account_action("tokennfttx", WALLET_ADDRESS, ETHERSCAN_API_KEY))
 
 def getEthereumData(WALLET_ADDRESS, ETHERSCAN_API_KEY):
     data = {
@@ -99,109 +70,147 @@ def getEthereumData(WALLET_ADDRESS, ETHERSCAN_API_KEY):
 # {smart_contract}
 # </smart contract>
 # """
-template = PromptTemplate(
-    input_variables=["wallet_address"],
-    template="""
+WALLET_ANALYSIS_TEMPLATE = """
     You are a professional data analyst. You are provided with data about a wallet address to determine the reputation score.
     Analyze the blockchain wallet address: {wallet_address}.
+    Base your analysis only on this digest of its on-chain history (JSON; token amounts are
+    transfer volumes, top_counterparties entries are [address, transactions, label], hourly_utc
+    counts records per hour of the day):
+    {digest}
     Provide insights on transaction history, security risks, and token distribution.
     - Number of transactions.
     - Assess token distribution and key holdings.
     - Provide an overall risk assessment and investment insights.
     Ensure your response is concise, professional, and actionable.
     """
-)
-
-wallet_analysis = template | gemini_llm | RunnablePassthrough()
-
-def analyze_wallet():
-    try:
-        data = requests.json()
-        wallet_address = data.get("wallet_address")
-        if not wallet_address or not is_valid_eth_address(wallet_address):
-            return json({"error": "wallet_address is required"}), 400
-        
-        transactions = fetchTx(wallet_address)
-        transaction_count = len(transactions)
-
-        if isinstance(transactions, dict) and "error" in transactions:
-            return json(transactions), 500
-        
-        response = wallet_analysis.run(wallet_address=wallet_address, transaction_count=transaction_count)
-        
-        return json({"wallet_address": wallet_address, "analysis": response, "transaction_count": transaction_count})
-    except Exception as e:
-        return json({"error": str(e)}), 500
+
+_wallet_analysis = None
+_wallet_analysis_lock = threading.Lock()
+
+def get_wallet_analysis_chain():
+    """
+    Shared wallet insight chain (prompt | llm), built on first use so that importing this
+    module needs no API key and loads no model SDK.
+    """
+    global _wallet_analysis
+    with _wallet_analysis_lock:
+        if _wallet_analysis is None:
+            if not os.getenv("GOOGLE_GEMINI_API_KEY"):
+                raise RuntimeError("Google Gemini API key is missing. Set GOOGLE_GEMINI_API_KEY as an environment variable.")
+            from langchain_core.prompts import PromptTemplate
+            from analyze import get_llm
+
+            prompt = PromptTemplate(input_variables=["wallet_address", "digest"], template=WALLET_ANALYSIS_TEMPLATE)
+            _wallet_analysis = prompt | get_llm()
+        return _wallet_analysis
+
+def analyze_wallet(wallet_address):
+    """
+    Generate LLM insights for a wallet from its history digest, so the prompt stays within the
+    digest's token budget however active the wallet is. Insights are cached per wallet and
+    block height. Raises ValueError for a missing or invalid address.
+    """
+    if not wallet_address or not is_valid_eth_address(wallet_address):
+        raise ValueError("A valid wallet_address is required")
+
+    digest = asyncio.run(wallet_digest(wallet_address))
+    cache_key = make_key(
+        "wallet_insight", WALLET_ANALYSIS_TEMPLATE, digest_key(wallet_address, digest["block_height"])
+    )
+    response = digest_cache.get(cache_key)
+    if response is MISS:
+        response = get_wallet_analysis_chain().invoke(
+            {"wallet_address": wallet_address, "digest": render_digest(digest)}
+        )
+        digest_cache.set(cache_key, response)
+
+    return {
+        "wallet_address": wallet_address,
+        "analysis": response,
+        "transaction_count": digest["transactions"]["normal"],
+        "digest": digest
+    }
 
 
 #Returns
 # If the address is a contract or externally owned account
 def is_valid_eth_address(address):
-    return Web3.is_address(address)
+    return is_address(address)
 
 #The age of the wallet
 def fetch_transactions(WALLET_ADDRESS):
-    """Fetch normal ETH transactions."""
-    url = f"https://api.etherscan.io/api?module=account&action=txlist&address={WALLET_ADDRESS}&startblock=0&endblock=99999999&sort=asc&apikey={ETHERSCAN_API_KEY}"
-    response = requests.get(url)
-    data = response.json()
-    return data.get("result", []) if data.get("status") == "1" else []
+    """Stream normal ETH transactions, oldest first, across all result pages."""
+    return get_client().iter_account_action("txlist", WALLET_ADDRESS)
 
-def calculate_wallet_age(WALLET_ADDRESS):
-    """Determine wallet age from the first transaction."""
-    transactions = fetch_transactions(WALLET_ADDRESS)
-    if not transactions:
-        return 0 
-    first_tx_timestamp = int(transactions[0]["timeStamp"])
+def _age_in_days(first_tx_timestamp):
+    if first_tx_timestamp is None:
+        return 0
     first_tx_date = datetime.utcfromtimestamp(first_tx_timestamp)
-    wallet_age_days = (datetime.utcnow() - first_tx_date).days
-    return wallet_age_days
+    return (datetime.utcnow() - first_tx_date).days
+
+def calculate_wallet_age(WALLET_ADDRESS, transactions=None):
+    """Determine wallet age from the first transaction."""
+    if transactions is None:
+        transactions = fetch_transactions(WALLET_ADDRESS)
+    # Transactions arrive oldest first, so only the first one (and first page) is needed
+    first_tx = next(iter(transactions), None)
+    if first_tx is None:
+        return 0
+    return _age_in_days(int(first_tx["timeStamp"]))
 
 #The balance of the wallet
-def fetch_token_holdings(WALLET_ADDRESS):
+def fetch_token_holdings(WALLET_ADDRESS, token_txs=None):
     """Fetch ERC-20 token balances."""
-    url = f"https://api.etherscan.io/api?module=account&action=tokentx&address={WALLET_ADDRESS}&startblock=0&endblock=99999999&sort=asc&apikey={ETHERSCAN_API_KEY}"
-    response = requests.get(url)
-    data = response.json()
-    tokens = {}
-    if data.get("status") == "1":
-        for tx in data["result"]:
-            token_symbol = tx["tokenSymbol"]
-            token_value = int(tx["value"]) / (10 ** int(tx["tokenDecimal"]))
+    if token_txs is None:
+        token_txs = get_client().iter_account_action("tokentx", WALLET_ADDRESS)
+    return _accumulate_tokens(token_txs)
+
+def _accumulate_tokens(token_txs, tokens=None):
+    """Add token transfer values into running per-symbol totals."""
+    tokens = dict(tokens or {})
+    for batch in columns.iter_batches(token_txs, "tokentx", ("amount", "symbol_id")):
+        for token_symbol, token_value in columns.totals_by_symbol(batch, batch["amount"]).items():
             tokens[token_symbol] = tokens.get(token_symbol, 0) + token_value
     return tokens
 
-def fetch_nft_holdings(WALLET_ADDRESS):
+def fetch_nft_holdings(WALLET_ADDRESS, nft_txs=None):
     """Fetch ERC-721 and ERC-1155 NFT holdings."""
-    url = f"https://api.etherscan.io/api?module=account&action=tokennfttx&address={WALLET_ADDRESS}&startblock=0&endblock=99999999&sort=asc&apikey={ETHERSCAN_API_KEY}"
-    response = requests.get(url)
-    data = response.json()
-    nfts = {}
-    if data.get("status") == "1":
-        for tx in data["result"]:
-            nft_name = tx["tokenName"]
-            nfts[nft_name] = nfts.get(nft_name, 0) + 1
+    if nft_txs is None:
+        nft_txs = get_client().iter_account_action("tokennfttx", WALLET_ADDRESS)
+    return _accumulate_nfts(nft_txs)
+
+def _accumulate_nfts(nft_txs, nfts=None):
+    """Add NFT transfers into running per-collection counts."""
+    nfts = dict(nfts or {})
+    for batch in columns.iter_batches(nft_txs, "tokennfttx", ("symbol_id",)):
+        for nft_name, count in columns.totals_by_symbol(batch).items():
+            nfts[nft_name] = nfts.get(nft_name, 0) + count
     return nfts
 
 #The number of transactions
-def transaction_counts(WALLET_ADDRESS):
+def transaction_counts(WALLET_ADDRESS, transactions=None):
     """Analyze transaction success/failure rates and gas usage."""
-    transactions = fetch_transactions(WALLET_ADDRESS)
-    success_count = 0
-    failed_count = 0
-    high_gas_txs = 0
-    gas_threshold = 0.01
-
-    for tx in transactions:
-        if tx["isError"] == "0":
-            success_count += 1
-        else:
-            failed_count += 1
-        gas_used = int(tx["gasUsed"]) * int(tx["gasPrice"]) / 1e18
-        if gas_used > gas_threshold:
-            high_gas_txs += 1
-
-    return {"success_count": success_count, "failed_count": failed_count, "high_gas_txs": high_gas_txs}
+    if transactions is None:
+        transactions = fetch_transactions(WALLET_ADDRESS)
+    summary = _summarize_transactions(transactions)
+    del summary["first_timestamp"]
+    return summary
+
+def _summarize_transactions(transactions, summary=None):
+    """
+    Single pass over a transaction stream: success/failure and high-gas counts plus the first
+    timestamp, computed column-wise per batch. Passing a previous summary folds the new
+    transactions into it.
+    """
+    summary = dict(summary or {"success_count": 0, "failed_count": 0, "high_gas_txs": 0, "first_timestamp": None})
+    for batch in columns.iter_batches(transactions, "txlist", ("timestamp", "is_error", "gas_fee")):
+        part = columns.transaction_summary(batch)
+        for key in ("success_count", "failed_count", "high_gas_txs"):
+            summary[key] += part[key]
+        first_timestamp = summary["first_timestamp"]
+        if first_timestamp is None or part["first_timestamp"] < first_timestamp:
+            summary["first_timestamp"] = part["first_timestamp"]
+    return summary
 
 # async def fetch_dune_analytics(wallet_address):
 #   url = f"https://api.dune.com/api/v1/query/your-query-id/results?wallet={wallet_address}"
@@ -224,50 +233,15 @@ def transaction_counts(WALLET_ADDRESS):
 # The reputation of the address is 70/100
 async def calculate_reputation_score(WALLET_ADDRESS):
     """Compute a reputation score based on multiple criteria."""
-    wallet_age = calculate_wallet_age(WALLET_ADDRESS)
-    tx_analysis = transaction_counts(WALLET_ADDRESS)
-    token_holdings = fetch_token_holdings(WALLET_ADDRESS)
-    nft_holdings = fetch_nft_holdings(WALLET_ADDRESS)
-
-    score = 100
-
-    if wallet_age < 30:
-        score -= 10
-    elif wallet_age < 90:
-        score -= 5
-
-    # Transaction Failure Rate Penalty
-    failure_rate = tx_analysis["failed_count"] / max(1, tx_analysis["success_count"] + tx_analysis["failed_count"])
-    if failure_rate > 0.3:
-        score -= 20
-    elif failure_rate > 0.1:
-        score -= 10
-
-    # High Gas Usage
-    if tx_analysis["high_gas_txs"] > 10:
-        score -= 5
-
-    if len(token_holdings) > 5:
-        score += 5
-    if len(nft_holdings) > 3:
-        score += 5
-
-    score = max(0, min(100, score))
-    return {
-        "wallet_address": WALLET_ADDRESS,
-        "wallet_age_days": wallet_age,
-        "transaction_analysis": tx_analysis,
-        "token_holdings": token_holdings,
-        "nft_holdings": nft_holdings,
-        "reputation_score": score
-    }
+    # One pass over the wallet's history feeds every metric; the scoring model is versioned
+    return await get_engine().score(WALLET_ADDRESS)
 
 
 if __name__ == "__main__":
     async def main():
         # ethereum_data = getEthereumData(WALLET_ADDRESS, ETHERSCAN_API_KEY)
         reputation_data = await calculate_reputation_score(WALLET_ADDRESS)
-        ethereum_data = fetch_transactions(WALLET_ADDRESS)
+        ethereum_data = list(fetch_transactions(WALLET_ADDRESS))
 
         print(json.dumps(reputation_data, indent=4))
         print(json.dumps(ethereum_data, indent=4))
@@ -0,0 +1,133 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from cache import MISS, build_cache, make_key
+from reputation_engine import get_engine
+
+# Lookup outcomes
+FRESH = "hit"
+STALE = "stale"
+MISSED = "miss"
+
+
+class ReputationCache:
+    """
+    Stale-while-revalidate cache of wallet reputation results, keyed on address and scoring
+    model version. Results younger than `ttl` are served as is; older ones (up to
+    `ttl + max_stale`) are served at once while a background refresh recomputes them.
+    Concurrent misses for the same wallet share one computation.
+    """
+    def __init__(self, engine, ttl=3600, max_stale=86400, max_entries=1024, path=None, refresh_workers=2):
+        self.engine = engine
+        self.ttl = ttl
+        self.max_stale = max_stale
+        # Entries are only dropped once they are too old to be served even as stale
+        self.cache = build_cache(max_entries=max_entries, ttl=ttl + max_stale, path=path)
+        self._executor = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="reputation-refresh")
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._counters = {"fresh_hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "refresh_failures": 0}
+        self._lag = {"last": 0.0, "total": 0.0, "max": 0.0}
+
+    def _key(self, address):
+        return make_key("reputation", address.lower(), self.engine.model.version)
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _compute(self, address, key):
+        """Score a wallet and store the result, sharing the work with concurrent callers."""
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        if not owner:
+            return future.result()
+        try:
+            result = asyncio.run(self.engine.score(address))
+            self.cache.set(key, {"result": result, "computed_at": time.time()})
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def _refresh(self, address, key, stale_since):
+        try:
+            self._compute(address, key)
+        except Exception as e:
+            self._count("refresh_failures")
+            logging.warning("Background refresh of %s failed: %s", address, e)
+            return
+        lag = time.time() - stale_since
+        with self._lock:
+            self._counters["refreshes"] += 1
+            self._lag["last"] = lag
+            self._lag["total"] += lag
+            self._lag["max"] = max(self._lag["max"], lag)
+
+    def get(self, address):
+        """Return (result, status, age_seconds); status is "hit", "stale" or "miss"."""
+        key = self._key(address)
+        entry = self.cache.get(key)
+        if entry is MISS:
+            self._count("misses")
+            return self._compute(address, key), MISSED, 0.0
+        age = time.time() - entry["computed_at"]
+        if age < self.ttl:
+            self._count("fresh_hits")
+            return entry["result"], FRESH, age
+        self._count("stale_hits")
+        with self._lock:
+            refreshing = key in self._inflight
+        if not refreshing:
+            self._executor.submit(self._refresh, address, key, entry["computed_at"] + self.ttl)
+        return entry["result"], STALE, age
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+            lag = dict(self._lag)
+        lookups = counters["fresh_hits"] + counters["stale_hits"] + counters["misses"]
+        counters["hit_ratio"] = (counters["fresh_hits"] + counters["stale_hits"]) / lookups if lookups else 0.0
+        counters["fresh_hit_ratio"] = counters["fresh_hits"] / lookups if lookups else 0.0
+        # Refresh lag: time from an entry going stale until its refreshed result was stored
+        counters["refresh_lag_seconds"] = {
+            "last": lag["last"],
+            "mean": lag["total"] / counters["refreshes"] if counters["refreshes"] else 0.0,
+            "max": lag["max"]
+        }
+        counters["model_version"] = self.engine.model.version
+        counters["tiers"] = self.cache.stats()
+        return counters
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_reputation_cache() -> ReputationCache:
+    """
+    Return the process-wide reputation cache, configured from REPUTATION_CACHE_* settings.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ReputationCache(
+                get_engine(),
+                ttl=int(os.getenv("REPUTATION_CACHE_TTL", "3600")),
+                max_stale=int(os.getenv("REPUTATION_CACHE_MAX_STALE", "86400")),
+                max_entries=int(os.getenv("REPUTATION_CACHE_SIZE", "1024")),
+                path=os.getenv("REPUTATION_CACHE_PATH") or None,
+                refresh_workers=int(os.getenv("REPUTATION_REFRESH_WORKERS", "2"))
+            )
+        return _cache
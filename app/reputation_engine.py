@@ -0,0 +1,360 @@
+import time
+import asyncio
+import threading
+import numpy as np
+
+import columns
+from address_labels import CATEGORIES, get_labels
+from etherscan import get_client
+from metrics import span
+from scoring import get_model
+from wallet_store import get_store
+
+# Metric incremented for transactions sent to an address of each label category
+LABEL_METRICS = {
+    "dex": "token_swaps",
+    "bridge": "bridge_transactions",
+    "lending": "lending_transactions",
+    "ens": "ens_interactions",
+    "mixer": "mixer_interactions",
+    "scam": "scam_interactions"
+}
+# Counterparties whose counts are kept per wallet; rarer ones are dropped, so counts are approximate
+TRACKED_COUNTERPARTIES = 1000
+# Counterparties reported by CounterpartyVisitor, most frequent first
+TOP_COUNTERPARTIES = 25
+
+
+class MetricVisitor:
+    """
+    One group of wallet metrics computed during the engine's single pass over a history.
+    `actions` maps each account action the visitor reads to the columns it needs. State is
+    passed in and returned (it must stay JSON-serializable so the wallet store can keep it),
+    which lets one visitor instance serve every wallet concurrently.
+    """
+    name = None
+    actions = {}
+
+    def initial(self):
+        return {}
+
+    def visit(self, state, action, batch):
+        """Fold one columnar batch of `action` records into the state and return it."""
+        raise NotImplementedError
+
+    def merge(self, states):
+        """Combine the per-action states; visitors reading one action just take its state."""
+        return states[0]
+
+    def finalize(self, state) -> dict:
+        """Metrics from the merged state."""
+        return dict(state)
+
+
+class TransactionsVisitor(MetricVisitor):
+    """Success/failure and high-gas counts of normal transactions."""
+    name = "transactions"
+    actions = {"txlist": ("timestamp", "is_error", "gas_fee")}
+
+    def initial(self):
+        return {"success_count": 0, "failed_count": 0, "high_gas_txs": 0}
+
+    def visit(self, state, action, batch):
+        summary = columns.transaction_summary(batch)
+        for key in ("success_count", "failed_count", "high_gas_txs"):
+            state[key] += summary[key]
+        return state
+
+    def finalize(self, state):
+        total = state["success_count"] + state["failed_count"]
+        return {**state, "failure_rate": state["failed_count"] / max(1, total)}
+
+
+class ActivityVisitor(MetricVisitor):
+    """Transaction totals, first/last activity, active days, streaks and contract deployments."""
+    name = "activity"
+    actions = {
+        "txlist": ("timestamp", "deployment"),
+        "txlistinternal": ("timestamp", "deployment")
+    }
+
+    def initial(self):
+        return {
+            "total_transactions": 0,
+            "first_activity": None,
+            "last_activity": None,
+            "contract_deployments": 0,
+            # Sorted unique active days (UTC) as date ordinals
+            "active_days": []
+        }
+
+    def visit(self, state, action, batch):
+        timestamps = batch["timestamp"]
+        first, last = int(timestamps.min()), int(timestamps.max())
+        if state["first_activity"] is None or first < state["first_activity"]:
+            state["first_activity"] = first
+        if state["last_activity"] is None or last > state["last_activity"]:
+            state["last_activity"] = last
+        state["total_transactions"] += len(batch)
+        state["contract_deployments"] += int(np.count_nonzero(batch["deployment"]))
+        state["active_days"] = np.union1d(
+            np.asarray(state["active_days"], dtype=np.int64), columns.active_day_ordinals(timestamps)
+        ).tolist()
+        return state
+
+    def merge(self, states):
+        firsts = [state["first_activity"] for state in states if state["first_activity"] is not None]
+        lasts = [state["last_activity"] for state in states if state["last_activity"] is not None]
+        days = np.unique(np.concatenate([np.asarray(state["active_days"], dtype=np.int64) for state in states]))
+        return {
+            "total_transactions": sum(state["total_transactions"] for state in states),
+            "first_activity": min(firsts) if firsts else None,
+            "last_activity": max(lasts) if lasts else None,
+            "contract_deployments": sum(state["contract_deployments"] for state in states),
+            "active_days": days.tolist()
+        }
+
+    def finalize(self, state):
+        current_streak, longest_streak = columns.streaks(np.asarray(state["active_days"], dtype=np.int64))
+        first_activity = state["first_activity"]
+        return {
+            **state,
+            "active_days": len(state["active_days"]),
+            "current_streak": current_streak,
+            "longest_streak": longest_streak,
+            "wallet_age_days": int((time.time() - first_activity) // 86400) if first_activity is not None else 0
+        }
+
+
+class LabelVisitor(MetricVisitor):
+    """Interactions with labeled addresses (DEX routers, bridges, lenders, ENS, mixers, scams)."""
+    name = "labels"
+    actions = {"txlist": ("to_id",), "txlistinternal": ("to_id",)}
+
+    def __init__(self, labels=None):
+        self._labels = labels
+
+    @property
+    def labels(self):
+        if self._labels is None:
+            self._labels = get_labels()
+        return self._labels
+
+    def initial(self):
+        return dict.fromkeys(CATEGORIES, 0)
+
+    def visit(self, state, action, batch):
+        for category, count in self.labels.count(batch).items():
+            state[category] += count
+        return state
+
+    def merge(self, states):
+        return {category: sum(state[category] for state in states) for category in CATEGORIES}
+
+    def finalize(self, state):
+        return {metric: state[category] for category, metric in LABEL_METRICS.items()}
+
+
+class TokenVisitor(MetricVisitor):
+    """Per-symbol ERC-20 transfer totals."""
+    name = "tokens"
+    actions = {"tokentx": ("amount", "symbol_id")}
+
+    def visit(self, state, action, batch):
+        for symbol, amount in columns.totals_by_symbol(batch, batch["amount"]).items():
+            state[symbol] = state.get(symbol, 0) + amount
+        return state
+
+    def finalize(self, state):
+        return {"token_holdings": state, "token_count": len(state)}
+
+
+class NftVisitor(MetricVisitor):
+    """Per-collection NFT transfer counts."""
+    name = "nfts"
+    actions = {"tokennfttx": ("symbol_id",)}
+
+    def visit(self, state, action, batch):
+        for collection, count in columns.totals_by_symbol(batch).items():
+            state[collection] = state.get(collection, 0) + count
+        return state
+
+    def finalize(self, state):
+        return {"nft_holdings": state, "nft_count": len(state), "nft_transactions": sum(state.values())}
+
+
+class CounterpartyVisitor(MetricVisitor):
+    """
+    Most frequent `to` addresses of normal and internal transactions. Incoming transfers are
+    addressed to the wallet itself, so its own address usually ranks first; callers drop it.
+    Only the TRACKED_COUNTERPARTIES most frequent are kept, which bounds the stored state.
+    """
+    name = "counterparties"
+    actions = {"txlist": ("to_id",), "txlistinternal": ("to_id",)}
+
+    def _prune(self, state, limit):
+        if len(state) <= limit:
+            return state
+        return dict(sorted(state.items(), key=lambda item: item[1], reverse=True)[:limit])
+
+    def visit(self, state, action, batch):
+        ids, counts = np.unique(batch["to_id"], return_counts=True)
+        for address_id, count in zip(ids, counts):
+            address = batch.addresses.values[address_id]
+            if address:
+                state[address] = state.get(address, 0) + int(count)
+        # Pruning only once twice the limit is reached keeps it off the per-batch path
+        return self._prune(state, TRACKED_COUNTERPARTIES) if len(state) > 2 * TRACKED_COUNTERPARTIES else state
+
+    def merge(self, states):
+        merged = {}
+        for state in states:
+            for address, count in state.items():
+                merged[address] = merged.get(address, 0) + count
+        return self._prune(merged, TRACKED_COUNTERPARTIES)
+
+    def finalize(self, state):
+        return {"top_counterparties": [list(item) for item in self._prune(state, TOP_COUNTERPARTIES).items()]}
+
+
+class HistogramVisitor(MetricVisitor):
+    """Records of every action per month and per hour of the day (UTC), and the last block seen."""
+    name = "histograms"
+    actions = {action: ("timestamp", "block") for action in ("txlist", "txlistinternal", "tokentx", "tokennfttx")}
+
+    def initial(self):
+        return {"monthly_activity": {}, "hourly_activity": [0] * 24, "last_block": 0}
+
+    def visit(self, state, action, batch):
+        for month, count in columns.monthly_counts(batch["timestamp"]).items():
+            state["monthly_activity"][month] = state["monthly_activity"].get(month, 0) + count
+        state["hourly_activity"] = (np.asarray(state["hourly_activity"]) + columns.hourly_counts(batch["timestamp"])).tolist()
+        state["last_block"] = max(state["last_block"], int(batch["block"].max()))
+        return state
+
+    def merge(self, states):
+        merged = self.initial()
+        for state in states:
+            for month, count in state["monthly_activity"].items():
+                merged["monthly_activity"][month] = merged["monthly_activity"].get(month, 0) + count
+            merged["hourly_activity"] = [a + b for a, b in zip(merged["hourly_activity"], state["hourly_activity"])]
+            merged["last_block"] = max(merged["last_block"], state["last_block"])
+        merged["monthly_activity"] = dict(sorted(merged["monthly_activity"].items()))
+        return merged
+
+
+def default_visitors(labels=None):
+    return [
+        TransactionsVisitor(), ActivityVisitor(), LabelVisitor(labels), TokenVisitor(), NftVisitor(),
+        CounterpartyVisitor(), HistogramVisitor()
+    ]
+
+
+class ReputationEngine:
+    """
+    Fetches each account action a wallet's visitors need exactly once, converts the stream
+    to columnar batches once, and hands every batch to all visitors interested in it. With a
+    wallet store, per-action visitor states are kept as aggregates and only new blocks are
+    fetched; a visitor added later is backfilled from the stored records without an API call.
+    """
+    def __init__(self, visitors=None, model=None, client=None, store=None, labels=None):
+        self.visitors = visitors if visitors is not None else default_visitors(labels)
+        self.model = model if model is not None else get_model()
+        self.client = client if client is not None else get_client()
+        self.store = store if store is not None else get_store()
+        # action -> (visitors reading it, union of the columns they need)
+        self.plan = {}
+        for visitor in self.visitors:
+            for action, fields in visitor.actions.items():
+                readers, wanted = self.plan.setdefault(action, ([], set()))
+                readers.append(visitor)
+                wanted.update(fields)
+
+    def _fold(self, action, readers=None):
+        """fold(records, state) for one action, compatible with WalletStore.sync."""
+        readers = readers if readers is not None else self.plan[action][0]
+        fields = tuple(self.plan[action][1])
+
+        def fold(records, state):
+            state = dict(state or {})
+            for visitor in readers:
+                state.setdefault(visitor.name, visitor.initial())
+            for batch in columns.iter_batches(records, action, fields):
+                with span("visitors", action=action, rows=len(batch)):
+                    for visitor in readers:
+                        state[visitor.name] = visitor.visit(state[visitor.name], action, batch)
+            return state
+        return fold
+
+    def _sync(self, address, action, api_key=None):
+        name = f"engine.{action}"
+        readers = self.plan[action][0]
+        state = self.store.aggregate(address, name)
+        missing = [visitor for visitor in readers if state is not None and visitor.name not in state]
+        if missing:
+            # New visitors replay the records already stored instead of refetching the history
+            state = self._fold(action, missing)(self.store.transactions(address, action), state)
+            self.store.save_aggregate(address, name, state)
+        return self.store.sync(self.client, address, action, name, self._fold(action), api_key)
+
+    async def collect(self, address, api_key=None) -> dict:
+        """Run the single pass: {action: {visitor name: state}}, actions fetched concurrently."""
+        address = address.lower()
+        actions = list(self.plan)
+        if self.store is not None:
+            tasks = [self.client.run(self._sync, address, action, api_key) for action in actions]
+        else:
+            tasks = [
+                self.client.consume(action, address, lambda records, fold=self._fold(action): fold(records, None), api_key)
+                for action in actions
+            ]
+        return dict(zip(actions, await asyncio.gather(*tasks)))
+
+    def metrics(self, states) -> dict:
+        """Merge each visitor's per-action states and flatten their metrics into one dict."""
+        metrics = {}
+        for visitor in self.visitors:
+            visitor_states = [
+                states[action][visitor.name] for action in visitor.actions
+                if visitor.name in states.get(action, {})
+            ]
+            metrics.update(visitor.finalize(visitor.merge(visitor_states or [visitor.initial()])))
+        return metrics
+
+    async def compute_metrics(self, address, api_key=None) -> dict:
+        return self.metrics(await self.collect(address, api_key))
+
+    async def score(self, address, api_key=None) -> dict:
+        """Compute the full metric set for a wallet and score it with the engine's model."""
+        with span("wallet_metrics"):
+            metrics = await self.compute_metrics(address, api_key)
+        with span("wallet_scoring", model_version=self.model.version):
+            scored = self.model.score(metrics)
+        return {
+            "wallet_address": address,
+            "wallet_age_days": metrics.get("wallet_age_days", 0),
+            "transaction_analysis": {
+                key: metrics[key] for key in ("success_count", "failed_count", "high_gas_txs") if key in metrics
+            },
+            "token_holdings": metrics.get("token_holdings", {}),
+            "nft_holdings": metrics.get("nft_holdings", {}),
+            "metrics": {key: value for key, value in metrics.items() if not isinstance(value, (dict, list))},
+            "model_version": scored["model_version"],
+            "score_breakdown": scored["breakdown"],
+            "reputation_score": scored["score"]
+        }
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> ReputationEngine:
+    """
+    Return the process-wide reputation engine, creating it on first use.
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = ReputationEngine()
+        return _engine
@@ -0,0 +1,90 @@
+import os
+import json
+import threading
+
+# Default reputation model. Each rule reads one metric and applies the points of the first
+# step whose threshold it crosses ("below": value < threshold, "above": value > threshold).
+DEFAULT_MODEL = {
+    "version": "2",
+    "base": 100,
+    "min": 0,
+    "max": 100,
+    "rules": [
+        {"metric": "wallet_age_days", "below": [[30, -10], [90, -5]]},
+        {"metric": "failure_rate", "above": [[0.3, -20], [0.1, -10]]},
+        {"metric": "high_gas_txs", "above": [[10, -5]]},
+        {"metric": "token_count", "above": [[5, 5]]},
+        {"metric": "nft_count", "above": [[3, 5]]},
+        {"metric": "longest_streak", "above": [[29, 5], [6, 2]]},
+        {"metric": "token_swaps", "above": [[0, 2]]},
+        {"metric": "bridge_transactions", "above": [[0, 2]]},
+        {"metric": "lending_transactions", "above": [[0, 3]]},
+        {"metric": "ens_interactions", "above": [[0, 3]]},
+        {"metric": "contract_deployments", "above": [[0, 2]]},
+        {"metric": "mixer_interactions", "above": [[0, -25]]},
+        {"metric": "scam_interactions", "above": [[0, -30]]}
+    ]
+}
+
+
+class ScoringModel:
+    """
+    Versioned, data-driven reputation scoring: a base score adjusted by threshold rules over
+    the engine's metrics and clamped to [min, max].
+    """
+    def __init__(self, spec):
+        self.version = str(spec["version"])
+        self.base = spec.get("base", 100)
+        self.min = spec.get("min", 0)
+        self.max = spec.get("max", 100)
+        self.rules = []
+        for rule in spec["rules"]:
+            directions = [direction for direction in ("above", "below") if direction in rule]
+            if "metric" not in rule or len(directions) != 1:
+                raise ValueError(f"Invalid scoring rule: {rule}")
+            steps = [(float(threshold), points) for threshold, points in rule[directions[0]]]
+            self.rules.append((rule["metric"], directions[0], steps))
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def metrics(self):
+        """Names of the metrics the rules read."""
+        return {metric for metric, _, _ in self.rules}
+
+    def score(self, metrics) -> dict:
+        """Score a metric dict; returns the score and the rules that contributed to it."""
+        score = self.base
+        breakdown = []
+        for metric, direction, steps in self.rules:
+            value = metrics.get(metric)
+            if value is None:
+                continue
+            for threshold, points in steps:
+                if (value > threshold) if direction == "above" else (value < threshold):
+                    score += points
+                    breakdown.append({"metric": metric, "value": value, "points": points})
+                    break
+        return {
+            "score": max(self.min, min(self.max, score)),
+            "model_version": self.version,
+            "breakdown": breakdown
+        }
+
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_model() -> ScoringModel:
+    """
+    Return the process-wide scoring model: REPUTATION_MODEL_PATH if set, else the default model.
+    """
+    global _model
+    with _model_lock:
+        if _model is None:
+            path = os.getenv("REPUTATION_MODEL_PATH")
+            _model = ScoringModel.load(path) if path else ScoringModel(DEFAULT_MODEL)
+        return _model
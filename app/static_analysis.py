@@ -0,0 +1,408 @@
+import re
+import string
+from collections import namedtuple
+
+Token = namedtuple("Token", ["kind", "text", "line", "offset"])
+
+# One match per token: group 1 is the whitespace and comments skipped before it, group 2 the
+# token itself (empty at the end of the source). Skipping runs inside the regex engine keeps the
+# Python loop to one iteration per token.
+_TOKEN_PATTERN = re.compile(r"""
+    ((?:[ \t\n\r\f\v]++|//[^\n]*+|/\*.*?\*/)*+)
+    (
+      "(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*'
+    | 0[xX][0-9a-fA-F_]+|\d[\d_]*(?:\.\d+)?(?:[eE]-?\d+)?
+    | [A-Za-z_$][A-Za-z0-9_$]*
+    | \+\+|--|\+=|-=|\*=|/=|%=|\|=|&=|\^=|<<=|>>=|==|!=|<=|>=|&&|\|\||=>|->|<<|>>|\*\*|[-+*/%=<>!&|^~?:;,.(){}\[\]]
+    | [^ \t\n\r\f\v]
+    | \Z
+    )
+""", re.S | re.X)
+# Token kind by first character; quotes are strings unless unterminated, the rest is "other"
+_KIND_BY_FIRST = {
+    **dict.fromkeys(string.ascii_letters + "_$", "ident"),
+    **dict.fromkeys(string.digits, "number"),
+    **dict.fromkeys("-+*/%=<>!&|^~?:;,.(){}[]", "op")
+}
+
+# Comments, and the string literals that can contain comment markers, for scanners that skip
+# comments without tokenizing (is_smart_contract, the upload sniff). Strings match in the
+# "string" group; an unterminated block comment runs to the end, as in a partly read upload.
+COMMENT_OR_STRING = r"""(?P<string>"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*')|//[^\n]*+|/\*.*?(?:\*/|\Z)"""
+COMMENT_OR_STRING_PATTERN = re.compile(COMMENT_OR_STRING, re.S)
+
+SEVERITY_RANK = {"high": 3, "medium": 2, "low": 1}
+
+# Header words that are not access-control modifiers
+_FUNCTION_KEYWORDS = {
+    "public", "external", "internal", "private", "view", "pure", "payable",
+    "constant", "virtual", "override", "returns"
+}
+_EXTERNAL_CALLS = {"call", "send", "transfer", "delegatecall", "staticcall"}
+_ASSIGNMENT_OPS = {"=", "+=", "-=", "*=", "/=", "%=", "|=", "&=", "^=", "<<=", ">>="}
+_ARITHMETIC_OPS = {"+", "-", "*", "+=", "-=", "*=", "++", "--"}
+_CONDITION_KEYWORDS = {"if", "while", "require", "assert"}
+_NON_STATE_STARTERS = {
+    "function", "modifier", "event", "error", "struct", "enum", "using",
+    "constructor", "fallback", "receive", "pragma", "import", "emit", "return"
+}
+
+
+def tokenize(code: str) -> list:
+    """
+    Split Solidity source into tokens, dropping comments and whitespace but keeping line numbers
+    and character offsets.
+    """
+    tokens = []
+    append = tokens.append
+    kinds = _KIND_BY_FIRST
+    # Builds the Token without the Python-level namedtuple constructor, which dominates on big files
+    new_token = tuple.__new__
+    line = 1
+    offset = 0
+    for skipped, text in _TOKEN_PATTERN.findall(code):
+        if skipped:
+            offset += len(skipped)
+            line += skipped.count("\n")
+        if not text:
+            break
+        kind = kinds.get(text[0])
+        if kind is None:
+            kind = "string" if text[0] in "\"'" and len(text) > 1 else "other"
+        append(new_token(Token, (kind, text, line, offset)))
+        offset += len(text)
+    return tokens
+
+
+def _matching(tokens, start, open_text, close_text):
+    """Return the index of the token closing the bracket opened at tokens[start]."""
+    depth = 0
+    for i in range(start, len(tokens)):
+        text = tokens[i].text
+        if text == open_text:
+            depth += 1
+        elif text == close_text:
+            depth -= 1
+            if depth == 0:
+                return i
+    return len(tokens) - 1
+
+
+def pragma_min_version(tokens):
+    """Lowest compiler version the `pragma solidity` line allows, as a tuple, or None."""
+    for i, token in enumerate(tokens):
+        if token.text == "pragma" and i + 1 < len(tokens) and tokens[i + 1].text == "solidity":
+            # Versions tokenize as runs like "0.8" "." "19"; the operator before a run tells
+            # whether it is a lower bound (^, ~, >=, =, none) or an upper bound (<, <=)
+            versions = []
+            operator = ""
+            current = None
+            for t in tokens[i + 2:]:
+                if t.text == ";":
+                    break
+                if t.kind == "number" or (current is not None and t.text == "."):
+                    current = (current or "") + t.text
+                    continue
+                if current is not None:
+                    versions.append((operator, current))
+                    current = None
+                operator = t.text
+            if current is not None:
+                versions.append((operator, current))
+            parsed = [
+                tuple(int(p) for p in version.split(".") if p.isdigit())
+                for operator, version in versions if not operator.startswith("<")
+            ]
+            parsed = [v for v in parsed if v]
+            return min(parsed) if parsed else None
+    return None
+
+
+def parse_contracts(tokens) -> list:
+    """
+    Lightweight structural pass: contracts with their state variables and functions.
+    Each function records its header words and the token range of its body.
+    """
+    contracts = []
+    i = 0
+    n = len(tokens)
+    while i < n:
+        token = tokens[i]
+        if token.text in ("contract", "library", "interface", "abstract") and token.kind == "ident":
+            j = i
+            while j < n and tokens[j].text != "{":
+                if tokens[j].text == ";":
+                    break
+                j += 1
+            if j >= n or tokens[j].text != "{":
+                i = j + 1
+                continue
+            name_index = i + 2 if token.text == "abstract" else i + 1
+            end = _matching(tokens, j, "{", "}")
+            contract = _parse_contract_body(tokens, tokens[name_index].text if name_index < n else "", j, end)
+            contract["kind"] = tokens[i + 1].text if token.text == "abstract" else token.text
+            contract["line"] = token.line
+            contracts.append(contract)
+            i = end + 1
+        else:
+            i += 1
+    return contracts
+
+
+def _parse_contract_body(tokens, name, start, end):
+    contract = {
+        "name": name, "line": tokens[start].line, "end_line": tokens[end].line,
+        "state_vars": set(), "functions": [], "uses_safemath": False,
+        # Token indices of the body's opening and closing braces
+        "braces": (start, end)
+    }
+    i = start + 1
+    statement_start = i
+    while i < end:
+        token = tokens[i]
+        if token.text in ("function", "modifier", "constructor", "fallback", "receive"):
+            i = _parse_function(tokens, i, end, contract)
+            statement_start = i
+            continue
+        if token.text == "{":
+            # struct/enum bodies and the like carry no state we track
+            i = _matching(tokens, i, "{", "}") + 1
+            statement_start = i
+            continue
+        if token.text == ";":
+            _record_state_variable(tokens[statement_start:i], contract)
+            statement_start = i + 1
+        i += 1
+    return contract
+
+
+def _record_state_variable(statement, contract):
+    if not statement:
+        return
+    first = statement[0].text
+    if first == "using":
+        if any(t.text == "SafeMath" for t in statement):
+            contract["uses_safemath"] = True
+        return
+    if first in _NON_STATE_STARTERS or statement[0].kind != "ident":
+        return
+    name = None
+    for t in statement:
+        if t.text == "=":
+            break
+        if t.kind == "ident":
+            name = t.text
+    if name and name not in _FUNCTION_KEYWORDS and name not in ("constant", "immutable"):
+        contract["state_vars"].add(name)
+
+
+def _parse_function(tokens, start, end, contract):
+    """Parse one function/modifier and return the index just past it."""
+    kind = tokens[start].text
+    name = tokens[start + 1].text if kind in ("function", "modifier") and tokens[start + 1].kind == "ident" else kind
+    i = start + 1
+    while i < end and tokens[i].text != "(":
+        if tokens[i].text in ("{", ";"):
+            break
+        i += 1
+    if i < end and tokens[i].text == "(":
+        i = _matching(tokens, i, "(", ")") + 1
+    header = []
+    while i < end and tokens[i].text not in ("{", ";"):
+        if tokens[i].text == "(":
+            # returns (...) or modifier arguments
+            i = _matching(tokens, i, "(", ")") + 1
+            continue
+        if tokens[i].kind == "ident":
+            header.append(tokens[i].text)
+        i += 1
+    if i >= end or tokens[i].text == ";":
+        return i + 1
+    body_end = _matching(tokens, i, "{", "}")
+    if kind != "modifier":
+        contract["functions"].append({
+            "name": name,
+            "kind": kind,
+            "line": tokens[start].line,
+            "end_line": tokens[body_end].line,
+            "header": header,
+            "modifiers": [h for h in header if h not in _FUNCTION_KEYWORDS],
+            "start": start,
+            "body": (i + 1, body_end)
+        })
+    return body_end + 1
+
+
+def _is_exposed(function):
+    """Functions callable by anyone: public/external, or no visibility at all (pre-0.5 default)."""
+    header = function["header"]
+    if function["kind"] in ("constructor",):
+        return False
+    if "internal" in header or "private" in header:
+        return False
+    return True
+
+
+def _checks_sender(body_tokens):
+    """True when the body guards on msg.sender/tx.origin inside a require/if condition."""
+    for i, token in enumerate(body_tokens):
+        if token.text in ("require", "if", "assert") and i + 1 < len(body_tokens) and body_tokens[i + 1].text == "(":
+            close = _matching(body_tokens, i + 1, "(", ")")
+            texts = [t.text for t in body_tokens[i + 1:close]]
+            for k in range(len(texts) - 2):
+                if texts[k] in ("msg", "tx") and texts[k + 1] == "." and texts[k + 2] in ("sender", "origin"):
+                    return True
+    return False
+
+
+def _assignment_target(body_tokens, op_index):
+    """
+    Walk back from an assignment operator to the base identifier being written.
+    Local declarations (`uint x = ...`, `Foo storage f = ...`) return None.
+    """
+    depth = 0
+    k = op_index - 1
+    base = None
+    previous_ident = False
+    while k >= 0:
+        token = body_tokens[k]
+        text = token.text
+        if text in ("]", ")"):
+            depth += 1
+        elif text in ("[", "("):
+            if depth == 0:
+                break
+            depth -= 1
+        elif depth == 0 and text in (";", "{", "}", ",", "return"):
+            break
+        if depth == 0:
+            if token.kind == "ident":
+                if previous_ident:
+                    return None
+                base = text
+            previous_ident = token.kind == "ident"
+        k -= 1
+    return base
+
+
+def _find_reentrancy(function, body_tokens, contract, findings):
+    if "nonReentrant" in function["modifiers"]:
+        return
+    call_line = None
+    call_kind = None
+    for i, token in enumerate(body_tokens):
+        if call_line is None:
+            if token.text in _EXTERNAL_CALLS and i > 0 and body_tokens[i - 1].text == ".":
+                if i + 1 < len(body_tokens) and body_tokens[i + 1].text in ("(", "{", "."):
+                    call_line = token.line
+                    call_kind = token.text
+            continue
+        target = None
+        if token.text in _ASSIGNMENT_OPS:
+            target = _assignment_target(body_tokens, i)
+        elif token.text in ("++", "--"):
+            target = _assignment_target(body_tokens, i) or (
+                body_tokens[i + 1].text if i + 1 < len(body_tokens) else None)
+        elif token.text == "delete" and i + 1 < len(body_tokens):
+            target = body_tokens[i + 1].text
+        if target in contract["state_vars"]:
+            findings.append({
+                "category": "Reentrancy",
+                "severity": "high" if call_kind in ("call", "delegatecall") else "medium",
+                "line": call_line,
+                "function": function["name"],
+                "message": f"External `{call_kind}` on line {call_line} happens before state variable "
+                           f"`{target}` is written on line {token.line}."
+            })
+            return
+
+
+def _find_unprotected_calls(function, body_tokens, findings):
+    if not _is_exposed(function) or function["modifiers"] or _checks_sender(body_tokens):
+        return
+    for token in body_tokens:
+        if token.text in ("selfdestruct", "suicide"):
+            findings.append({
+                "category": "Self-Destruct",
+                "severity": "high",
+                "line": token.line,
+                "function": function["name"],
+                "message": f"`{token.text}` is reachable from an unrestricted function."
+            })
+        elif token.text == "delegatecall":
+            findings.append({
+                "category": "Unauthorized Access",
+                "severity": "high",
+                "line": token.line,
+                "function": function["name"],
+                "message": "`delegatecall` is reachable from an unrestricted function."
+            })
+
+
+def _find_timestamp_conditions(function, body_tokens, allow_now, findings):
+    for i, token in enumerate(body_tokens):
+        if token.text not in _CONDITION_KEYWORDS or i + 1 >= len(body_tokens) or body_tokens[i + 1].text != "(":
+            continue
+        close = _matching(body_tokens, i + 1, "(", ")")
+        for k in range(i + 2, close):
+            text = body_tokens[k].text
+            is_timestamp = text == "timestamp" and body_tokens[k - 1].text == "." and body_tokens[k - 2].text == "block"
+            if is_timestamp or (allow_now and text == "now") or text == "blockhash":
+                findings.append({
+                    "category": "Frontrunning",
+                    "severity": "medium",
+                    "line": body_tokens[k].line,
+                    "function": function["name"],
+                    "message": f"`{'block.timestamp' if is_timestamp else text}` is used in a `{token.text}` condition."
+                })
+                break
+
+
+def _find_unchecked_arithmetic(function, body_tokens, contract, findings):
+    seen_lines = set()
+    for i, token in enumerate(body_tokens):
+        if token.kind != "op" or token.text not in _ARITHMETIC_OPS or token.line in seen_lines:
+            continue
+        if token.text in ("+", "-") and (i == 0 or body_tokens[i - 1].kind == "op" and body_tokens[i - 1].text not in (")", "]")):
+            # unary sign, not arithmetic
+            continue
+        seen_lines.add(token.line)
+        target = _assignment_target(body_tokens, i) if token.text in ("+=", "-=", "*=", "++", "--") else None
+        findings.append({
+            "category": "Overflow",
+            "severity": "high" if target in contract["state_vars"] else "medium",
+            "line": token.line,
+            "function": function["name"],
+            "message": f"Unchecked `{token.text}` on a compiler version without built-in overflow checks."
+        })
+
+
+def scan_source(code: str) -> list:
+    """
+    Run every detector over the source and return findings sorted by severity, then line.
+    """
+    tokens = tokenize(code)
+    version = pragma_min_version(tokens)
+    pre_08 = version is not None and version < (0, 8)
+    allow_now = version is None or version < (0, 7)
+    findings = []
+    for contract in parse_contracts(tokens):
+        for function in contract["functions"]:
+            body_tokens = tokens[function["body"][0]:function["body"][1]]
+            _find_reentrancy(function, body_tokens, contract, findings)
+            _find_unprotected_calls(function, body_tokens, findings)
+            _find_timestamp_conditions(function, body_tokens, allow_now, findings)
+            if pre_08 and not contract["uses_safemath"]:
+                _find_unchecked_arithmetic(function, body_tokens, contract, findings)
+    findings.sort(key=lambda f: (-SEVERITY_RANK[f["severity"]], f["line"]))
+    return findings
+
+
+def clear_cut_category(findings):
+    """
+    Category of the most severe finding when the static pass alone is conclusive, else None.
+    """
+    for finding in findings:
+        if finding["severity"] == "high":
+            return finding["category"]
+    return None
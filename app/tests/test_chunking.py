@@ -0,0 +1,48 @@
+from chunking import split_source
+
+
+def contract(name, functions=1, body_chars=0):
+    filler = "        x += 1;\n" * (body_chars // 16)
+    parts = [f"contract {name} {{\n    uint x;\n"]
+    for i in range(functions):
+        parts.append(f"    function f{i}() public {{\n{filler}    }}\n")
+    parts.append("}\n")
+    return "".join(parts)
+
+
+def test_source_without_contracts_is_one_chunk():
+    code = "// nothing to see\n"
+    assert split_source(code) == [{"name": "source", "start_line": 1, "end_line": 1, "source": code}]
+
+
+def test_contracts_become_chunks_with_the_preamble():
+    preamble = "pragma solidity ^0.8.0;\nimport \"./Lib.sol\";\n"
+    code = preamble + contract("A") + contract("B")
+    chunks = split_source(code, max_chars=10_000)
+    assert [chunk["name"] for chunk in chunks] == ["A", "B"]
+    assert all(chunk["source"].startswith(preamble) for chunk in chunks)
+    assert chunks[0]["start_line"] == 3
+    assert chunks[1]["end_line"] == len(code.splitlines())
+
+
+def test_large_contract_splits_at_functions_and_keeps_context():
+    code = "pragma solidity ^0.8.0;\n" + contract("Big", functions=4, body_chars=800)
+    chunks = split_source(code, max_chars=1200)
+    assert len(chunks) > 1
+    names = " ".join(chunk["name"] for chunk in chunks)
+    assert all(f"f{i}" in names for i in range(4))
+    for chunk in chunks:
+        assert chunk["name"].startswith("Big (")
+        assert "contract Big {" in chunk["source"]
+        assert "uint x;" in chunk["source"]
+        assert chunk["source"].rstrip().endswith("}")
+
+
+def test_every_line_of_every_function_is_in_some_chunk():
+    code = contract("Big", functions=5, body_chars=400)
+    chunks = split_source(code, max_chars=600)
+    covered = set()
+    for chunk in chunks:
+        covered.update(range(chunk["start_line"], chunk["end_line"] + 1))
+    function_lines = {n for n, line in enumerate(code.splitlines(), 1) if "function" in line}
+    assert function_lines <= covered
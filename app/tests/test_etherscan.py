@@ -0,0 +1,103 @@
+import pytest
+
+import etherscan
+from etherscan import EtherscanClient, EtherscanError
+
+
+class FakeResponse:
+    def __init__(self, body, status_code=200, headers=None):
+        self.body = body
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = b"{}"
+
+    def json(self):
+        return self.body
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeSession:
+    """Answers account queries from a fixed list of records, like Etherscan's block-range paging."""
+    def __init__(self, records):
+        self.records = records
+        self.calls = []
+
+    def get(self, url, params, timeout):
+        self.calls.append(params)
+        start, end = int(params["startblock"]), int(params["endblock"])
+        records = [r for r in self.records if start <= int(r["blockNumber"]) <= end]
+        if params["sort"] == "desc":
+            records = records[::-1]
+        page, offset = params["page"], params["offset"]
+        if page * offset > etherscan.MAX_PAGE_SIZE:
+            return FakeResponse({"status": "0", "message": "Result window is too large", "result": []})
+        records = records[(page - 1) * offset:page * offset]
+        if not records:
+            return FakeResponse({"status": "0", "message": "No transactions found", "result": []})
+        return FakeResponse({"status": "1", "message": "OK", "result": records})
+
+
+def records(blocks):
+    """{block: count} -> records, oldest first."""
+    return [
+        {"blockNumber": str(block), "hash": f"0x{block:x}{i:04x}", "value": "1"}
+        for block, count in blocks.items() for i in range(count)
+    ]
+
+
+def client(history):
+    client = EtherscanClient(api_key="key", rate_limit=1000)
+    client.session = FakeSession(history)
+    return client
+
+
+def hashes(items):
+    return [item["hash"] for item in items]
+
+
+def test_page_boundary_inside_a_block_is_not_duplicated():
+    history = records({1: 3, 2: 4, 3: 2, 4: 1})
+    fetched = list(client(history).iter_account_action("txlist", "0xabc", page_size=5))
+    assert hashes(fetched) == hashes(history)
+
+
+def test_history_that_fits_one_page_takes_one_request():
+    history = records({1: 2, 2: 2})
+    etherscan_client = client(history)
+    assert hashes(etherscan_client.iter_account_action("txlist", "0xabc", page_size=5)) == hashes(history)
+    assert len(etherscan_client.session.calls) == 1
+
+
+def test_block_larger_than_a_page_is_paged_on_its_own():
+    history = records({1: 1, 2: 12, 3: 2})
+    fetched = list(client(history).iter_account_action("txlist", "0xabc", page_size=4))
+    assert hashes(fetched) == hashes(history)
+
+
+def test_newest_page_closes_the_gap_past_the_record_window(monkeypatch):
+    monkeypatch.setattr(etherscan, "MAX_PAGE_SIZE", 8)
+    history = records({1: 1, 2: 11, 3: 1})
+    fetched = list(client(history).iter_account_action("txlist", "0xabc", page_size=4))
+    assert sorted(hashes(fetched)) == sorted(hashes(history))
+
+
+def test_block_beyond_the_record_window_fails_loudly(monkeypatch):
+    monkeypatch.setattr(etherscan, "MAX_PAGE_SIZE", 4)
+    history = records({1: 1, 2: 20})
+    with pytest.raises(EtherscanError, match="Block 2"):
+        list(client(history).iter_account_action("txlist", "0xabc", page_size=4))
+
+
+def test_retry_after_header_sets_the_delay(monkeypatch):
+    answers = [
+        FakeResponse({}, status_code=429, headers={"Retry-After": "7"}),
+        FakeResponse({"status": "1", "result": []}),
+    ]
+    sleeps = []
+    monkeypatch.setattr(etherscan.time, "sleep", sleeps.append)
+    etherscan_client = client([])
+    etherscan_client.session.get = lambda url, params, timeout: answers.pop(0)
+    assert etherscan_client.call({"action": "txlist"}) == {"status": "1", "result": []}
+    assert sleeps == [7.0]
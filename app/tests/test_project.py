@@ -0,0 +1,88 @@
+import io
+import tarfile
+import zipfile
+
+import pytest
+
+import project
+from project import unpack_archive
+from uploads import UploadRejected
+
+
+def zip_bytes(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def tar_bytes(members):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+def unpack(data, filename, max_files=10, max_bytes=10_000, max_file_bytes=1_000):
+    return unpack_archive(data, filename, max_files, max_bytes, max_file_bytes)
+
+
+@pytest.mark.parametrize("build, filename", [(zip_bytes, "p.zip"), (tar_bytes, "p.tar.gz")])
+def test_reads_sources_and_strips_the_common_root(build, filename):
+    data = build({"repo/src/A.sol": b"contract A {}", "repo/README.md": b"hi", "repo/lib/B.sol": b"contract B {}"})
+    assert unpack(data, filename) == {"src/A.sol": b"contract A {}", "lib/B.sol": b"contract B {}"}
+
+
+@pytest.mark.parametrize("build, filename", [(zip_bytes, "p.zip"), (tar_bytes, "p.tgz")])
+def test_paths_escaping_the_root_are_skipped(build, filename):
+    data = build({
+        "../evil.sol": b"x", "/etc/abs.sol": b"y", "a/../../up.sol": b"z",
+        "__MACOSX/._A.sol": b"junk", "ok/A.sol": b"contract A {}"
+    })
+    assert unpack(data, filename) == {"etc/abs.sol": b"y", "ok/A.sol": b"contract A {}"}
+
+
+def test_windows_separators_are_normalised():
+    assert unpack(zip_bytes({"src\\A.sol": b"a", "B.sol": b"b"}), "p.zip") == {"src/A.sol": b"a", "B.sol": b"b"}
+
+
+def test_file_count_limit():
+    data = zip_bytes({f"C{i}.sol": b"contract C {}" for i in range(4)})
+    with pytest.raises(UploadRejected, match="Too many contracts") as error:
+        unpack(data, "p.zip", max_files=3)
+    assert error.value.status == 413
+
+
+def test_total_size_limit():
+    data = zip_bytes({f"C{i}.sol": b"x" * 400 for i in range(3)})
+    with pytest.raises(UploadRejected, match="Project is too large"):
+        unpack(data, "p.zip", max_bytes=1000)
+
+
+def test_oversized_member_is_kept_one_byte_over_the_limit():
+    files = unpack(zip_bytes({"Big.sol": b"x" * 5000}), "p.zip", max_file_bytes=100)
+    assert files == {"Big.sol": b"x" * 101}
+
+
+def test_tar_expansion_limit():
+    data = tar_bytes({"notes.txt": b"\0" * 20_000, "A.sol": b"contract A {}"})
+    with pytest.raises(UploadRejected, match="expands to too much"):
+        unpack(data, "p.tar.gz", max_bytes=2_000)
+
+
+def test_entry_count_limit(monkeypatch):
+    monkeypatch.setattr(project, "MAX_ARCHIVE_ENTRIES", 3)
+    data = zip_bytes({f"f{i}.txt": b"" for i in range(4)})
+    with pytest.raises(UploadRejected, match="more than 3 entries"):
+        unpack(data, "p.zip")
+
+
+def test_corrupt_and_empty_archives():
+    with pytest.raises(UploadRejected, match="corrupt"):
+        unpack(b"not an archive", "p.zip")
+    with pytest.raises(UploadRejected, match="no Solidity"):
+        unpack(zip_bytes({"README.md": b"hi"}), "p.zip")
@@ -0,0 +1,87 @@
+from static_analysis import clear_cut_category, pragma_min_version, scan_source, tokenize
+
+
+def categories(findings):
+    return [finding["category"] for finding in findings]
+
+
+def test_reentrancy_call_before_state_write():
+    code = """pragma solidity ^0.8.0;
+contract Bank {
+    mapping(address => uint) balances;
+    function withdraw() public {
+        (bool ok, ) = msg.sender.call{value: balances[msg.sender]}("");
+        require(ok);
+        balances[msg.sender] = 0;
+    }
+}
+"""
+    findings = scan_source(code)
+    assert categories(findings) == ["Reentrancy"]
+    assert findings[0]["severity"] == "high"
+    assert findings[0]["line"] == 5
+    assert findings[0]["function"] == "withdraw"
+    assert clear_cut_category(findings) == "Reentrancy"
+
+
+def test_state_write_before_call_is_clean():
+    code = """pragma solidity ^0.8.0;
+contract Bank {
+    mapping(address => uint) balances;
+    function withdraw() public nonReentrant {
+        uint amount = balances[msg.sender];
+        balances[msg.sender] = 0;
+        payable(msg.sender).transfer(amount);
+    }
+}
+"""
+    assert scan_source(code) == []
+
+
+def test_unrestricted_selfdestruct():
+    code = """contract Kill {
+    function kill() public { selfdestruct(payable(msg.sender)); }
+    function guarded() public { require(msg.sender == owner); selfdestruct(payable(owner)); }
+}
+"""
+    findings = scan_source(code)
+    assert categories(findings) == ["Self-Destruct"]
+    assert findings[0]["function"] == "kill"
+
+
+def test_unchecked_arithmetic_depends_on_pragma():
+    body = """contract Counter {
+    uint total;
+    function add(uint x) public { total += x; }
+}
+"""
+    assert categories(scan_source("pragma solidity ^0.6.0;\n" + body)) == ["Overflow"]
+    assert scan_source("pragma solidity ^0.8.0;\n" + body) == []
+
+
+def test_keywords_in_comments_and_strings_are_ignored():
+    code = """pragma solidity ^0.8.0;
+contract Quiet {
+    // selfdestruct(payable(msg.sender));
+    function f() public pure returns (string memory) { return "delegatecall /* selfdestruct"; }
+}
+"""
+    assert scan_source(code) == []
+
+
+def test_findings_sorted_by_severity_then_line():
+    code = """pragma solidity ^0.8.0;
+contract Mixed {
+    uint deadline;
+    function late() public view returns (bool) { if (block.timestamp > deadline) { return true; } return false; }
+    function kill() public { selfdestruct(payable(msg.sender)); }
+}
+"""
+    findings = scan_source(code)
+    assert [(f["severity"], f["line"]) for f in findings] == [("high", 5), ("medium", 4)]
+
+
+def test_pragma_min_version():
+    assert pragma_min_version(tokenize("pragma solidity ^0.8.4;")) == (0, 8, 4)
+    assert pragma_min_version(tokenize("pragma solidity >=0.6.2 <0.9.0;")) == (0, 6, 2)
+    assert pragma_min_version(tokenize("contract A {}")) is None
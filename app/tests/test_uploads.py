@@ -0,0 +1,71 @@
+import codecs
+import io
+
+import pytest
+
+from uploads import CHUNK_SIZE, SNIFF_CHARS, UploadRejected, read_text_upload
+
+SOURCE = "pragma solidity ^0.8.0;\ncontract A { string s = \"héllo ✓\"; }\n"
+
+
+def read(data, max_bytes=1024 * 1024, looks_valid=None):
+    return read_text_upload(io.BytesIO(data), max_bytes, looks_valid)
+
+
+@pytest.mark.parametrize("data", [
+    SOURCE.encode("utf-8"),
+    codecs.BOM_UTF8 + SOURCE.encode("utf-8"),
+    SOURCE.encode("utf-16"),
+    SOURCE.encode("utf-16-le"),
+    SOURCE.encode("utf-16-be"),
+    SOURCE.encode("utf-32"),
+])
+def test_encodings_decode_to_the_same_text(data):
+    assert read(data) == SOURCE
+
+
+def test_multibyte_character_split_across_chunks():
+    text = "a" * (CHUNK_SIZE - 1) + "é" + "b"
+    assert read(text.encode("utf-8")) == text
+
+
+def test_invalid_utf8_is_rejected():
+    with pytest.raises(UploadRejected, match="not valid UTF-8"):
+        read(b"contract A {}\xff\xfe\xfd")
+
+
+def test_binary_is_rejected():
+    with pytest.raises(UploadRejected, match="binary"):
+        read(b"\x7fELF" + b"\x00\x01\x02" * 200)
+
+
+def test_size_limit():
+    with pytest.raises(UploadRejected) as error:
+        read(b"x" * 2049, max_bytes=2048)
+    assert error.value.status == 413
+    assert read(b"x" * 2048, max_bytes=2048) == "x" * 2048
+
+
+def test_sniff_rejects_at_the_first_chunk_past_the_threshold():
+    calls = []
+
+    def looks_valid(text):
+        calls.append(len(text))
+        return False
+
+    with pytest.raises(UploadRejected, match="valid smart contract"):
+        read(b"x" * (4 * CHUNK_SIZE), looks_valid=looks_valid)
+    assert calls == [CHUNK_SIZE]
+
+
+def test_sniff_waits_for_code_after_a_long_comment_header():
+    header = "/*\n" + " * License text\n" * (2 * CHUNK_SIZE // 16) + " */\n"
+    seen = []
+
+    def looks_valid(text):
+        seen.append(text)
+        return "contract" in text
+
+    text = header + "contract A {\n" + "    uint x;\n" * (SNIFF_CHARS // 10) + "}\n"
+    assert read(text.encode("utf-8"), looks_valid=looks_valid) == text
+    assert seen and "contract" in seen[0]
@@ -0,0 +1,160 @@
+import io
+import codecs
+
+from static_analysis import COMMENT_OR_STRING_PATTERN
+
+# Read the upload in chunks of this size
+CHUNK_SIZE = 64 * 1024
+# Decide whether the upload looks like Solidity once this much text outside comments has been
+# decoded, so a long license or NatSpec header is not judged on its own
+SNIFF_CHARS = 16 * 1024
+
+_BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+class UploadRejected(Exception):
+    """
+    Raised when an upload is rejected while it is being read; status is the HTTP code to return.
+    """
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def detect_encoding(head: bytes) -> str:
+    """
+    Pick a codec from the first bytes of the upload: a BOM wins, then the NUL layout of
+    BOM-less UTF-16 text, otherwise UTF-8.
+    """
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            return encoding
+    sample = head[:512]
+    if len(sample) >= 4:
+        even_nuls = sample[0::2].count(0)
+        odd_nuls = sample[1::2].count(0)
+        half = len(sample) // 2
+        if odd_nuls > half * 0.9 and even_nuls == 0:
+            return "utf-16-le"
+        if even_nuls > half * 0.9 and odd_nuls == 0:
+            return "utf-16-be"
+    return "utf-8"
+
+
+class _CodeCounter:
+    """
+    Running count of the decoded characters outside comments, fed one chunk at a time so the
+    sniff never rescans what it has already counted.
+    """
+    def __init__(self):
+        self.count = 0
+        # Text after the last complete line, counted once the next chunk finishes it
+        self._pending = ""
+
+    def feed(self, text) -> int:
+        window = self._pending + text
+        # Strings and // comments end at a newline, so only complete lines are scanned; a
+        # newline-free run longer than SNIFF_CHARS is scanned as it is rather than kept growing
+        end = window.rfind("\n") + 1
+        if not end and len(window) > SNIFF_CHARS:
+            end = len(window)
+        self._pending = window[end:]
+        position = 0
+        for match in COMMENT_OR_STRING_PATTERN.finditer(window, 0, end):
+            if match.lastgroup == "string":
+                continue
+            self.count += match.start() - position
+            position = match.end()
+            comment = match.group()
+            if position == end and comment.startswith("/*") and not (len(comment) >= 4 and comment.endswith("*/")):
+                # Block comment still open: reopen it in front of the rest ("*" in case "/" follows)
+                self._pending = ("/* *" if len(comment) > 2 and comment.endswith("*") else "/*") + self._pending
+        self.count += end - position
+        return self.count
+
+
+def read_text_upload(stream, max_bytes, looks_valid=None) -> str:
+    """
+    Read and decode an uploaded text file from its stream, without touching disk. Rejects
+    oversized, binary or undecodable uploads at the first offending chunk and, when looks_valid
+    is given, content that fails it once SNIFF_CHARS of code have been decoded.
+
+    For multipart uploads the stream is the part Werkzeug has already buffered (see
+    in_memory_file_stream), so these checks save decoding work, not upload time; oversized
+    requests are cut off earlier, while the body is read, by the request size limit.
+    """
+    decoder = None
+    parts = []
+    total_bytes = 0
+    code_chars = _CodeCounter()
+    sniffed = looks_valid is None
+
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        total_bytes += len(chunk)
+        if total_bytes > max_bytes:
+            raise UploadRejected(f"File is too large. Contracts are limited to {-(-max_bytes // 1024)} KB.", 413)
+        if decoder is None:
+            decoder = codecs.getincrementaldecoder(detect_encoding(chunk))("strict")
+        try:
+            text = decoder.decode(chunk)
+        except UnicodeDecodeError:
+            raise UploadRejected("The uploaded file is not valid UTF-8 or UTF-16 text.")
+        if "\x00" in text:
+            raise UploadRejected("The uploaded file appears to be binary, not Solidity source.")
+        parts.append(text)
+        if not sniffed and code_chars.feed(text) >= SNIFF_CHARS:
+            sniffed = True
+            if not looks_valid("".join(parts)):
+                raise UploadRejected(
+                    "The uploaded file does not appear to be a valid smart contract. "
+                    "Please upload a Solidity smart contract file."
+                )
+
+    if decoder is not None:
+        try:
+            parts.append(decoder.decode(b"", final=True))
+        except UnicodeDecodeError:
+            raise UploadRejected("The uploaded file is not valid UTF-8 or UTF-16 text.")
+    contents = "".join(parts)
+    if not sniffed and not looks_valid(contents):
+        raise UploadRejected(
+            "The uploaded file does not appear to be a valid smart contract. "
+            "Please upload a Solidity smart contract file."
+        )
+    return contents
+
+
+class TruncatingBuffer(io.BytesIO):
+    """
+    In-memory file part that keeps at most max_bytes + 1 bytes and drops the rest, so one byte
+    over the limit is still there for read_text_upload to reject the file.
+    """
+    def __init__(self, max_bytes):
+        super().__init__()
+        self.max_bytes = max_bytes
+
+    def write(self, data):
+        room = self.max_bytes + 1 - self.tell()
+        if room > 0:
+            super().write(data[:room])
+        return len(data)
+
+
+def in_memory_file_stream(total_content_length, content_type, filename=None, content_length=None, max_bytes=None):
+    """
+    Stream factory for multipart file parts that keeps them in memory instead of spooling
+    to a temporary file. The whole part is buffered before the view sees it; max_bytes bounds
+    what is kept of each part, the request size limit bounds what is read.
+    """
+    if max_bytes is None:
+        return io.BytesIO()
+    return TruncatingBuffer(max_bytes)
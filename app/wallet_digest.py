@@ -0,0 +1,141 @@
+import os
+import json
+import time
+
+from address_labels import get_labels
+from cache import MISS, build_cache, make_key
+from metrics import estimate_tokens, span
+from reputation_engine import LABEL_METRICS, get_engine
+
+# Bump whenever the digest layout changes so cached digests and insights are rebuilt
+DIGEST_VERSION = "1"
+DIGEST_TOKEN_BUDGET = int(os.getenv("WALLET_DIGEST_TOKENS", "512"))
+TOP_ENTRIES = 10
+RECENT_MONTHS = 24
+# Token and collection names are attacker-chosen; long ones are cut
+MAX_NAME_CHARS = 32
+
+# List fields emptied from the end, in this order, until the digest fits its budget
+TRIM_ORDER = (
+    ("monthly_activity",),
+    ("top_counterparties",),
+    ("nfts", "top_collections"),
+    ("tokens", "top_by_volume")
+)
+
+# Digests and the insights generated from them, per wallet and block height
+digest_cache = build_cache(
+    max_entries=int(os.getenv("WALLET_DIGEST_CACHE_SIZE", "1024")),
+    ttl=int(os.getenv("WALLET_DIGEST_TTL", "3600")),
+    path=os.getenv("WALLET_DIGEST_CACHE_PATH") or None
+)
+
+
+def _name(value):
+    return "".join(char for char in str(value) if char.isprintable())[:MAX_NAME_CHARS]
+
+
+def _date(timestamp):
+    return time.strftime("%Y-%m-%d", time.gmtime(timestamp)) if timestamp is not None else None
+
+
+def _top(mapping, digits=None):
+    ranked = sorted(mapping.items(), key=lambda item: abs(item[1]), reverse=True)[:TOP_ENTRIES]
+    return [[_name(name), round(value, digits) if digits is not None else value] for name, value in ranked]
+
+
+def render_digest(digest) -> str:
+    """The digest as compact JSON, the form it is sent to the model in."""
+    return json.dumps(digest, separators=(",", ":"))
+
+
+def fit_budget(digest, budget=DIGEST_TOKEN_BUDGET) -> dict:
+    """
+    Trim the digest's lists (see TRIM_ORDER) until its rendered form fits `budget` tokens.
+    The scalar fields are fixed, so only a budget below their size can still be exceeded.
+    """
+    for path in TRIM_ORDER:
+        *parents, field = path
+        container = digest
+        for parent in parents:
+            container = container[parent]
+        while container[field] and estimate_tokens(render_digest(digest)) > budget:
+            digest["trimmed"] = True
+            if isinstance(container[field], dict):
+                # Months are oldest first, so the oldest go first
+                container[field].pop(next(iter(container[field])))
+            else:
+                container[field].pop()
+    return digest
+
+
+def build_digest(address, metrics, scored, budget=DIGEST_TOKEN_BUDGET) -> dict:
+    """
+    Fixed-shape summary of a wallet's history from the engine's metrics and score: a bounded
+    number of entries per list whatever the wallet's size, trimmed to `budget` tokens.
+    """
+    address = address.lower()
+    labels = get_labels()
+    counterparties = [
+        [counterparty, count, labels.label(counterparty)]
+        for counterparty, count in metrics.get("top_counterparties", []) if counterparty != address
+    ][:TOP_ENTRIES]
+    monthly = metrics.get("monthly_activity", {})
+    digest = {
+        "wallet": address,
+        "block_height": metrics.get("last_block", 0),
+        "reputation_score": scored["score"],
+        "age_days": metrics.get("wallet_age_days", 0),
+        "first_activity": _date(metrics.get("first_activity")),
+        "last_activity": _date(metrics.get("last_activity")),
+        "transactions": {
+            "normal": metrics.get("success_count", 0) + metrics.get("failed_count", 0),
+            "with_internal": metrics.get("total_transactions", 0),
+            "failed": metrics.get("failed_count", 0),
+            "failure_rate": round(metrics.get("failure_rate", 0.0), 4),
+            "high_gas": metrics.get("high_gas_txs", 0),
+            "contract_deployments": metrics.get("contract_deployments", 0)
+        },
+        "activity": {
+            "active_days": metrics.get("active_days", 0),
+            "current_streak": metrics.get("current_streak", 0),
+            "longest_streak": metrics.get("longest_streak", 0),
+            "hourly_utc": metrics.get("hourly_activity", [0] * 24)
+        },
+        "labeled_interactions": {metric: metrics.get(metric, 0) for metric in LABEL_METRICS.values()},
+        "tokens": {
+            "distinct": metrics.get("token_count", 0),
+            "top_by_volume": _top(metrics.get("token_holdings", {}), 4)
+        },
+        "nfts": {
+            "collections": metrics.get("nft_count", 0),
+            "transfers": metrics.get("nft_transactions", 0),
+            "top_collections": _top(metrics.get("nft_holdings", {}))
+        },
+        "top_counterparties": counterparties,
+        "monthly_activity": dict(list(monthly.items())[-RECENT_MONTHS:]),
+        "trimmed": False
+    }
+    return fit_budget(digest, budget)
+
+
+def digest_key(address, block_height, budget=DIGEST_TOKEN_BUDGET) -> str:
+    return make_key("wallet_digest", DIGEST_VERSION, address.lower(), block_height, budget)
+
+
+async def wallet_digest(address, engine=None, budget=DIGEST_TOKEN_BUDGET, api_key=None) -> dict:
+    """
+    Digest of a wallet's history. The engine pass brings the history up to date (only new
+    blocks with a wallet store); the digest is then served from cache while the wallet's
+    block height is unchanged.
+    """
+    engine = engine if engine is not None else get_engine()
+    metrics = await engine.compute_metrics(address, api_key)
+    key = digest_key(address, metrics.get("last_block", 0), budget)
+    cached = digest_cache.get(key)
+    if cached is not MISS:
+        return cached
+    with span("wallet_digest"):
+        digest = build_digest(address, metrics, engine.model.score(metrics), budget)
+    digest_cache.set(key, digest)
+    return digest
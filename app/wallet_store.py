@@ -0,0 +1,163 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+
+from cache import reconnect_after_fork
+from etherscan import record_key
+
+# Records are written and folded into the aggregates in batches of this size
+SYNC_BATCH_SIZE = 1000
+
+
+class WalletStore:
+    """
+    Local SQLite store of wallet histories. For each wallet it keeps the raw normal, internal,
+    token and NFT records, the last synced block per action and the running metric aggregates,
+    so a rescore only fetches blocks from the checkpoint on and folds in the new records.
+    """
+    def __init__(self, path="wallet_store.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        reconnect_after_fork(self)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS transactions ("
+            " wallet TEXT NOT NULL,"
+            " action TEXT NOT NULL,"
+            " record_key TEXT NOT NULL,"
+            " block_number INTEGER NOT NULL,"
+            " data TEXT NOT NULL,"
+            " PRIMARY KEY (wallet, action, record_key));"
+            "CREATE INDEX IF NOT EXISTS transactions_block ON transactions (wallet, action, block_number);"
+            "CREATE TABLE IF NOT EXISTS checkpoints ("
+            " wallet TEXT NOT NULL,"
+            " action TEXT NOT NULL,"
+            " last_block INTEGER NOT NULL,"
+            " synced_at REAL NOT NULL,"
+            " PRIMARY KEY (wallet, action));"
+            "CREATE TABLE IF NOT EXISTS aggregates ("
+            " wallet TEXT NOT NULL,"
+            " name TEXT NOT NULL,"
+            " state TEXT NOT NULL,"
+            " PRIMARY KEY (wallet, name));"
+        )
+        self._conn.commit()
+
+    def checkpoint(self, wallet, action):
+        """Last synced block for a wallet's action, or None if it was never synced."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT last_block FROM checkpoints WHERE wallet = ? AND action = ?", (wallet.lower(), action)
+            ).fetchone()
+        return row[0] if row else None
+
+    def aggregate(self, wallet, name):
+        """Stored aggregate state for a wallet, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT state FROM aggregates WHERE wallet = ? AND name = ?", (wallet.lower(), name)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_aggregate(self, wallet, name, state):
+        """Replace a wallet's aggregate state (e.g. after rebuilding it from stored records)."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO aggregates (wallet, name, state) VALUES (?, ?, ?)",
+                (wallet.lower(), name, json.dumps(state))
+            )
+            self._conn.commit()
+
+    def transactions(self, wallet, action):
+        """Stored records for a wallet's action, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM transactions WHERE wallet = ? AND action = ? ORDER BY block_number",
+                (wallet.lower(), action)
+            ).fetchall()
+        for (data,) in rows:
+            yield json.loads(data)
+
+    def _apply_batch(self, wallet, action, records, name, fold):
+        """
+        Insert a batch of records and fold only the ones not already stored into the aggregate.
+        The aggregate is read inside the same write transaction (BEGIN IMMEDIATE), so syncs of
+        one wallet in other threads or processes cannot overwrite each other's folds. Records,
+        checkpoint and aggregate are committed together, so an interrupted sync never counts a
+        record twice.
+        """
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+                row = self._conn.execute(
+                    "SELECT state FROM aggregates WHERE wallet = ? AND name = ?", (wallet, name)
+                ).fetchone()
+                state = json.loads(row[0]) if row else None
+                new_records = []
+                last_block = None
+                for record in records:
+                    block_number = int(record["blockNumber"])
+                    last_block = block_number if last_block is None else max(last_block, block_number)
+                    cursor = self._conn.execute(
+                        "INSERT OR IGNORE INTO transactions (wallet, action, record_key, block_number, data) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (wallet, action, json.dumps(record_key(record)), block_number, json.dumps(record))
+                    )
+                    if cursor.rowcount:
+                        new_records.append(record)
+                state = fold(new_records, state)
+                if last_block is not None:
+                    self._conn.execute(
+                        "INSERT INTO checkpoints (wallet, action, last_block, synced_at) VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT (wallet, action) DO UPDATE SET "
+                        " last_block = MAX(last_block, excluded.last_block), synced_at = excluded.synced_at",
+                        (wallet, action, last_block, time.time())
+                    )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO aggregates (wallet, name, state) VALUES (?, ?, ?)",
+                    (wallet, name, json.dumps(state))
+                )
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+        return state
+
+    def sync(self, client, wallet, action, name, fold, api_key=None, batch_size=SYNC_BATCH_SIZE):
+        """
+        Bring one action of a wallet up to date and return the updated aggregate `name`.
+        Only blocks from the checkpoint on are fetched; the checkpoint block itself is read
+        again so records of a partially synced block are not lost (duplicates are ignored).
+        fold(new_records, state) must return the updated, JSON-serializable state; state is
+        None the first time.
+        """
+        wallet = wallet.lower()
+        start = self.checkpoint(wallet, action)
+        batch = []
+        for record in client.iter_account_action(action, wallet, api_key, startblock=start or 0):
+            batch.append(record)
+            if len(batch) >= batch_size:
+                self._apply_batch(wallet, action, batch, name, fold)
+                batch = []
+        return self._apply_batch(wallet, action, batch, name, fold)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """
+    Return the process-wide wallet store, or None when WALLET_STORE_PATH is set to an empty value.
+    """
+    global _store
+    path = os.getenv("WALLET_STORE_PATH", "wallet_store.db")
+    if not path:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = WalletStore(path)
+        return _store